@@ -1,22 +1,61 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Union, Any
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from .settings import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Pinning min/max rounds to the configured cost makes
+# verify_and_update report a new hash whenever BCRYPT_ROUNDS changes.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt on its own small thread pool instead of Starlette's shared
+    threadpool, so a burst of logins cannot starve sync routes. bcrypt releases
+    the GIL, so threads hash in parallel without the cost of a process pool.
+    Once `workers + queue_limit` jobs are pending, new ones are rejected with 503.
+    """
+    def __init__(self, workers: int, queue_limit: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._limit = workers + queue_limit
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = 0
+
+    async def run(self, fn: Callable, *args) -> Any:
+        if self._pending >= self._limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+password_pool = PasswordHasherPool(settings.BCRYPT_WORKERS, settings.BCRYPT_QUEUE_LIMIT)
 
 # JWT settings
 ALGORITHM = "HS256"
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None, claims: Dict[str, Any] = None) -> str:
     """
     Create a JWT access token.
     
     Args:
         subject: The subject (usually user ID) to encode in the token
         expires_delta: Optional custom expiration time
+        claims: Optional extra claims, e.g. the user's role
     
     Returns:
         JWT token string
@@ -28,28 +67,40 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Union[str, None]:
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
     """
-    Verify a JWT token and return the subject (user ID).
+    Verify a JWT token and return all of its claims.
     
     Args:
         token: JWT token string
     
     Returns:
-        User ID if token is valid, None otherwise
+        The claims if the token is valid and has a subject, None otherwise
     """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return user_id
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+def verify_token(token: str) -> Union[str, None]:
+    """
+    Verify a JWT token and return the subject (user ID).
+    
+    Args:
+        token: JWT token string
+    
+    Returns:
+        User ID if token is valid, None otherwise
+    """
+    payload = decode_token(token)
+    return payload["sub"] if payload else None
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -74,4 +125,30 @@ def get_password_hash(password: str) -> str:
     Returns:
         Hashed password
     """
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password on the bcrypt pool.
+    
+    Args:
+        password: Plain text password
+    
+    Returns:
+        Hashed password
+    """
+    return await password_pool.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the bcrypt pool, and rehash it if the stored hash
+    does not use the current cost factor.
+    
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password
+    
+    Returns:
+        (True, new_hash or None) if the password matches, (False, None) otherwise
+    """
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
@@ -1,14 +1,23 @@
-from pymongo import MongoClient
+from typing import Any, Awaitable, Callable, Optional
+from pymongo import MongoClient, AsyncMongoClient
 from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.errors import OperationFailure
 
 from .config import settings
 
 class DBConnection:
     """
     Manages the connection to the MongoDB database.
-    This class ensures that there is only one client instance created.
+    This class ensures that there is only one client instance created
+    for each of the sync and async drivers.
     """
     _client: MongoClient | None = None
+    _async_client: AsyncMongoClient | None = None
+    # Flipped to False the first time the server rejects a transaction
+    # (standalone mongod), after which writes run without one.
+    transactions_supported: bool = True
 
     def __init__(self):
         # Establish connection to MongoDB using the URI from settings.
@@ -25,11 +34,35 @@ class DBConnection:
         if DBConnection._client is None:
             # This should not happen if initialized properly, but it's a safeguard.
             self.__init__()
-        
+
         # This is guaranteed to not be None because of the check above.
         client = DBConnection._client
         return client[settings.MONGO_DB_NAME]
 
+    def get_async_database(self) -> AsyncDatabase:
+        """
+        Returns the async database instance specified in the settings.
+        The async client is created lazily so it binds to the running event loop.
+
+        Returns:
+            AsyncDatabase: The async PyMongo database object.
+        """
+        if DBConnection._async_client is None:
+            DBConnection._async_client = AsyncMongoClient(settings.MONGO_URI)
+        return DBConnection._async_client[settings.MONGO_DB_NAME]
+
+    @classmethod
+    async def close(cls):
+        """
+        Closes both the sync and async clients if they were opened.
+        """
+        if cls._client:
+            cls._client.close()
+            cls._client = None
+        if cls._async_client:
+            await cls._async_client.close()
+            cls._async_client = None
+
 # Instantiate the connection manager.
 db_connection = DBConnection()
 
@@ -39,3 +72,31 @@ def get_db() -> Database:
     Returns a database instance from the connection manager.
     """
     return db_connection.get_database()
+
+def get_async_db() -> AsyncDatabase:
+    """
+    Returns an async database instance from the connection manager.
+    Use this for async route handlers and services.
+    """
+    return db_connection.get_async_database()
+
+# Server error code for "Transaction numbers are only allowed on a replica set member or mongos".
+_ILLEGAL_OPERATION = 20
+
+async def run_in_transaction(
+    db: AsyncDatabase, callback: Callable[[Optional[AsyncClientSession]], Awaitable[Any]]
+) -> Any:
+    """
+    Runs `callback(session)` inside a multi-document transaction, retrying on
+    transient errors. On a standalone server, where transactions are not
+    available, the callback is run once with `session=None` instead.
+    """
+    if DBConnection.transactions_supported:
+        try:
+            async with db.client.start_session() as session:
+                return await session.with_transaction(callback)
+        except OperationFailure as e:
+            if e.code != _ILLEGAL_OPERATION:
+                raise
+            DBConnection.transactions_supported = False
+    return await callback(None)
@@ -1,8 +1,13 @@
+import atexit
 import inspect
+import json
 import logging
 import os
+import queue
+import random
+import sys
 # from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from fastapi import Request
 # from fastapi.encoders import jsonable_encoder
 from ..core.settings import settings
@@ -12,6 +17,128 @@ from pymongo.collection import Collection, ObjectId
 from datetime import datetime
 from fastapi.encoders import jsonable_encoder
 from typing import Union
+
+
+class OverflowQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue that applies an overflow policy when the
+    listener falls behind:
+
+    - "block": wait for room, so no record is lost.
+    - "drop_oldest": discard the oldest queued record to make room.
+    - "sample": keep one in `sample_rate` records below WARNING and drop the
+      rest; WARNING and above always wait for room.
+    """
+    def __init__(self, log_queue: queue.Queue, policy: str = "block", sample_rate: int = 10):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.sample_rate = max(1, sample_rate)
+        self.dropped = 0
+        self._overflows = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.policy == "drop_oldest":
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                try:
+                    self.queue.put_nowait(record)
+                    return
+                except queue.Full:
+                    continue
+
+        self._overflows += 1
+        if record.levelno >= logging.WARNING or self._overflows % self.sample_rate == 0:
+            self.queue.put(record)
+        else:
+            self.dropped += 1
+
+
+def render_capped(value, max_bytes: int) -> str:
+    """
+    Renders a payload as JSON, stopping once `max_bytes` have been produced, so
+    logging a large response costs no more than its first few kilobytes.
+    Strings are logged as-is (capped); other unknown types fall back to str().
+    The cap is on the UTF-8 encoding, cut back to a whole character.
+    """
+    if isinstance(value, str):
+        text = value
+    else:
+        encoder = json.JSONEncoder(default=_json_default)
+        parts, size = [], 0
+        try:
+            # ensure_ascii is on, so characters and bytes are the same here
+            for chunk in encoder.iterencode(value):
+                parts.append(chunk)
+                size += len(chunk)
+                if size > max_bytes:
+                    break
+            text = "".join(parts)
+        except (TypeError, ValueError):
+            text = str(value)
+    # No character encodes to less than a byte, so the prefix is enough to decide
+    encoded = text[:max_bytes + 1].encode("utf-8")
+    if len(encoded) > max_bytes:
+        return encoded[:max_bytes].decode("utf-8", "ignore") + "...(truncated)"
+    return text
+
+
+def _json_default(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    The classic single-line format; fields passed by define_logger are joined
+    as "KEY: value - KEY: value".
+    """
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        if fields is not None:
+            record.message = " - ".join(f"{key}: {value}" for key, value in fields.items())
+        return super().formatMessage(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per line, so logs can be parsed without regexes.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+        }
+        fields = getattr(record, "fields", None)
+        if fields is not None:
+            entry.update({key.lower(): value for key, value in fields.items()})
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _BlockingSentinelListener(QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue."""
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
 class LoggerConfig:
     """
     Logger configuration class to setup logging for the application.
@@ -68,6 +195,10 @@ class LoggerConfig:
     def setup_logger(self):
         """
         Setup the logger with file and console handlers.
+
+        The handlers are owned by a single listener thread fed through a bounded
+        queue, so logging calls never touch the disk. The app logger and the root
+        logger share the same queue and handlers.
  
         Raises:
             HTTPException: If there is an error setting up the logger.
@@ -83,29 +214,59 @@ class LoggerConfig:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(30)
  
-            formatter = logging.Formatter(self.log_format)
+            if settings.LOG_FORMAT == "json":
+                formatter = JsonLinesFormatter()
+            else:
+                formatter = TextFormatter(self.log_format)
             file_handler.setFormatter(formatter)
             console_handler.setFormatter(formatter)
- 
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
- 
-            root_file_handler = RotatingFileHandler(
-                self.log_file_path, backupCount=21, maxBytes=1024 * 1024 * 20, encoding="utf-8"
+
+            self.queue_handler = OverflowQueueHandler(
+                queue.Queue(maxsize=settings.LOG_QUEUE_SIZE),
+                policy=settings.LOG_OVERFLOW_POLICY,
+                sample_rate=settings.LOG_SAMPLE_RATE,
             )
-            root_file_handler.setLevel(self.env)
- 
-            root_console_handler = logging.StreamHandler()
-            root_console_handler.setLevel(30)
- 
-            root_file_handler.setFormatter(formatter)
-            root_console_handler.setFormatter(formatter)
+            self.listener = _BlockingSentinelListener(
+                self.queue_handler.queue, file_handler, console_handler, respect_handler_level=True
+            )
+            self.listener.start()
+            atexit.register(self.shutdown)
  
-            self.root_logger.addHandler(root_file_handler)
-            self.root_logger.addHandler(root_console_handler)
+            self.logger.addHandler(self.queue_handler)
+            self.root_logger.addHandler(self.queue_handler)
         except Exception as e:
             print(f"Failed to setup logger handlers: {str(e)}")
+
+    def shutdown(self):
+        """
+        Flushes every queued record to the handlers and stops the listener
+        thread. Anything logged afterwards is written directly by the handlers.
+        Safe to call more than once.
+        """
+        listener = getattr(self, "listener", None)
+        if listener is None or listener._thread is None:
+            return
+        try:
+            listener.stop()
+            for target in (self.logger, self.root_logger):
+                target.removeHandler(self.queue_handler)
+                for handler in listener.handlers:
+                    target.addHandler(handler)
+            if self.queue_handler.dropped:
+                print(f"Logger dropped {self.queue_handler.dropped} records under load ({self.queue_handler.policy}).")
+        except Exception as e:
+            print(f"Failed to shutdown logger: {str(e)}")
  
+    @staticmethod
+    def _sample_payload(request: Request = None) -> bool:
+        """Decides whether payload fields are logged for this call."""
+        rate = settings.LOG_PAYLOAD_SAMPLE_RATE
+        if request is not None and settings.LOG_PAYLOAD_SAMPLE_RATES:
+            route = request.scope.get("route")
+            path = getattr(route, "path", None) or request.url.path
+            rate = settings.LOG_PAYLOAD_SAMPLE_RATES.get(path, rate)
+        return rate >= 1 or random.random() < rate
+
     def define_logger(
         self,
         level: int,
@@ -118,12 +279,21 @@ class LoggerConfig:
     ):
         """
         Write logs with detailed information.
+
+        Nothing is formatted when `level` is disabled. The calling file and
+        function are read from the caller's frame, which is much cheaper than
+        `inspect.stack()` because no source lines are loaded.
+
+        `body` and `response` are rendered as JSON capped at
+        LOG_PAYLOAD_MAX_BYTES, and only on the share of calls set for the route
+        by LOG_PAYLOAD_SAMPLE_RATES (default LOG_PAYLOAD_SAMPLE_RATE).
  
         Args:
             level (int): Logging level.
             user (dict, optional): User information.
             request (Request, optional): Request data.
-            loggName (FrameInfo, optional): File and function name.
+            loggName (FrameInfo, optional): File and function name. Only kept for
+                older call sites; the caller is detected automatically.
             pid (int, optional): Process ID.
             message (str, optional): Log message.
             body (dict, optional): Request body.
@@ -133,22 +303,31 @@ class LoggerConfig:
             HTTPException: If there is an error writing logs.
         """
         try:
-           
+            if not self.logger.isEnabledFor(level):
+                return
+
+            if loggName is not None:
+                caller = f"{loggName[1]}:{loggName[3]}"
+            else:
+                code = sys._getframe(1).f_code
+                caller = f"{code.co_filename}:{code.co_name}"
+
             log_parts = {
                 "IP": f"{request.client.host}" if request else None,
                 "URL": f"{request.method} {request.url}" if request else None,
                 "MESSAGE": message,
                 "PID": str(pid) if pid is not None else None,
-                "FILE": f"{loggName[1]}:{loggName[3]}" if loggName else None,
-                "BODY": str(body) if body is not None else None,
-                "RESPONSE": str(response) if response is not None else None,
+                "FILE": caller,
             }
- 
-            txt = " - ".join(
-                [f"{key}: {value}" for key, value in log_parts.items() if value is not None]
-            )
- 
-            self.logger.log(level=level, msg=txt)
+            if (body is not None or response is not None) and self._sample_payload(request):
+                cap = settings.LOG_PAYLOAD_MAX_BYTES
+                if body is not None:
+                    log_parts["BODY"] = render_capped(body, cap)
+                if response is not None:
+                    log_parts["RESPONSE"] = render_capped(response, cap)
+
+            fields = {key: value for key, value in log_parts.items() if value is not None}
+            self.logger.log(level=level, msg=message or "", extra={"fields": fields})
         except Exception as e:
             print(f"Failed to write logs: {str(e)}")
  
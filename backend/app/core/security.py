@@ -2,44 +2,65 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pymongo.database import Database
-from typing import List
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import Any, Dict, List
 
-from app.core.db_connection import get_db
-from app.core.auth import verify_token
+from app.core.db_connection import get_async_db
+from app.core.auth import decode_token
+from app.core.settings import settings
 from app.models.user_model import User, UserRole
-from app.repo.user_repo import UserRepository
+from app.repo.user_repo import AsyncUserRepository
+from app.utils.cache import TTLCache
 
 # This will be used to extract the Bearer token from the Authorization header
 oauth2_scheme = HTTPBearer()
 
+# Validated users by id, so authenticated requests skip the users lookup.
+# UserService invalidates entries when it changes a user.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def get_token_claims(token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    Dependency that verifies the JWT and returns its claims.
+    FastAPI caches it per request, so the token is decoded once even when
+    several dependencies need it. Decoding is cheap, so it runs on the event
+    loop rather than taking a threadpool hop.
+    """
+    claims = decode_token(token.credentials)
+    if claims is None:
+        raise _credentials_exception()
+    return claims
+
 async def get_current_user(
-    db: Database = Depends(get_db), 
-    token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)
+    db: AsyncDatabase = Depends(get_async_db), 
+    claims: Dict[str, Any] = Depends(get_token_claims)
 ) -> User:
     """
     Dependency to get the current user from a JWT token.
-    Verifies the token, then fetches the user from the local database.
+    Verifies the token, then returns the user from the cache or the local database.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Verify the JWT token
-    user_id = verify_token(token.credentials)
-    if user_id is None:
-        raise credentials_exception
-    
+    user_id = claims["sub"]
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
     # Fetch the user from the database
-    user_repo = UserRepository(db)
-    user = user_repo.get_by_id(user_id)
+    user_repo = AsyncUserRepository(db)
+    user = await user_repo.get_by_id(user_id)
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    return User.model_validate(user)
+    validated = User.model_validate(user)
+    user_cache.set(user_id, validated)
+    return validated
 
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
@@ -53,14 +74,24 @@ async def get_current_active_user(
 class RoleChecker:
     """
     Dependency that checks if the current user has one of the allowed roles.
+    Tokens issued at login carry the role as a signed claim, so the check needs
+    no database access; older tokens without it fall back to the user record.
     """
     def __init__(self, allowed_roles: List[UserRole]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, user: User = Depends(get_current_user)):
-        if user.role not in self.allowed_roles:
+    async def __call__(
+        self,
+        claims: Dict[str, Any] = Depends(get_token_claims),
+        db: AsyncDatabase = Depends(get_async_db),
+    ) -> UserRole:
+        role = claims.get("role")
+        if role is None:
+            user = await get_current_user(db, claims)
+            role = user.role
+        if role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have permission to access this resource."
             )
-        return user
\ No newline at end of file
+        return UserRole(role)
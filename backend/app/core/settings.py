@@ -1,5 +1,6 @@
 import os
 import logging
+from typing import Dict, Literal
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,10 +16,52 @@ class Settings(BaseSettings):
     
     # --- Logger Settings
     LOGGER: int = logging.INFO 
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the writer thread
+    LOG_OVERFLOW_POLICY: Literal["block", "drop_oldest", "sample"] = "block"  # when the buffer is full
+    LOG_SAMPLE_RATE: int = 10  # "sample" policy keeps 1 in N records below WARNING
+    LOG_FORMAT: Literal["text", "json"] = "text"  # "json" writes one JSON object per line
+    LOG_PAYLOAD_MAX_BYTES: int = 2048  # cap for logged BODY/RESPONSE fields
+    LOG_PAYLOAD_SAMPLE_RATE: float = 1.0  # share of log calls that include BODY/RESPONSE
+    LOG_PAYLOAD_SAMPLE_RATES: Dict[str, float] = {}  # overrides keyed by route path, e.g. {"/api/stock-ledger/": 0.01}
     
     # --- JWT Settings
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    USER_CACHE_SIZE: int = 1024  # authenticated users kept in memory
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # --- Password Hashing Settings
+    BCRYPT_ROUNDS: int = 12  # cost factor; existing hashes are upgraded on login
+    BCRYPT_WORKERS: int = 2  # threads dedicated to hashing
+    BCRYPT_QUEUE_LIMIT: int = 32  # pending hashes beyond the workers before returning 503
+
+    # --- Automation Settings
+    AUTOMATION_WORK_SECONDS: int = 30  # simulated processing time per work order
+    AUTOMATION_LEASE_SECONDS: int = 90  # claim lease, renewed by a heartbeat while a job runs
+    AUTOMATION_POLL_SECONDS: int = 300  # safety-net poll; work is normally picked up from change events
+    CHANGE_STREAMS_ENABLED: bool = True  # falls back to in-process events when unsupported
+    LEASE_REAPER_SECONDS: int = 60  # how often expired leases are requeued
+
+    # --- Analytics Settings
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30  # upper bound on dashboard staleness
+
+    # --- WebSocket Settings
+    WS_SEND_QUEUE_SIZE: int = 256  # messages buffered per subscriber before the slow-consumer policy applies
+    WS_SLOW_CONSUMER_POLICY: Literal["drop", "coalesce", "disconnect"] = "drop"
+    WS_MAX_SUBSCRIPTIONS: int = 1000  # channels one socket may subscribe to
+    # Recent events kept per topic for clients resuming with last_event_id. Event
+    # ids are per worker, so with several workers resuming needs sticky sessions;
+    # a client reconnecting to another worker is told to resync.
+    WS_REPLAY_BUFFER_SIZE: int = 1000
+    WS_BROKER: Literal["memory", "mongo", "unix"] = "memory"  # "mongo" or "unix" when running several workers
+    WS_BROKER_COLLECTION: str = "ws_events"  # capped collection used by the "mongo" broker
+    WS_BROKER_CAPPED_BYTES: int = 16 * 1024 * 1024
+    WS_BROKER_SOCKET_DIR: str = "/tmp/mrp-ws-broker"  # one datagram socket per worker for the "unix" broker
+    SSE_HEARTBEAT_SECONDS: float = 15  # idle time before an SSE stream is sent a keep-alive comment
+
+    # --- Polling Scheduler Settings
+    POLLING_MAX_CONCURRENCY: int = 10  # background jobs allowed to run at once
+    POLLING_JITTER: float = 0.1  # +/- fraction of each task's interval
 
     @field_validator("SECRET_KEY")
     @classmethod
@@ -1,3 +1,4 @@
+import asyncio
 import uvicorn
 import logging
 import os
@@ -7,6 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
 
 # Importing the connection manager from the core directory
 from app.core.db_connection import DBConnection
+from app.repo.base import BaseRepository
+from app.repo.stock_balance_repo import StockBalanceRepository
+from app.repo.production_rollup_repo import ProductionRollupRepository
 # Import the routes
 from pymongo import MongoClient
 from app.core.db_connection import DBConnection
@@ -21,34 +25,69 @@ from app.routes.ledger_routes import router as ledger_router
 from app.routes.analytics_routes import router as analytics_router
 from app.routes.inventory_route import router as inventory_router
 from app.core.logger import logs 
+from app.core.settings import settings
 from app.service.automation_service import AutomationService
 from app.service.polling_service import polling_service
-import inspect
+from app.service.change_stream_service import ChangeStreamService
+from app.service.analytics_service import invalidate_dashboard_cache
+from app.utils.event_bus import event_bus, MANUFACTURING_ORDERS, WORK_ORDERS
+from app.utils.websocket_manager import connection_manager
+from app.utils.ws_broker import create_broker
 import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Application startup...", loggName=log_info, pid=os.getpid())
+    logs.define_logger(level=logging.INFO, message="Application startup...", pid=os.getpid())
     db_connection = DBConnection()
     app.state.db_connection = db_connection
-    logs.define_logger(level=logging.INFO, message="MongoDB connection established.", loggName=log_info, pid=os.getpid())
+    logs.define_logger(level=logging.INFO, message="MongoDB connection established.", pid=os.getpid())
+
+    # --- INDEXES: Reconcile the indexes declared by each repository ---
+    index_summary = await asyncio.to_thread(BaseRepository.ensure_registered_indexes, db_connection.get_database())
+    logs.define_logger(level=logging.INFO, message=f"Indexes ensured: {index_summary}", pid=os.getpid())
+
+    # --- INVENTORY: Build the stock balance projection on first start ---
+    balance_repo = StockBalanceRepository(db_connection.get_database())
+    if await asyncio.to_thread(balance_repo.needs_bootstrap):
+        product_count = await asyncio.to_thread(balance_repo.rebuild_from_ledger)
+        logs.define_logger(level=logging.INFO, message=f"Stock balance projection built for {product_count} products.", pid=os.getpid())
+
+    # --- ANALYTICS: Build the daily production rollups on first start ---
+    rollup_repo = ProductionRollupRepository(db_connection.get_database())
+    if await asyncio.to_thread(rollup_repo.needs_bootstrap):
+        rollup_count = await asyncio.to_thread(rollup_repo.rebuild_from_orders)
+        logs.define_logger(level=logging.INFO, message=f"Production rollups built: {rollup_count} day/product documents.", pid=os.getpid())
     
     # --- AUTOMATION: Setup and start the polling service ---
-    db = db_connection.get_database()
+    db = db_connection.get_async_database()
     automation_service = AutomationService(db)
-    polling_service.register_task(automation_service.polling_task)
+    polling_service.register_task(automation_service.polling_task, interval_seconds=settings.AUTOMATION_POLL_SECONDS, on_free_slot=True)
+    polling_service.register_task(automation_service.reap_expired_leases, interval_seconds=settings.LEASE_REAPER_SECONDS)
     await polling_service.start_polling()
+
+    # --- EVENTS: React to work order changes as they happen ---
+    event_bus.subscribe(WORK_ORDERS, automation_service.on_work_order_event)
+    event_bus.subscribe(MANUFACTURING_ORDERS, invalidate_dashboard_cache)
+    change_streams = ChangeStreamService(db)
+    if settings.CHANGE_STREAMS_ENABLED:
+        await change_streams.start()
+
+    # --- WEBSOCKETS: Share live updates between workers ---
+    await connection_manager.start(create_broker(settings.WS_BROKER, db))
     
     yield
     
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Application shutdown...", loggName=log_info, pid=os.getpid())
-    # --- AUTOMATION: Stop the polling service ---
+    logs.define_logger(level=logging.INFO, message="Application shutdown...", pid=os.getpid())
+    # --- AUTOMATION: Stop the change stream watchers and the polling service ---
+    await change_streams.stop()
     await polling_service.stop_polling()
-    if DBConnection._client:
-        DBConnection._client.close()
-        logs.define_logger(level=logging.INFO, message="MongoDB connection closed.", loggName=log_info, pid=os.getpid())
+    # --- WEBSOCKETS: Stop the broker and close live connections ---
+    await connection_manager.stop()
+    if DBConnection._client or DBConnection._async_client:
+        await DBConnection.close()
+        logs.define_logger(level=logging.INFO, message="MongoDB connection closed.", pid=os.getpid())
+    # --- LOGGING: Flush queued records before the process exits ---
+    logs.shutdown()
 
 app = FastAPI(
     title="Manufacturing Management API",
@@ -67,6 +106,7 @@ app.add_middleware(
     allow_credentials=True,      # Allows cookies to be included in requests
     allow_methods=["*"],         # Allows all methods (GET, POST, etc.)
     allow_headers=["*"],         # Allows all headers
+    expose_headers=["X-Next-Cursor"],  # Lets the frontend read the work order page cursor
 )
 # --------------------------------
 
@@ -80,10 +120,15 @@ app.include_router(websocket_router, prefix="/api")
 app.include_router(inventory_router, prefix="/api")
 
 @app.get("/", tags=["Health Check"])
-def health_check():
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Health check endpoint called.", loggName=log_info, pid=os.getpid())
-    return {"status": "healthy", "message": "Welcome to the Manufacturing Management API!"}
+async def health_check():
+    # Runs on the event loop: the stats read structures the loop mutates
+    logs.define_logger(level=logging.INFO, message="Health check endpoint called.", pid=os.getpid())
+    return {
+        "status": "healthy",
+        "message": "Welcome to the Manufacturing Management API!",
+        "scheduler": polling_service.stats(),
+        "websockets": connection_manager.stats(),
+    }
 
 #include the routes
 app.include_router(work_order_router, prefix="/api")
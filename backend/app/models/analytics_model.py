@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -19,3 +20,48 @@ class AverageCycleTime(BaseModel):
     average_hours: float
     average_minutes: float
     total_orders_calculated: int
+    p50_hours: Optional[float] = None
+    p95_hours: Optional[float] = None
+
+class DashboardKPIs(BaseModel):
+    status_overview: StatusOverview
+    throughput: ProductionThroughput
+    cycle_time: AverageCycleTime
+    computed_at: datetime
+    cache_age_seconds: float
+
+class TimeSeriesPoint(BaseModel):
+    bucket: datetime
+    value: float
+
+class TimeSeries(BaseModel):
+    series: str
+    granularity: str
+    timezone: str
+    start: datetime
+    end: datetime
+    points: List[TimeSeriesPoint]
+
+class WorkCentreUtilization(BaseModel):
+    work_centre_id: str
+    name: Optional[str] = None
+    cost_per_hour: Optional[float] = None
+    work_orders: int
+    manufacturing_orders: int
+    busy_hours: float
+    planned_hours: float
+    queue_hours: float
+    avg_queue_minutes: float
+    utilization_pct: float
+    cost: float
+    cost_per_mo: float
+
+class WorkCentreAnalytics(BaseModel):
+    period: str
+    start: datetime
+    end: datetime
+    window_hours: float
+    work_centres: List[WorkCentreUtilization]
+    manufacturing_orders: int
+    total_cost: float
+    average_cost_per_mo: float
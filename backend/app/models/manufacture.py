@@ -15,6 +15,9 @@ class WorkOrder(BaseDBModel):
     work_center_id: str = Field(..., description="Reference to a WorkCenter's ID")
     status: Literal["pending", "in_progress", "processing", "paused", "done"] = Field(default="pending")
     sequence: int = Field(default=0, description="The order of this task in the sequence")
+    ready_at: Optional[datetime] = Field(default=None, description="When the task became ready to be worked on")
+    started_at: Optional[datetime] = Field(default=None, description="When work on the task started")
+    completed_at: Optional[datetime] = Field(default=None, description="When the task was completed")
 
 class ManufacturingOrder(BaseDBModel):
     """Represents a full production job to create a specific quantity of a product"""
@@ -24,6 +27,8 @@ class ManufacturingOrder(BaseDBModel):
     status: Literal["planned", "in_progress", "done", "cancelled"] = Field(default="planned")
     bom_snapshot: BillOfMaterials = Field(..., description="A copy of the BOM at the time of creation")
     work_orders: List[WorkOrder] = Field(default=[], description="List of work orders")
+    started_at: Optional[datetime] = Field(default=None, description="When production started")
+    completed_at: Optional[datetime] = Field(default=None, description="When the order was completed")
 
 class ManufacturingOrderCreate(BaseCreateModel):
     """Defines the shape of the input data required to create a new MO"""
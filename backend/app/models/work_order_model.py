@@ -1,7 +1,8 @@
 # app/models/wo_model.py
 
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import Literal, Optional
 from app.models.base_model import BaseDBModel # Assuming this base model exists
 
 class WorkOrderBase(BaseModel):
@@ -14,7 +15,9 @@ class WorkOrderBase(BaseModel):
 
 class WorkOrderInDB(BaseDBModel, WorkOrderBase):
     """Work Order model as it is stored in the database."""
-    pass
+    ready_at: Optional[datetime] = Field(default=None, description="When the WO became ready to be worked on")
+    started_at: Optional[datetime] = Field(default=None, description="When work on the WO started")
+    completed_at: Optional[datetime] = Field(default=None, description="When the WO was completed")
 
 class WorkOrderUpdate(BaseModel):
     """Model for updating the status of a Work Order via PATCH request."""
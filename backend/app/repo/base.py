@@ -1,14 +1,37 @@
-from typing import Any, Dict, List, Optional
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pymongo.collection import Collection
-from pymongo.results import InsertOneResult, UpdateResult, DeleteResult
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.results import InsertOneResult, InsertManyResult, UpdateResult, DeleteResult
+from pymongo.asynchronous.client_session import AsyncClientSession
 from datetime import datetime
+from ..core.logger import logs
+from ..utils.pagination import encode_cursor, keyset_filter
+
+# Index options that must match for an existing index to count as in sync.
+_INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
 
 class BaseRepository:
     """
     A base class for repository patterns that provides generic CRUD operations
     for a MongoDB collection with clean ObjectId handling.
+
+    Subclasses declare the indexes their queries rely on in ``indexes``; every
+    subclass that does so is recorded in ``registry`` and reconciled at startup
+    by ``ensure_registered_indexes``.
     """
+    indexes: List[IndexModel] = []
+    registry: List[type] = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("indexes"):
+            BaseRepository.registry.append(cls)
+
     def __init__(self, collection: Collection):
         """
         Initializes the repository with a specific MongoDB collection.
@@ -120,4 +143,265 @@ class BaseRepository:
         Returns:
             DeleteResult: The result from the delete operation.
         """
-        return self.collection.delete_one({"_id": ObjectId(item_id)})
\ No newline at end of file
+        return self.collection.delete_one({"_id": ObjectId(item_id)})
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """
+        Idempotently reconciles the declared indexes with the collection.
+        Missing indexes are created; indexes whose key or options differ from
+        the declaration, and indexes that are not declared at all, are logged
+        as drift but left untouched.
+
+        Returns:
+            Dict[str, List[str]]: Index names grouped as created, drifted and undeclared.
+        """
+        existing = self.collection.index_information()
+        summary = {"created": [], "drifted": [], "undeclared": []}
+        missing = []
+
+        for index in self.indexes:
+            spec = index.document
+            name = spec["name"]
+            current = existing.get(name)
+            if current is None:
+                missing.append(index)
+                continue
+            same_key = list(current["key"]) == list(spec["key"].items())
+            same_options = all(current.get(opt) == spec.get(opt) for opt in _INDEX_OPTIONS)
+            if not (same_key and same_options):
+                summary["drifted"].append(name)
+
+        declared = {index.document["name"] for index in self.indexes}
+        summary["undeclared"] = [name for name in existing if name != "_id_" and name not in declared]
+
+        for index in missing:
+            name = index.document["name"]
+            try:
+                self.collection.create_indexes([index])
+                summary["created"].append(name)
+            except OperationFailure as e:
+                logs.define_logger(logging.ERROR, message=f"Failed to create index '{name}' on '{self.collection.name}': {e}")
+
+        if summary["drifted"] or summary["undeclared"]:
+            logs.define_logger(
+                logging.WARNING,
+                message=f"Index drift on '{self.collection.name}': drifted={summary['drifted']} undeclared={summary['undeclared']}"
+            )
+        return summary
+
+    @classmethod
+    def ensure_registered_indexes(cls, db: Database) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Reconciles the declared indexes of every registered repository.
+
+        Args:
+            db (Database): The PyMongo database holding the collections.
+
+        Returns:
+            Dict[str, Dict[str, List[str]]]: The reconciliation summary per collection.
+        """
+        results = {}
+        for repo_cls in cls.registry:
+            repo = repo_cls(db)
+            results[repo.collection.name] = repo.ensure_indexes()
+        return results
+
+class AsyncBaseRepository(BaseRepository):
+    """
+    Awaitable counterpart of BaseRepository for use from async services.
+    Exposes the same CRUD surface on top of an AsyncCollection so database
+    round trips do not block the event loop.
+    """
+    def __init__(self, collection: AsyncCollection):
+        """
+        Initializes the repository with a specific async MongoDB collection.
+
+        Args:
+            collection (AsyncCollection): The async PyMongo collection object.
+        """
+        self.collection = collection
+
+    async def get_all(self, query: Dict[str, Any] = {}) -> List[Dict[str, Any]]:
+        """
+        Retrieves all documents from the collection that match a query.
+
+        Args:
+            query (Dict[str, Any], optional): A MongoDB query filter. Defaults to {}.
+
+        Returns:
+            List[Dict[str, Any]]: A list of documents with string IDs.
+        """
+        docs = await self.collection.find(query).to_list()
+        return self._convert_ids_to_strings(docs)
+
+    async def get_by_id(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a single document by its unique _id.
+
+        Args:
+            item_id (str): The string representation of the document's ObjectId.
+
+        Returns:
+            Optional[Dict[str, Any]]: The document if found with string ID, otherwise None.
+        """
+        doc = await self.collection.find_one({"_id": ObjectId(item_id)})
+        return self._convert_id_to_string(doc) if doc else None
+
+    async def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find a single document matching the query.
+
+        Args:
+            query (Dict[str, Any]): MongoDB query filter.
+
+        Returns:
+            Optional[Dict[str, Any]]: The document if found with string ID, otherwise None.
+        """
+        doc = await self.collection.find_one(query)
+        return self._convert_id_to_string(doc) if doc else None
+
+    async def create(self, data: Dict[str, Any]) -> InsertOneResult:
+        """
+        Creates a new document in the collection.
+
+        Args:
+            data (Dict[str, Any]): The data for the new document.
+
+        Returns:
+            InsertOneResult: The result from the insert operation, containing the new _id.
+        """
+        prepared_data = self._prepare_create_data(data)
+        return await self.collection.insert_one(prepared_data)
+
+    async def create_many(
+        self, data_list: List[Dict[str, Any]], session: Optional[AsyncClientSession] = None
+    ) -> InsertManyResult:
+        """
+        Creates several documents in a single round trip.
+
+        Args:
+            data_list (List[Dict[str, Any]]): The data for the new documents, inserted in order.
+            session (Optional[AsyncClientSession]): Session to run the insert in, e.g. inside a transaction.
+
+        Returns:
+            InsertManyResult: The result from the insert, with inserted_ids in input order.
+        """
+        prepared = [self._prepare_create_data(data) for data in data_list]
+        return await self.collection.insert_many(prepared, ordered=True, session=session)
+
+    async def update(self, item_id: str, data: Dict[str, Any]) -> UpdateResult:
+        """
+        Updates an existing document by its _id.
+
+        Args:
+            item_id (str): The string representation of the document's ObjectId.
+            data (Dict[str, Any]): The fields to set on the document.
+
+        Returns:
+            UpdateResult: The result from the update operation.
+        """
+        data["updated_at"] = datetime.utcnow()
+        return await self.collection.update_one({"_id": ObjectId(item_id)}, {"$set": data})
+
+    async def update_where(
+        self, query: Dict[str, Any], data: Dict[str, Any], session: Optional[AsyncClientSession] = None
+    ) -> UpdateResult:
+        """
+        Sets fields on the first document matching a query. Putting the expected
+        current state in the query makes this a compare-and-set.
+
+        Args:
+            query (Dict[str, Any]): MongoDB query filter, including any state precondition.
+            data (Dict[str, Any]): The fields to set on the document.
+            session (Optional[AsyncClientSession]): Session to run the update in.
+
+        Returns:
+            UpdateResult: The result; matched_count is 0 when the precondition failed.
+        """
+        data["updated_at"] = datetime.utcnow()
+        return await self.collection.update_one(query, {"$set": data}, session=session)
+
+    async def delete(self, item_id: str) -> DeleteResult:
+        """
+        Deletes a document by its _id.
+
+        Args:
+            item_id (str): The string representation of the document's ObjectId.
+
+        Returns:
+            DeleteResult: The result from the delete operation.
+        """
+        return await self.collection.delete_one({"_id": ObjectId(item_id)})
+
+    async def paginate(
+        self,
+        query: Dict[str, Any],
+        limit: int,
+        after: Optional[Tuple[Any, Any]] = None,
+        sort_field: str = "_id",
+        descending: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Returns one page of documents using keyset pagination, so the cost of a
+        page does not depend on how deep into the collection it is.
+
+        Args:
+            query (Dict[str, Any]): A MongoDB query filter.
+            limit (int): Maximum number of documents in the page.
+            after (Optional[Tuple[Any, Any]]): Decoded (sort_value, _id) of the last document of the previous page.
+            sort_field (str): Field to order by; ties are broken on _id.
+            descending (bool): Whether to walk the collection backwards.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: The documents with string IDs and
+            the cursor for the next page, or None on the last page.
+        """
+        direction = DESCENDING if descending else ASCENDING
+
+        conditions = [query] if query else []
+        if after is not None:
+            after_value, after_id = after
+            conditions.append(keyset_filter(sort_field, after_value, after_id, descending))
+        final_query = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+
+        sort_spec = [("_id", direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+        docs = await self.collection.find(final_query).sort(sort_spec).limit(limit + 1).to_list()
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_cursor = encode_cursor(last.get(sort_field), last["_id"])
+        return self._convert_ids_to_strings(docs), next_cursor
+
+    async def stream(self, query: Dict[str, Any] = {}, batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterates matching documents through a server-side cursor in _id order,
+        fetching `batch_size` documents per round trip so memory stays bounded.
+
+        Args:
+            query (Dict[str, Any], optional): A MongoDB query filter. Defaults to {}.
+            batch_size (int): Number of documents fetched per batch.
+
+        Yields:
+            Dict[str, Any]: Each document with a string ID.
+        """
+        cursor = self.collection.find(query).sort("_id", ASCENDING).batch_size(batch_size)
+        try:
+            async for doc in cursor:
+                yield self._convert_id_to_string(doc)
+        finally:
+            await cursor.close()
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Runs an aggregation pipeline against the collection.
+
+        Args:
+            pipeline (List[Dict[str, Any]]): The aggregation stages.
+
+        Returns:
+            List[Dict[str, Any]]: The raw aggregation results.
+        """
+        cursor = await self.collection.aggregate(pipeline)
+        return await cursor.to_list()
@@ -1,8 +1,16 @@
+from pymongo import ASCENDING, IndexModel
 from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.collection import Collection
 from pymongo.results import InsertOneResult
-from .base import BaseRepository
+from .base import BaseRepository, AsyncBaseRepository
 
 class BOMRepository(BaseRepository):
+    indexes = [IndexModel([("finishedProductId", ASCENDING)])]
+
     def __init__(self, db: Database):
         super().__init__(collection=db["boms"])
+
+class AsyncBOMRepository(AsyncBaseRepository):
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db["boms"])
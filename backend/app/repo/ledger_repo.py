@@ -1,13 +1,56 @@
-import inspect
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
+from pymongo import ASCENDING, IndexModel, UpdateOne
 from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.client_session import AsyncClientSession
 from ..core.logger import logs
-from .base import BaseRepository
+from .base import BaseRepository, AsyncBaseRepository
 
 class StockLedgerRepository(BaseRepository):
     """
     Handles database operations for the stock_ledger collection.
     """
+    # Pages are filtered on product_id or manufacturing_order_id and sorted
+    # on (_id) or (created_at, _id); each pair has an index ending in that sort key.
+    indexes = [
+        IndexModel([("product_id", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("product_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("manufacturing_order_id", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("manufacturing_order_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)]),
+        # Entries written by MO completion carry a key so a retry cannot duplicate them
+        IndexModel([("entry_key", ASCENDING)], unique=True, partialFilterExpression={"entry_key": {"$exists": True}}),
+    ]
+
     def __init__(self, db: Database):
         
             super().__init__(collection=db["ledger"])
+
+
+class AsyncStockLedgerRepository(AsyncBaseRepository):
+    """
+    Async variant of StockLedgerRepository for use from async services.
+    """
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db["ledger"])
+
+    async def create_many_once(self, entries: List[Dict[str, Any]], session: Optional[AsyncClientSession] = None) -> int:
+        """
+        Inserts ledger entries that each carry a unique 'entry_key', skipping
+        those already present, so the same batch can safely be written again.
+
+        Args:
+            entries (List[Dict[str, Any]]): The entries to insert, each with an 'entry_key'.
+            session (Optional[AsyncClientSession]): Session to run the writes in, e.g. inside a transaction.
+
+        Returns:
+            int: The number of entries actually inserted.
+        """
+        if not entries:
+            return 0
+        operations = [
+            UpdateOne({"entry_key": entry["entry_key"]}, {"$setOnInsert": self._prepare_create_data(dict(entry))}, upsert=True)
+            for entry in entries
+        ]
+        result = await self.collection.bulk_write(operations, ordered=True, session=session)
+        return result.upserted_count
@@ -1,11 +1,26 @@
-from .base import BaseRepository
+from typing import Any, Dict, Iterable, List
+from bson import ObjectId
+from .base import BaseRepository, AsyncBaseRepository
+from pymongo import ASCENDING, IndexModel
 from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
 class ManufacturingOrderRepository(BaseRepository):
     """
     Repository specifically for handling database operations for the
     'manufacturing_orders' collection.
     """
+    # Pages are filtered on status or product_id and sorted on (_id) or
+    # (created_at, _id); each pair has an index ending in that sort key.
+    indexes = [
+        IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("completed_at", ASCENDING)]),
+        IndexModel([("product_id", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("product_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ]
+
     def __init__(self, db: Database):
         
             super().__init__(collection=db["manufacturing_orders"])
@@ -13,4 +28,30 @@ class ManufacturingOrderRepository(BaseRepository):
 
     def find_by_product(self, product_id: str):
         """Find all manufacturing orders for a specific product"""
-        return self.get_all({"product_id": product_id})
\ No newline at end of file
+        return self.get_all({"product_id": product_id})
+
+
+class AsyncManufacturingOrderRepository(AsyncBaseRepository):
+    """
+    Async variant of ManufacturingOrderRepository for use from async services.
+    """
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db["manufacturing_orders"])
+
+    async def find_by_product(self, product_id: str):
+        """Find all manufacturing orders for a specific product"""
+        return await self.get_all({"product_id": product_id})
+
+    async def get_operation_durations(self, mo_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Returns the planned operation durations (minutes, in sequence order)
+        from the BOM snapshot of each given MO, as {"mo_id", "durations"}.
+        Only the durations are sent back, not the whole snapshot.
+        """
+        object_ids = [ObjectId(mo_id) for mo_id in mo_ids if ObjectId.is_valid(mo_id)]
+        if not object_ids:
+            return []
+        return await self.aggregate([
+            {"$match": {"_id": {"$in": object_ids}}},
+            {"$project": {"_id": 0, "mo_id": {"$toString": "$_id"}, "durations": "$bom_snapshot.operations.duration"}},
+        ])
@@ -1,9 +1,13 @@
+from pymongo import ASCENDING, IndexModel
 from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.collection import Collection
 from pymongo.results import InsertOneResult
-from .base import BaseRepository
+from .base import BaseRepository, AsyncBaseRepository
 
 class ProductRepository(BaseRepository):
+    indexes = [IndexModel([("name", ASCENDING)])]
+
     def __init__(self, db: Database):
         super().__init__(collection=db["products"])
 
@@ -13,3 +17,15 @@ class ProductRepository(BaseRepository):
         Returns the document if found, otherwise None.
         """
         return self.collection.find_one({"name": name.lower()})
+
+
+class AsyncProductRepository(AsyncBaseRepository):
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db["products"])
+
+    async def get_by_name(self, name: str) -> dict | None:
+        """
+        Retrieves a product document by its name.
+        Returns the document if found, otherwise None.
+        """
+        return await self.collection.find_one({"name": name.lower()})
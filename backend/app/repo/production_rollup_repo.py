@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.client_session import AsyncClientSession
+from app.utils.sketch import bucket_index
+from .base import BaseRepository, AsyncBaseRepository
+from .stock_balance_repo import apply_once
+
+ROLLUPS_COLLECTION = "production_daily_rollups"
+
+
+def day_start(ts: datetime) -> datetime:
+    """Truncates a UTC timestamp to the start of its day, the rollup key."""
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def completion_update(cycle_ms: float) -> Dict[str, Any]:
+    """The $inc that folds one completed MO into its day's rollup."""
+    return {
+        "$inc": {
+            "count": 1,
+            "sum_cycle_ms": cycle_ms,
+            f"sketch.{bucket_index(cycle_ms)}": 1,
+        },
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+
+
+class ProductionRollupRepository(BaseRepository):
+    """
+    Repository for 'production_daily_rollups': one document per (day, product)
+    with the number of MOs completed, the sum of their cycle times and a
+    log-bucket sketch of cycle times for quantiles.
+    """
+    indexes = [IndexModel([("day", ASCENDING), ("product_id", ASCENDING)], unique=True)]
+
+    def __init__(self, db: Database):
+        super().__init__(collection=db[ROLLUPS_COLLECTION])
+        self.orders = db["manufacturing_orders"]
+
+    def needs_bootstrap(self) -> bool:
+        """
+        True when there are no rollups yet but completed MOs exist, e.g. on the
+        first start after rollups were introduced.
+        """
+        return self.collection.find_one({}) is None and self.orders.find_one({"status": "done"}) is not None
+
+    def rebuild_from_orders(self) -> int:
+        """
+        Recomputes every rollup from the completed MOs. Orders completed before
+        'completed_at' was recorded fall back to their last update time.
+
+        Returns:
+            int: The number of rollup documents written.
+        """
+        cursor = self.orders.find(
+            {"status": "done"},
+            {"product_id": 1, "created_at": 1, "completed_at": 1, "updated_at": 1},
+        )
+        rollups: Dict[tuple, Dict[str, Any]] = {}
+        for order in cursor:
+            completed_at = order.get("completed_at") or order.get("updated_at")
+            created_at = order.get("created_at")
+            if not completed_at or not created_at:
+                continue
+            cycle_ms = max((completed_at - created_at).total_seconds() * 1000, 0)
+            key = (day_start(completed_at), order.get("product_id"))
+            rollup = rollups.setdefault(key, {"count": 0, "sum_cycle_ms": 0, "sketch": {}})
+            rollup["count"] += 1
+            rollup["sum_cycle_ms"] += cycle_ms
+            index = str(bucket_index(cycle_ms))
+            rollup["sketch"][index] = rollup["sketch"].get(index, 0) + 1
+
+        self.collection.delete_many({})
+        if not rollups:
+            return 0
+        now = datetime.utcnow()
+        self.collection.insert_many([
+            {"day": day, "product_id": product_id, **rollup, "updated_at": now}
+            for (day, product_id), rollup in rollups.items()
+        ])
+        return len(rollups)
+
+
+class AsyncProductionRollupRepository(AsyncBaseRepository):
+    """
+    Async variant of ProductionRollupRepository for use from async services.
+    """
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db[ROLLUPS_COLLECTION])
+
+    async def record_completion(
+        self,
+        product_id: str,
+        completed_at: datetime,
+        cycle_ms: float,
+        session: Optional[AsyncClientSession] = None,
+        key: Optional[str] = None,
+    ) -> None:
+        """
+        Adds one completed MO to its (day, product) rollup with a single upsert.
+
+        Args:
+            product_id (str): The finished product of the MO.
+            completed_at (datetime): When the MO was completed (UTC).
+            cycle_ms (float): Time from creation to completion in milliseconds.
+            session (Optional[AsyncClientSession]): Session to run the write in, e.g. inside a transaction.
+            key (Optional[str]): Idempotency key, e.g. the MO id; a completion already recorded under it is skipped.
+        """
+        match = {"day": day_start(completed_at), "product_id": product_id}
+        if key is None:
+            await self.collection.update_one(match, completion_update(max(cycle_ms, 0)), upsert=True, session=session)
+            return
+        await self.collection.bulk_write(apply_once(match, completion_update(max(cycle_ms, 0)), key), ordered=True, session=session)
+
+    async def get_range(
+        self, start: Optional[datetime] = None, product_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the rollups from `start` onwards (all of them if None), oldest first.
+        """
+        query: Dict[str, Any] = {}
+        if start is not None:
+            query["day"] = {"$gte": day_start(start)}
+        if product_id:
+            query["product_id"] = product_id
+        cursor = self.collection.find(query, {"_id": 0, "applied_keys": 0}).sort("day", ASCENDING)
+        return await cursor.to_list()
@@ -0,0 +1,182 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.client_session import AsyncClientSession
+from .base import BaseRepository, AsyncBaseRepository
+
+BALANCES_COLLECTION = "stock_balances"
+LEDGER_COLLECTION = "ledger"
+# Idempotency keys remembered per balance/rollup document; only recent retries need them.
+APPLIED_KEYS_KEPT = 500
+
+
+def apply_once(match: Dict[str, Any], update: Dict[str, Any], key: str) -> List[UpdateOne]:
+    """
+    The writes that apply `update` to the document matching `match` at most once
+    per `key`. The first creates the document if needed; the second only matches
+    while `key` is not yet recorded on it, and records it in the same atomic
+    update. Run them in order.
+    """
+    update = dict(update)
+    update["$push"] = {"applied_keys": {"$each": [key], "$slice": -APPLIED_KEYS_KEPT}}
+    return [
+        UpdateOne(match, {"$setOnInsert": {"applied_keys": []}}, upsert=True),
+        UpdateOne({**match, "applied_keys": {"$ne": key}}, update),
+    ]
+
+# Sums the ledger per product into the shape stored in 'stock_balances'.
+LEDGER_TOTALS_PIPELINE = [
+    {"$match": {"product_id": {"$ne": None}}},
+    {"$group": {"_id": "$product_id", "current_stock": {"$sum": "$quantity_change"}}},
+    {"$project": {"_id": 0, "product_id": "$_id", "current_stock": 1}},
+]
+
+# LEDGER_TOTALS_PIPELINE plus the 'applied_keys' apply_changes would have
+# recorded: the MO id of every completion entry, i.e. one with an 'entry_key',
+# most recent last. Without them a completion retried after a rebuild would
+# apply its ledger entries to the balances a second time.
+LEDGER_BALANCES_PIPELINE = [
+    {"$match": {"product_id": {"$ne": None}}},
+    {"$group": {
+        "_id": {
+            "product_id": "$product_id",
+            "key": {"$cond": [{"$gt": ["$entry_key", None]}, "$manufacturing_order_id", None]},
+        },
+        "current_stock": {"$sum": "$quantity_change"},
+        "last_id": {"$max": "$_id"},
+    }},
+    {"$sort": {"last_id": 1}},
+    {"$group": {
+        "_id": "$_id.product_id",
+        "current_stock": {"$sum": "$current_stock"},
+        "applied_keys": {"$push": "$_id.key"},
+    }},
+    {"$project": {
+        "_id": 0,
+        "product_id": "$_id",
+        "current_stock": 1,
+        "applied_keys": {"$slice": [
+            {"$filter": {"input": "$applied_keys", "cond": {"$ne": ["$$this", None]}}},
+            -APPLIED_KEYS_KEPT,
+        ]},
+    }},
+]
+
+
+class StockBalanceRepository(BaseRepository):
+    """
+    Repository for the 'stock_balances' projection: one document per product
+    holding its current stock, kept in step with the ledger via $inc.
+    """
+    indexes = [IndexModel([("product_id", ASCENDING)], unique=True)]
+
+    def __init__(self, db: Database):
+        super().__init__(collection=db[BALANCES_COLLECTION])
+        self.ledger = db[LEDGER_COLLECTION]
+
+    def rebuild_from_ledger(self) -> int:
+        """
+        Recomputes the whole projection from the ledger, replacing its contents.
+        Existing indexes on 'stock_balances' are preserved by $out, and the
+        idempotency keys of the MO completions in the ledger are kept, so a
+        completion retried afterwards is not applied twice.
+
+        Returns:
+            int: The number of products in the rebuilt projection.
+        """
+        now = datetime.utcnow()
+        pipeline = LEDGER_BALANCES_PIPELINE + [
+            {"$set": {"updated_at": now}},
+            {"$out": BALANCES_COLLECTION},
+        ]
+        self.ledger.aggregate(pipeline, allowDiskUse=True)
+        return self.collection.count_documents({})
+
+    def needs_bootstrap(self) -> bool:
+        """
+        True when the projection is empty while the ledger already has entries,
+        e.g. on the first start after the projection was introduced.
+        """
+        return self.collection.find_one({}) is None and self.ledger.find_one({}) is not None
+
+
+class AsyncStockBalanceRepository(AsyncBaseRepository):
+    """
+    Async variant of StockBalanceRepository for use from async services.
+    """
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db[BALANCES_COLLECTION])
+        self.ledger = db[LEDGER_COLLECTION]
+
+    async def apply_changes(
+        self, entries: List[Dict[str, Any]], session: Optional[AsyncClientSession] = None, key: Optional[str] = None
+    ) -> None:
+        """
+        Folds ledger entries into the projection with one upserting $inc per product.
+
+        Args:
+            entries (List[Dict[str, Any]]): Ledger entries with product_id and quantity_change.
+            session (Optional[AsyncClientSession]): Session to run the writes in, e.g. inside a transaction.
+            key (Optional[str]): Idempotency key; a batch with a key already applied to a product is skipped for it.
+        """
+        totals: Dict[str, int] = {}
+        for entry in entries:
+            pid = entry.get("product_id")
+            if pid is None:
+                continue
+            totals[pid] = totals.get(pid, 0) + entry.get("quantity_change", 0)
+        if not totals:
+            return
+
+        now = datetime.utcnow()
+        if key is None:
+            operations = [
+                UpdateOne(
+                    {"product_id": pid},
+                    {"$inc": {"current_stock": qty}, "$set": {"updated_at": now}},
+                    upsert=True,
+                )
+                for pid, qty in totals.items()
+            ]
+            await self.collection.bulk_write(operations, ordered=False, session=session)
+            return
+        operations = [
+            op
+            for pid, qty in totals.items()
+            for op in apply_once({"product_id": pid}, {"$inc": {"current_stock": qty}, "$set": {"updated_at": now}}, key)
+        ]
+        await self.collection.bulk_write(operations, ordered=True, session=session)
+
+    async def get_balances(self) -> List[Dict[str, Any]]:
+        """
+        Returns the current stock of every product in the projection.
+        """
+        cursor = self.collection.find({}, {"_id": 0, "product_id": 1, "current_stock": 1})
+        return await cursor.to_list()
+
+    async def diff_against_ledger(self) -> List[Dict[str, Any]]:
+        """
+        Compares the projection with totals recomputed from the ledger.
+        This scans the full ledger and is meant for consistency checks only.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per product whose projected stock differs.
+        """
+        cursor = await self.ledger.aggregate(LEDGER_TOTALS_PIPELINE)
+        ledger_totals = {doc["product_id"]: doc["current_stock"] for doc in await cursor.to_list()}
+        projected = {doc["product_id"]: doc.get("current_stock", 0) for doc in await self.get_balances()}
+
+        mismatches = []
+        for pid in ledger_totals.keys() | projected.keys():
+            expected = ledger_totals.get(pid, 0)
+            actual = projected.get(pid, 0)
+            if expected != actual:
+                mismatches.append({
+                    "product_id": pid,
+                    "projected_stock": actual,
+                    "ledger_stock": expected,
+                    "difference": actual - expected,
+                })
+        return mismatches
@@ -1,11 +1,15 @@
 # app/users/user_repo.py
 
+from pymongo import ASCENDING, IndexModel
 from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import Optional, Dict, Any
-from app.repo.base import BaseRepository
-from app.core.db_connection import get_db
+from app.repo.base import BaseRepository, AsyncBaseRepository
+from app.core.db_connection import get_db, get_async_db
 
 class UserRepository(BaseRepository):
+    indexes = [IndexModel([("email", ASCENDING)], unique=True)]
+
     def __init__(self, db: Database):
         super().__init__(db["users"])
 
@@ -15,6 +19,20 @@ class UserRepository(BaseRepository):
         """
         return self.find_one({"email": email})
 
+class AsyncUserRepository(AsyncBaseRepository):
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(db["users"])
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a single user document by their email address.
+        """
+        return await self.find_one({"email": email})
+
 def get_user_repo() -> UserRepository:
     db = get_db()
-    return UserRepository(db)
\ No newline at end of file
+    return UserRepository(db)
+
+def get_async_user_repo() -> AsyncUserRepository:
+    db = get_async_db()
+    return AsyncUserRepository(db)
\ No newline at end of file
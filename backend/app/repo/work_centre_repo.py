@@ -1,19 +1,67 @@
 # app/work_centres/work_centre_repo.py
 
+from typing import Any, Dict, List
+from pymongo import ASCENDING, IndexModel
 from pymongo.database import Database
-from app.repo.base import BaseRepository
+from pymongo.asynchronous.database import AsyncDatabase
+from app.repo.base import BaseRepository, AsyncBaseRepository
 from app.core.db_connection import get_db
+from app.utils.cache import TTLCache
+
+# Process-wide operation name -> work centre document cache used when creating
+# MOs. WorkCentreService invalidates entries it changes; the TTL bounds how long
+# changes made by other processes can go unnoticed.
+work_centre_cache = TTLCache(maxsize=1024, ttl_seconds=300)
 
 class WorkCentreRepository(BaseRepository):
     """
     Repository for Work Centre specific database operations.
     """
+    indexes = [IndexModel([("operation", ASCENDING)])]
+
     def __init__(self, db: Database):
         """
         Initializes the repository with the 'work_centres' collection.
         """
         super().__init__(db["work_centres"])
 
+class AsyncWorkCentreRepository(AsyncBaseRepository):
+    """
+    Async variant of WorkCentreRepository for use from async services.
+    """
+    def __init__(self, db: AsyncDatabase):
+        """
+        Initializes the repository with the 'work_centres' collection.
+        """
+        super().__init__(db["work_centres"])
+
+    async def find_by_operations(self, operations: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolves operation names to work centres, serving hits from the
+        process-wide cache and fetching all misses with a single $in query.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Work centre documents keyed by operation;
+            operations without a work centre are absent.
+        """
+        resolved: Dict[str, Dict[str, Any]] = {}
+        misses = []
+        for operation in set(operations):
+            cached = work_centre_cache.get(operation)
+            if cached is not None:
+                resolved[operation] = cached
+            else:
+                misses.append(operation)
+
+        if misses:
+            docs = await self.get_all({"operation": {"$in": misses}})
+            for doc in docs:
+                # Keep the first match per operation, like find_one would.
+                if doc["operation"] not in resolved:
+                    resolved[doc["operation"]] = doc
+                    work_centre_cache.set(doc["operation"], doc)
+        return resolved
+
 def get_work_centre_repo() -> WorkCentreRepository:
     """
     Returns an instance of the WorkCentreRepository for dependency injection.
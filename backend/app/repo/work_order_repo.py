@@ -1,14 +1,30 @@
 # app/repo/work_order_repo.py
 
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from bson import ObjectId
 from pymongo.database import Database
-from pymongo import ASCENDING
-from app.repo.base import BaseRepository 
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from app.repo.base import BaseRepository, AsyncBaseRepository
 
 class WorkOrderRepository(BaseRepository):
     """
     Repository for the 'work_orders' collection, with specific query methods.
     """
+    # Pages are filtered on mo_id or status and sorted on (_id) or
+    # (created_at, _id); each pair has an index ending in that sort key.
+    indexes = [
+        IndexModel([("mo_id", ASCENDING), ("sequence", ASCENDING)]),
+        IndexModel([("mo_id", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("mo_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("completed_at", ASCENDING)]),
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)]),
+    ]
+
     def __init__(self, db: Database):
         # First, get the specific collection object from the database instance.
         work_orders_collection = db["work_orders"]
@@ -23,4 +39,124 @@ class WorkOrderRepository(BaseRepository):
         """
         cursor = self.collection.find({"mo_id": mo_id}).sort("sequence", ASCENDING)
         docs = list(cursor)
-        return self._convert_ids_to_strings(docs)
\ No newline at end of file
+        return self._convert_ids_to_strings(docs)
+
+
+class AsyncWorkOrderRepository(AsyncBaseRepository):
+    """
+    Async variant of WorkOrderRepository for use from async services.
+    """
+    def __init__(self, db: AsyncDatabase):
+        super().__init__(collection=db["work_orders"])
+
+    async def find_by_mo_id(self, mo_id: str) -> List[Dict[str, Any]]:
+        """
+        Finds all work orders associated with a given Manufacturing Order ID.
+        sorted by their sequence.
+        """
+        cursor = self.collection.find({"mo_id": mo_id}).sort("sequence", ASCENDING)
+        docs = await cursor.to_list()
+        return self._convert_ids_to_strings(docs)
+
+    async def find_completed_between(
+        self, start: datetime, end: datetime, work_centre_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the work orders completed in [start, end) with only the fields
+        needed for utilization and cost analytics, timestamps as epoch
+        milliseconds. Served by the (status, completed_at) index.
+        """
+        query: Dict[str, Any] = {"status": "done", "completed_at": {"$gte": start, "$lt": end}}
+        if work_centre_id:
+            query["work_center_id"] = work_centre_id
+        # Timestamps come back as epoch milliseconds, which decode much faster
+        # than datetimes; a missing timestamp comes back as null.
+        return await self.aggregate([
+            {"$match": query},
+            {"$project": {
+                "_id": 0,
+                "mo_id": 1,
+                "work_center_id": 1,
+                "sequence": 1,
+                "ready_at": {"$toLong": "$ready_at"},
+                "started_at": {"$toLong": "$started_at"},
+                "completed_at": {"$toLong": "$completed_at"},
+            }},
+        ])
+
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claims the oldest 'in_progress' work order for a worker by
+        moving it to 'processing' with a lease. Only one worker can win a claim.
+
+        Returns:
+            Optional[Dict[str, Any]]: The claimed work order, or None if there is nothing to do.
+        """
+        return await self._claim({"status": "in_progress"}, worker_id, lease_seconds)
+
+    async def claim_by_id(self, wo_id: str, worker_id: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """
+        Claims one specific work order if it is still 'in_progress', e.g. in
+        reaction to a change event. Returns None if another worker got it first.
+        """
+        return await self._claim({"_id": ObjectId(wo_id), "status": "in_progress"}, worker_id, lease_seconds)
+
+    async def _claim(self, query: Dict[str, Any], worker_id: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        doc = await self.collection.find_one_and_update(
+            query,
+            {"$set": {
+                "status": "processing",
+                "started_at": now,
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "updated_at": now,
+            }},
+            sort=[("_id", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._convert_id_to_string(doc) if doc else None
+
+    async def renew_lease(self, wo_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """
+        Extends a lease held by `worker_id`. Returns False if the lease was lost,
+        e.g. because it expired and the work order was requeued.
+        """
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": ObjectId(wo_id), "status": "processing", "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def release_lease(self, wo_id: str, worker_id: str, status: Optional[str] = None) -> bool:
+        """
+        Drops the lease held by `worker_id`, optionally moving a still 'processing'
+        work order to `status` (e.g. back to 'in_progress' to requeue it).
+        """
+        query: Dict[str, Any] = {"_id": ObjectId(wo_id), "lease_owner": worker_id}
+        update: Dict[str, Any] = {
+            "$set": {"updated_at": datetime.utcnow()},
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        }
+        if status:
+            query["status"] = "processing"
+            update["$set"]["status"] = status
+        result = await self.collection.update_one(query, update)
+        return result.matched_count == 1
+
+    async def requeue_expired_leases(self) -> int:
+        """
+        Moves 'processing' work orders whose automation lease has expired back
+        to 'in_progress' so another worker can claim them. Work orders put into
+        'processing' by an operator carry no lease and are left alone.
+
+        Returns:
+            int: The number of work orders requeued.
+        """
+        now = datetime.utcnow()
+        result = await self.collection.update_many(
+            {"status": "processing", "lease_owner": {"$ne": None}, "lease_expires_at": {"$lt": now}},
+            {"$set": {"status": "in_progress", "updated_at": now}, "$unset": {"lease_owner": "", "lease_expires_at": ""}},
+        )
+        return result.modified_count
@@ -1,18 +1,20 @@
-import inspect
 import logging
 import os
-from fastapi import APIRouter, Request, Depends, Query
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from fastapi.responses import JSONResponse
 
 from app.core.logger import logs
 from app.service.analytics_service import AnalyticsService
+from app.service.timeseries_service import GRANULARITIES, SERIES, TimeSeriesService
+from app.service.work_centre_analytics_service import WorkCentreAnalyticsService
 from app.utils.response_model import response
-from app.core.db_connection import get_db
 from app.models.analytics_model import ProductionThroughput
 from app.core.security import RoleChecker
 from app.models.user_model import UserRole
-from app.core.db_connection import get_db
-from pymongo.database import Database
+from app.core.db_connection import get_async_db
+from pymongo.asynchronous.database import AsyncDatabase
 
 router = APIRouter(
     prefix="/analytics",
@@ -20,9 +22,15 @@ router = APIRouter(
     dependencies=[Depends(RoleChecker([UserRole.ADMIN]))]
 )
 
-def get_service(db: Database = Depends(get_db)) -> AnalyticsService:
+def get_service(db: AsyncDatabase = Depends(get_async_db)) -> AnalyticsService:
     return AnalyticsService(db)
 
+def get_timeseries_service(db: AsyncDatabase = Depends(get_async_db)) -> TimeSeriesService:
+    return TimeSeriesService(db)
+
+def get_work_centre_service(db: AsyncDatabase = Depends(get_async_db)) -> WorkCentreAnalyticsService:
+    return WorkCentreAnalyticsService(db)
+
 @router.get("/overview", summary="Get Status Overview KPIs")
 async def get_status_overview(request: Request, service: AnalyticsService = Depends(get_service)):
     """
@@ -31,22 +39,27 @@ async def get_status_overview(request: Request, service: AnalyticsService = Depe
     try:
         overview = await service.get_status_overview()
         final_response = response.success(data=overview.model_dump(), message="Status overview retrieved successfully")
-        logs.define_logger(logging.INFO, "Status overview request successful", request=request, response=final_response, loggName=inspect.stack()[0], pid=os.getpid())
+        logs.define_logger(logging.INFO, message="Status overview request successful", request=request, response=final_response, pid=os.getpid())
         return JSONResponse(status_code=200, content=final_response)
 
     except Exception as e:
-        logs.define_logger(logging.ERROR, f"Error getting status overview: {e}", request=request, loggName=inspect.stack()[0], pid=os.getpid())
+        logs.define_logger(logging.ERROR, message=f"Error getting status overview: {e}", request=request, pid=os.getpid())
         final_response = response.failure(message=f"An unexpected error occurred: {e}")
         return JSONResponse(status_code=500, content=final_response)
 
 
 @router.get("/throughput", summary="Get Production Throughput")
-async def get_production_throughput(request: Request, period_days: int = Query(7, ge=1, le=365), service: AnalyticsService = Depends(get_service)):
+async def get_production_throughput(
+    request: Request,
+    period_days: int = Query(7, ge=1, le=365),
+    product_id: Optional[str] = Query(None, description="Only count orders for this product"),
+    service: AnalyticsService = Depends(get_service),
+):
     """
     Retrieves the number of completed orders per day for a given period.
     """
     try:
-        throughput_data = await service.get_production_throughput(days=period_days)
+        throughput_data = await service.get_production_throughput(days=period_days, product_id=product_id)
         
         data_to_return = ProductionThroughput(
             period=f"Last {period_days} days",
@@ -54,27 +67,103 @@ async def get_production_throughput(request: Request, period_days: int = Query(7
         )
         
         final_response = response.success(data=data_to_return.model_dump(), message="Production throughput retrieved successfully")
-        logs.define_logger(logging.INFO, "Production throughput request successful", request=request, response=final_response, loggName=inspect.stack()[0], pid=os.getpid())
+        logs.define_logger(logging.INFO, message="Production throughput request successful", request=request, response=final_response, pid=os.getpid())
         return JSONResponse(status_code=200, content=final_response)
 
     except Exception as e:
-        logs.define_logger(logging.ERROR, f"Error getting production throughput: {e}", request=request, loggName=inspect.stack()[0], pid=os.getpid())
+        logs.define_logger(logging.ERROR, message=f"Error getting production throughput: {e}", request=request, pid=os.getpid())
         final_response = response.failure(message=f"An unexpected error occurred: {e}")
         return JSONResponse(status_code=500, content=final_response)
 
 
 @router.get("/cycle-time", summary="Get Average Cycle Time")
-async def get_average_cycle_time(request: Request, service: AnalyticsService = Depends(get_service)):
+async def get_average_cycle_time(
+    request: Request,
+    period_days: Optional[int] = Query(None, ge=1, le=3650, description="Only orders completed in the last N days; all time if omitted"),
+    product_id: Optional[str] = Query(None, description="Only orders for this product"),
+    service: AnalyticsService = Depends(get_service),
+):
     """
-    Calculates the average time it takes to complete a manufacturing order.
+    Calculates the average, p50 and p95 time it takes to complete a manufacturing order.
     """
     try:
-        cycle_time = await service.get_average_cycle_time()
+        cycle_time = await service.get_average_cycle_time(days=period_days, product_id=product_id)
         final_response = response.success(data=cycle_time.model_dump(), message="Average cycle time retrieved successfully")
-        logs.define_logger(logging.INFO, "Average cycle time request successful", request=request, response=final_response, loggName=inspect.stack()[0], pid=os.getpid())
+        logs.define_logger(logging.INFO, message="Average cycle time request successful", request=request, response=final_response, pid=os.getpid())
+        return JSONResponse(status_code=200, content=final_response)
+
+    except Exception as e:
+        logs.define_logger(logging.ERROR, message=f"Error getting average cycle time: {e}", request=request, pid=os.getpid())
+        final_response = response.failure(message=f"An unexpected error occurred: {e}")
+        return JSONResponse(status_code=500, content=final_response)
+
+
+@router.get("/dashboard", summary="Get All Dashboard KPIs")
+async def get_dashboard(request: Request, period_days: int = Query(7, ge=1, le=365), service: AnalyticsService = Depends(get_service)):
+    """
+    Returns the status overview, throughput and cycle time KPIs together from one
+    cached aggregation. `cache_age_seconds` tells how old the figures are.
+    """
+    try:
+        dashboard = await service.get_dashboard(days=period_days)
+        final_response = response.success(data=dashboard.model_dump(mode="json"), message="Dashboard retrieved successfully")
+        logs.define_logger(logging.INFO, message="Dashboard request successful", request=request, pid=os.getpid())
+        return JSONResponse(status_code=200, content=final_response)
+
+    except Exception as e:
+        logs.define_logger(logging.ERROR, message=f"Error getting dashboard: {e}", request=request, pid=os.getpid())
+        final_response = response.failure(message=f"An unexpected error occurred: {e}")
+        return JSONResponse(status_code=500, content=final_response)
+
+
+@router.get("/timeseries", summary="Get a Time-Bucketed Series")
+async def get_timeseries(
+    request: Request,
+    series: str = Query(..., description=f"One of: {', '.join(SERIES)}"),
+    granularity: str = Query("day", description=f"One of: {', '.join(GRANULARITIES)}"),
+    tz: str = Query("UTC", description="IANA timezone the buckets are aligned to, e.g. Asia/Kolkata"),
+    start: Optional[datetime] = Query(None, description="Window start (ISO 8601, UTC if no offset)"),
+    end: Optional[datetime] = Query(None, description="Window end (ISO 8601, UTC if no offset); defaults to now"),
+    product_id: Optional[str] = Query(None, description="Only documents for this product"),
+    work_centre_id: Optional[str] = Query(None, description="Only work orders at this work centre"),
+    service: TimeSeriesService = Depends(get_timeseries_service),
+):
+    """
+    Returns one value per time bucket for the chosen series, including empty buckets as 0.
+    """
+    try:
+        data = await service.get_series(series, granularity, tz, start, end, product_id, work_centre_id)
+        final_response = response.success(data=data.model_dump(mode="json"), message="Time series retrieved successfully")
+        logs.define_logger(logging.INFO, message="Time series request successful", request=request, pid=os.getpid())
+        return JSONResponse(status_code=200, content=final_response)
+
+    except HTTPException as he:
+        logs.define_logger(logging.ERROR, message=f"Invalid time series request: {he.detail}", request=request, pid=os.getpid())
+        return JSONResponse(status_code=he.status_code, content=response.failure(message=he.detail, status_code=he.status_code))
+    except Exception as e:
+        logs.define_logger(logging.ERROR, message=f"Error getting time series: {e}", request=request, pid=os.getpid())
+        final_response = response.failure(message=f"An unexpected error occurred: {e}")
+        return JSONResponse(status_code=500, content=final_response)
+
+
+@router.get("/work-centres", summary="Get Work Centre Utilization and Cost")
+async def get_work_centre_analytics(
+    request: Request,
+    period_days: int = Query(30, ge=1, le=366),
+    work_centre_id: Optional[str] = Query(None, description="Only this work centre"),
+    service: WorkCentreAnalyticsService = Depends(get_work_centre_service),
+):
+    """
+    Returns busy time, queue time, utilization percentage and cost per MO for
+    each work centre, over the work orders completed in the period.
+    """
+    try:
+        data = await service.get_work_centre_analytics(days=period_days, work_centre_id=work_centre_id)
+        final_response = response.success(data=data.model_dump(mode="json"), message="Work centre analytics retrieved successfully")
+        logs.define_logger(logging.INFO, message="Work centre analytics request successful", request=request, pid=os.getpid())
         return JSONResponse(status_code=200, content=final_response)
 
     except Exception as e:
-        logs.define_logger(logging.ERROR, f"Error getting average cycle time: {e}", request=request, loggName=inspect.stack()[0], pid=os.getpid())
+        logs.define_logger(logging.ERROR, message=f"Error getting work centre analytics: {e}", request=request, pid=os.getpid())
         final_response = response.failure(message=f"An unexpected error occurred: {e}")
         return JSONResponse(status_code=500, content=final_response)
@@ -13,7 +13,6 @@ from ..service.bom_service import BOMService
 from ..core.security import RoleChecker
 from ..models.user_model import UserRole
 
-import inspect
 import os
 import logging
 
@@ -31,7 +30,7 @@ router = APIRouter(
 from app.models.bom_model import BOM, BOMCreate
 
 @router.post("/", summary="Create New BOM")
-async def create_bom(request: Request, bom_data: BOMCreate, service: BOMService = Depends(get_bom_service)):
+def create_bom(request: Request, bom_data: BOMCreate, service: BOMService = Depends(get_bom_service)):
     """
     Create a new Bill of Materials (BOM).
     
@@ -40,14 +39,13 @@ async def create_bom(request: Request, bom_data: BOMCreate, service: BOMService
     - created_at: Creation timestamp
     - updated_at: Last modified timestamp
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Creating a new BOM...", loggName=log_info, pid=os.getpid(), request=request, body=bom_data)
+    logs.define_logger(level=logging.INFO, message="Creating a new BOM...", pid=os.getpid(), request=request, body=bom_data)
     
     try:
         result = service.create_bom(bom_data)
         created_bom = service.bom_repo.get_by_id(str(result.inserted_id))
         
-        logs.define_logger(level=logging.INFO, message="BOM created successfully.", loggName=log_info, pid=os.getpid(), request=request, response=created_bom)
+        logs.define_logger(level=logging.INFO, message="BOM created successfully.", pid=os.getpid(), request=request, response=created_bom)
         
         return Response.success(
             data=created_bom,
@@ -55,7 +53,7 @@ async def create_bom(request: Request, bom_data: BOMCreate, service: BOMService
             status_code=status.HTTP_201_CREATED
         )
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Failed to create BOM: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Failed to create BOM: {e}", pid=os.getpid(), request=request)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", status_code=status.HTTP_200_OK)
@@ -66,12 +64,11 @@ def get_all_boms(
     """
     Get all Bills of Materials.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Fetching all BOMs...", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message="Fetching all BOMs...", pid=os.getpid(), request=request)
     
     boms = service.get_all_boms()
     
-    logs.define_logger(level=logging.INFO, message="BOMs fetched successfully.", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message="BOMs fetched successfully.", pid=os.getpid(), request=request)
     
     return Response.success(
         data=boms,
@@ -88,12 +85,11 @@ def get_bom_by_id(
     """
     Get a specific BOM by ID.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Fetching BOM with ID: {bom_id}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Fetching BOM with ID: {bom_id}", pid=os.getpid(), request=request)
     
     bom = service.get_bom_by_id(bom_id)
     
-    logs.define_logger(level=logging.INFO, message="BOM fetched successfully.", loggName=log_info, pid=os.getpid(), request=request, response=bom)
+    logs.define_logger(level=logging.INFO, message="BOM fetched successfully.", pid=os.getpid(), request=request, response=bom)
     
     return Response.success(
         data=bom,
@@ -110,12 +106,11 @@ def get_bom_by_product_id(
     """
     Get BOM for a specific product.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Fetching BOM for product ID: {product_id}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Fetching BOM for product ID: {product_id}", pid=os.getpid(), request=request)
     
     bom = service.get_bom_by_product_id(product_id)
     
-    logs.define_logger(level=logging.INFO, message="BOM fetched successfully.", loggName=log_info, pid=os.getpid(), request=request, response=bom)
+    logs.define_logger(level=logging.INFO, message="BOM fetched successfully.", pid=os.getpid(), request=request, response=bom)
     
     return Response.success(
         data=bom,
@@ -1,15 +1,15 @@
-import inspect
-from fastapi import APIRouter, Request, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 import logging
 import os
-from app.core.db_connection import get_db
+from app.core.db_connection import get_async_db
 from app.core.logger import logs
 from app.service.ledger_service import StockLedgerService
 from app.utils.response_model import response
+from app.utils.pagination import DateRangeParams, PageParams
 from app.core.security import RoleChecker
 from app.models.user_model import UserRole
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 
 router = APIRouter(
@@ -18,8 +18,8 @@ router = APIRouter(
     dependencies=[Depends(RoleChecker([UserRole.INVENTORY_MANAGER, UserRole.ADMIN]))]
 )
 
-def get_stock_ledger_service(db: Database = Depends(get_db)) -> StockLedgerService:
-    return StockLedgerService(db) # Pass the actual Database instance here
+def get_stock_ledger_service(db: AsyncDatabase = Depends(get_async_db)) -> StockLedgerService:
+    return StockLedgerService(db)
 
 def ensure_serializable(data):
     """
@@ -32,25 +32,49 @@ def ensure_serializable(data):
     return data
 
 @router.get("/", summary="Get Stock Ledger History")
-async def get_stock_ledger_history(request: Request, stock_ledger_service: StockLedgerService = Depends(get_stock_ledger_service)):
+async def get_stock_ledger_history(
+    request: Request,
+    product_id: str | None = Query(None, description="Filter movements by product ID"),
+    mo_id: str | None = Query(None, description="Filter movements by Manufacturing Order ID"),
+    page: PageParams = Depends(),
+    stock_ledger_service: StockLedgerService = Depends(get_stock_ledger_service)
+):
     """
-    Retrieves the complete, chronological history of all inventory movements.
+    Retrieves a keyset-paginated page of the chronological history of inventory movements.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Fetching stock ledger history...", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message="Fetching stock ledger history...", pid=os.getpid(), request=request)
     try:
-        history = await stock_ledger_service.get_ledger_history()
+        history, next_cursor = await stock_ledger_service.get_ledger_history(page, product_id=product_id, mo_id=mo_id)
         # Serialize datetime fields
         history = ensure_serializable(history)
 
-        final_response = response.success(
+        final_response = response.paginated(
             data=history,
+            next_cursor=next_cursor,
             message="Stock ledger history retrieved successfully"
         )
-        logs.define_logger(level=logging.INFO, message="Stock ledger history fetched successfully.", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.INFO, message="Stock ledger history fetched successfully.", pid=os.getpid(), request=request)
         return JSONResponse(status_code=200, content=final_response)
 
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Error getting stock ledger history: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Error getting stock ledger history: {e}", pid=os.getpid(), request=request)
         final_response = response.failure(message=f"An unexpected error occurred: {e}")
         return JSONResponse(status_code=500, content=final_response)
+
+@router.get("/export", summary="Stream Stock Ledger History (NDJSON/CSV)")
+async def export_stock_ledger_history(
+    request: Request,
+    fmt: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: 'ndjson' or 'csv'"),
+    product_id: str | None = Query(None, description="Filter movements by product ID"),
+    mo_id: str | None = Query(None, description="Filter movements by Manufacturing Order ID"),
+    date_range: DateRangeParams = Depends(),
+    stock_ledger_service: StockLedgerService = Depends(get_stock_ledger_service)
+):
+    """
+    Streams the full (optionally filtered) ledger history without materializing it.
+    """
+    logs.define_logger(level=logging.INFO, message=f"Streaming stock ledger history as {fmt}...", pid=os.getpid(), request=request)
+    chunks = stock_ledger_service.stream_ledger_history(fmt, product_id=product_id, mo_id=mo_id, date_filter=date_range.date_filter())
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f"attachment; filename=stock_ledger.{fmt}"}
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
@@ -1,19 +1,20 @@
-from fastapi import APIRouter, Query, Request, HTTPException, Depends
+from fastapi import APIRouter, Body, Query, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse, StreamingResponse
-from pymongo.database import Database
-import inspect
+from pymongo.asynchronous.database import AsyncDatabase
 import os
 import logging
 import io
+from typing import List
 
 from app.models.manufacture import ManufacturingOrderCreate
 from app.service.manufacture_service import ManufacturingOrderService
-from app.core.db_connection import get_db
+from app.core.db_connection import get_async_db
 from app.core.logger import logs
 from app.utils.response_model import response
 from app.core.security import RoleChecker
 from app.models.user_model import UserRole
 from app.service.export_service import ExportService
+from app.utils.pagination import PageParams
 
 router = APIRouter(
     prefix="/manufacturing-orders",
@@ -21,21 +22,20 @@ router = APIRouter(
     dependencies=[Depends(RoleChecker([UserRole.MANUFACTURING_MANAGER, UserRole.ADMIN]))]
 )
 
-def get_mo_service(db: Database = Depends(get_db)) -> ManufacturingOrderService:
+def get_mo_service(db: AsyncDatabase = Depends(get_async_db)) -> ManufacturingOrderService:
     return ManufacturingOrderService(db)
 
-def get_export_service(db: Database = Depends(get_db)) -> ExportService:
+def get_export_service(db: AsyncDatabase = Depends(get_async_db)) -> ExportService:
     return ExportService(db)
 
 @router.post("/")
 async def create_order(request: Request, order_data: ManufacturingOrderCreate, service: ManufacturingOrderService = Depends(get_mo_service)):
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Creating a new manufacturing order...", loggName=log_info, pid=os.getpid(), request=request, body=order_data)
+    logs.define_logger(level=logging.INFO, message="Creating a new manufacturing order...", pid=os.getpid(), request=request, body=order_data)
     
     try:
         created_data = await service.create_manufacturing_order(order_data)
         
-        logs.define_logger(level=logging.INFO, message="Manufacturing order created successfully.", loggName=log_info, pid=os.getpid(), request=request, response=created_data)
+        logs.define_logger(level=logging.INFO, message="Manufacturing order created successfully.", pid=os.getpid(), request=request, response=created_data)
         
         final_response = response.success(
             data=created_data,
@@ -45,42 +45,77 @@ async def create_order(request: Request, order_data: ManufacturingOrderCreate, s
         return JSONResponse(status_code=201, content=final_response)
     
     except HTTPException as he:
-        logs.define_logger(level=logging.ERROR, message=f"Failed to create manufacturing order: {he.detail}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Failed to create manufacturing order: {he.detail}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=he.status_code, content=response.failure(message=he.detail, status_code=he.status_code))
     
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Unexpected error creating manufacturing order: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error creating manufacturing order: {e}", pid=os.getpid(), request=request)
+        return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
+
+@router.post("/bulk")
+async def create_orders_bulk(
+    request: Request,
+    orders: List[ManufacturingOrderCreate] = Body(..., min_length=1, max_length=1000),
+    service: ManufacturingOrderService = Depends(get_mo_service)
+):
+    """
+    Creates many Manufacturing Orders in one call. Each order is validated
+    independently and the response carries one result per order, in order.
+    """
+    logs.define_logger(level=logging.INFO, message=f"Bulk creating {len(orders)} manufacturing orders...", pid=os.getpid(), request=request)
+
+    try:
+        results = await service.create_manufacturing_orders_bulk(orders)
+        created = sum(1 for item in results if item["status"] == "created")
+        status_code = 201 if created == len(results) else 207
+
+        logs.define_logger(level=logging.INFO, message=f"Bulk create finished: {created}/{len(results)} created.", pid=os.getpid(), request=request)
+
+        final_response = response.success(
+            data=results,
+            message=f"{created} of {len(results)} Manufacturing Orders created",
+            status_code=status_code
+        )
+        return JSONResponse(status_code=status_code, content=final_response)
+
+    except Exception as e:
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error bulk creating manufacturing orders: {e}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
 
 @router.get("/")
-async def get_all_orders(request: Request, status: str | None = Query(None), service: ManufacturingOrderService = Depends(get_mo_service)):
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Fetching all manufacturing orders...", loggName=log_info, pid=os.getpid(), request=request)
+async def get_all_orders(
+    request: Request,
+    status: str | None = Query(None),
+    product_id: str | None = Query(None),
+    page: PageParams = Depends(),
+    service: ManufacturingOrderService = Depends(get_mo_service)
+):
+    logs.define_logger(level=logging.INFO, message="Fetching all manufacturing orders...", pid=os.getpid(), request=request)
     
     try:
-        orders = await service.get_all_manufacturing_orders(status)
+        orders, next_cursor = await service.get_all_manufacturing_orders(page, status=status, product_id=product_id)
         
-        logs.define_logger(level=logging.INFO, message="Manufacturing orders fetched successfully.", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.INFO, message="Manufacturing orders fetched successfully.", pid=os.getpid(), request=request)
         
-        return response.success(
+        return response.paginated(
             data=orders,
+            next_cursor=next_cursor,
             message="Manufacturing Orders fetched successfully",
             status_code=200
         )
 
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Unexpected error fetching manufacturing orders: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error fetching manufacturing orders: {e}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
 
 @router.get("/{mo_id}")
 async def get_order_by_id(request: Request, mo_id: str, service: ManufacturingOrderService = Depends(get_mo_service)):
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Fetching manufacturing order with ID: {mo_id}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Fetching manufacturing order with ID: {mo_id}", pid=os.getpid(), request=request)
     
     try:
         order = await service.get_manufacturing_order_by_id(mo_id)
         
-        logs.define_logger(level=logging.INFO, message="Manufacturing order fetched successfully.", loggName=log_info, pid=os.getpid(), request=request, response=order)
+        logs.define_logger(level=logging.INFO, message="Manufacturing order fetched successfully.", pid=os.getpid(), request=request, response=order)
         
         return response.success(
             data=order,
@@ -89,31 +124,30 @@ async def get_order_by_id(request: Request, mo_id: str, service: ManufacturingOr
         )
         
     except HTTPException as he:
-        logs.define_logger(level=logging.ERROR, message=f"Failed to fetch manufacturing order: {he.detail}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Failed to fetch manufacturing order: {he.detail}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=he.status_code, content=response.failure(message=he.detail, status_code=he.status_code))
     
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Unexpected error fetching manufacturing order: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error fetching manufacturing order: {e}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
 
 @router.delete("/{mo_id}")
 async def delete_order(request: Request, mo_id: str, service: ManufacturingOrderService = Depends(get_mo_service)):
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Deleting manufacturing order with ID: {mo_id}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Deleting manufacturing order with ID: {mo_id}", pid=os.getpid(), request=request)
     
     try:
         await service.delete_manufacturing_order(mo_id)
         
-        logs.define_logger(level=logging.INFO, message="Manufacturing order deleted successfully.", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.INFO, message="Manufacturing order deleted successfully.", pid=os.getpid(), request=request)
         
         return JSONResponse(status_code=200, content=response.success(data=None, message="Manufacturing Order deleted successfully."))
         
     except HTTPException as he:
-        logs.define_logger(level=logging.ERROR, message=f"Failed to delete manufacturing order: {he.detail}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Failed to delete manufacturing order: {he.detail}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=he.status_code, content=response.failure(message=he.detail, status_code=he.status_code))
     
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Unexpected error deleting manufacturing order: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error deleting manufacturing order: {e}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
 
 @router.patch("/{mo_id}/complete")
@@ -122,13 +156,12 @@ async def complete_manufacturing_order(request: Request, mo_id: str, service: Ma
     Complete a manufacturing order and automatically update inventory.
     This is the critical route that triggers automatic inventory updates.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Completing manufacturing order with ID: {mo_id}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Completing manufacturing order with ID: {mo_id}", pid=os.getpid(), request=request)
     
     try:
         result = await service.complete_manufacturing_order(mo_id)
         
-        logs.define_logger(level=logging.INFO, message="Manufacturing order completed successfully.", loggName=log_info, pid=os.getpid(), request=request, response=result)
+        logs.define_logger(level=logging.INFO, message="Manufacturing order completed successfully.", pid=os.getpid(), request=request, response=result)
         
         return response.success(
             data=result,
@@ -138,11 +171,11 @@ async def complete_manufacturing_order(request: Request, mo_id: str, service: Ma
 
     
     except HTTPException as he:
-        logs.define_logger(level=logging.ERROR, message=f"Failed to complete manufacturing order: {he.detail}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Failed to complete manufacturing order: {he.detail}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=he.status_code, content=response.failure(message=he.detail, status_code=he.status_code))
     
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Unexpected error completing manufacturing order: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error completing manufacturing order: {e}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
 
 @router.get("/{mo_id}/export", summary="Download completed Manufacturing Order (CSV/PDF)")
@@ -152,15 +185,14 @@ async def export_manufacturing_order(
     fmt: str = Query("csv", description="Export format: 'csv' or 'pdf'"),
     service: ExportService = Depends(get_export_service),
 ):
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Exporting MO {mo_id} as {fmt}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Exporting MO {mo_id} as {fmt}", pid=os.getpid(), request=request)
     try:
         content, filename, mime = await service.export(mo_id, fmt.lower())
         headers = {"Content-Disposition": f"attachment; filename={filename}"}
         return StreamingResponse(io.BytesIO(content), media_type=mime, headers=headers)
     except HTTPException as he:
-        logs.define_logger(level=logging.ERROR, message=f"Export failed: {he.detail}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Export failed: {he.detail}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=he.status_code, content=response.failure(message=he.detail, status_code=he.status_code))
     except Exception as e:
-        logs.define_logger(level=logging.ERROR, message=f"Unexpected error exporting MO: {e}", loggName=log_info, pid=os.getpid(), request=request)
+        logs.define_logger(level=logging.ERROR, message=f"Unexpected error exporting MO: {e}", pid=os.getpid(), request=request)
         return JSONResponse(status_code=500, content=response.failure(message="An unexpected server error occurred.", status_code=500))
\ No newline at end of file
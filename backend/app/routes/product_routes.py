@@ -8,7 +8,6 @@ from ..repo.product_repo import ProductRepository
 from ..service.product_service import ProductService
 from ..core.security import RoleChecker
 from ..models.user_model import UserRole
-import inspect
 import os
 import logging
 
@@ -34,13 +33,12 @@ def create_product(
     """
     Creates a new product in the system.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Creating a new product...", loggName=log_info, pid=os.getpid(), request=request, body=product)
+    logs.define_logger(level=logging.INFO, message="Creating a new product...", pid=os.getpid(), request=request, body=product)
     
     result = service.create_product(product)
     created_product = service.repo.get_by_id(str(result.inserted_id))
 
-    logs.define_logger(level=logging.INFO, message="Product created successfully.", loggName=log_info, pid=os.getpid(), request=request, response=created_product)
+    logs.define_logger(level=logging.INFO, message="Product created successfully.", pid=os.getpid(), request=request, response=created_product)
     
     return Response.success(
         data=created_product,
@@ -60,12 +58,11 @@ def get_all_products(
     """
     Get all products from the system.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message="Fetching all products...", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message="Fetching all products...", pid=os.getpid(), request=request)
     
     products = service.get_all_products()
     
-    logs.define_logger(level=logging.INFO, message="Products fetched successfully.", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message="Products fetched successfully.", pid=os.getpid(), request=request)
     
     return Response.success(
         data=products,
@@ -86,12 +83,11 @@ def get_product_by_id(
     """
     Get a specific product by ID.
     """
-    log_info = inspect.stack()[0]
-    logs.define_logger(level=logging.INFO, message=f"Fetching product with ID: {product_id}", loggName=log_info, pid=os.getpid(), request=request)
+    logs.define_logger(level=logging.INFO, message=f"Fetching product with ID: {product_id}", pid=os.getpid(), request=request)
     
     product = service.get_product_by_id(product_id)
     
-    logs.define_logger(level=logging.INFO, message="Product fetched successfully.", loggName=log_info, pid=os.getpid(), request=request, response=product)
+    logs.define_logger(level=logging.INFO, message="Product fetched successfully.", pid=os.getpid(), request=request, response=product)
     
     return Response.success(
         data=product,
@@ -14,14 +14,14 @@ router = APIRouter(
     status_code=status.HTTP_201_CREATED,
     response_model=dict
 )
-def register_user(
+async def register_user(
     data: CreateUserSchema,
     service: UserService = Depends(get_user_service)
 ):
     """
     Register a new user. The user can specify their role upon creation.
     """
-    result = service.create_user(data)
+    result = await service.create_user(data)
     if result.get("status") != "success":
         raise HTTPException(
             status_code=result.get("status_code", 400),
@@ -35,14 +35,14 @@ def register_user(
     status_code=status.HTTP_200_OK,
     response_model=dict
 )
-def login_user(
+async def login_user(
     data: UserLogin,
     service: UserService = Depends(get_user_service)
 ):
     """
     Login user with email and password. Returns JWT token.
     """
-    result = service.login_user(data)
+    result = await service.login_user(data)
     if result.get("status") != "success":
         raise HTTPException(
             status_code=result.get("status_code", 401),
@@ -80,14 +80,14 @@ user_router = APIRouter(
     dependencies=[Depends(RoleChecker([UserRole.ADMIN]))],
     response_model=UserResponse
 )
-def get_user(
+async def get_user(
     item_id: str,
     service: UserService = Depends(get_user_service)
 ):
     """
     Retrieve a user's public details by their ID.
     """
-    result = service.get_user_by_id(item_id)
+    result = await service.get_user_by_id(item_id)
     if not result.get("success", False):
         raise HTTPException(
             status_code=result.get("status_code", 404),
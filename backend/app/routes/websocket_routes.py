@@ -1,53 +1,138 @@
 import logging
-from inspect import currentframe, getframeinfo
-import inspect
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from ..utils.websocket_manager import connection_manager
+from typing import List, Optional
+from fastapi import APIRouter, Header, Request, WebSocket, WebSocketDisconnect, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from ..utils.websocket_manager import channel_name, connection_manager, parse_channel
+from ..utils.response_model import response
 from ..core.logger import logs
+from ..core.settings import settings
 
 router = APIRouter(tags=["Websockets"])
 
 @router.websocket("/ws/")
 async def progress_websocket_endpoint(
     websocket: WebSocket,
-    topic: str = Query(...,description="srs_progress,epic_progress,ac_progress,qgen_progress"),
-    project_id: str = Query(...)
+    topic: Optional[str] = Query(None, description="mo_status, wo_status; optional initial subscription"),
+    project_id: Optional[str] = Query(None, description="MO or WO id, or * for all of them"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id")
 ):
     """
     A single, dynamic WebSocket endpoint for all real-time progress updates.
+
+    One socket can follow any number of channels ("mo_status:<mo_id>",
+    "wo_status:*", ...) by sending control messages:
+
+        {"action": "subscribe", "channels": ["mo_status:*"], "last_event_id": "<id>"}
+        {"action": "unsubscribe", "channels": ["mo_status:*"]}
+
+    Passing `topic` and `project_id` subscribes to that channel on connect,
+    exactly as a subscribe message would, reply included.
+    Every event carries the "channel" it was published on and its "id". A
+    reconnecting client passes the last id it saw as `last_event_id` and is
+    sent the events it missed, or {"type": "resync", ...} if they are gone.
+    Event ids are per worker: with several workers, resuming only works if
+    the load balancer sends a client back to the same one (sticky sessions).
     """
-    logg_name = inspect.stack()[0]
-    client_id = f"{topic}_{project_id}"
-    
     await websocket.accept()
-    await connection_manager.connect(websocket, client_id)
-    
+    subscriber = await connection_manager.connect(websocket)
+    client_id = f"{websocket.client.host if websocket.client else 'unknown'}:{id(subscriber):x}"
+    if topic and project_id:
+        # Validated like a control message: an invalid channel is answered
+        # with {"type": "error", ...} and the socket stays open
+        connection_manager.apply_control(subscriber, {
+            "action": "subscribe",
+            "channels": [channel_name(topic, project_id)],
+            "last_event_id": last_event_id,
+        })
+
     # <-- ADDED: Log successful connection
     logs.define_logger(
-        logging.INFO, None, logg_name, 
-        message=f"WebSocket connected: client_id='{client_id}', project_id='{project_id}'"
+        logging.INFO,
+        message=f"WebSocket connected: client_id='{client_id}', channels={sorted(subscriber.channels)}"
     )
-    
+
     try:
         while True:
-            await websocket.receive_text()
-            
+            connection_manager.handle_control(subscriber, await websocket.receive_text())
+
     except WebSocketDisconnect:
         # <-- ADDED: Log clean disconnection
         logs.define_logger(
-            logging.INFO, None, logg_name, 
+            logging.INFO,
             message=f"WebSocket client '{client_id}' disconnected cleanly."
         )
     except Exception as e:
         # <-- ADDED: Log unexpected errors
         logs.define_logger(
-            logging.ERROR, None, logg_name, 
+            logging.ERROR,
             message=f"WebSocket error for client '{client_id}': {e}"
         )
     finally:
-        await connection_manager.disconnect(client_id)
+        await connection_manager.disconnect(subscriber)
         # <-- ADDED: Log connection cleanup
         logs.define_logger(
-            logging.INFO, None, logg_name, 
+            logging.INFO,
             message=f"Cleaned up connection for client '{client_id}'."
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/sse/", summary="Stream Live Status Events")
+async def progress_sse_endpoint(
+    request: Request,
+    channels: List[str] = Query([], description="Channels to follow, repeated or comma-separated, e.g. mo_status:*,wo_status:<wo_id>"),
+    topic: Optional[str] = Query(None, description="mo_status, wo_status; shorthand for one channel"),
+    project_id: Optional[str] = Query(None, description="MO or WO id, or * for all of them"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Read-only Server-Sent Events feed of the same events as the WebSocket
+    endpoint, for clients behind proxies that do not pass WebSockets through.
+
+    Each event is sent as "id: <event id>" and "data: <the WebSocket JSON>".
+    An idle stream gets a ": keep-alive" comment every SSE_HEARTBEAT_SECONDS.
+    Browsers resume on their own by sending the Last-Event-ID header; the
+    missed events are replayed, or {"type": "resync", ...} is sent if they
+    are gone. As with the WebSocket endpoint, resuming across several
+    workers needs sticky sessions.
+    """
+    requested = [channel.strip() for value in channels for channel in value.split(",") if channel.strip()]
+    if topic and project_id:
+        requested.append(channel_name(topic, project_id))
+    try:
+        requested = list(dict.fromkeys(parse_channel(channel) for channel in requested))
+        if not requested:
+            raise ValueError("Pass at least one channel, e.g. channels=mo_status:*.")
+        if len(requested) > connection_manager.max_subscriptions:
+            raise ValueError(f"Subscription limit of {connection_manager.max_subscriptions} channels reached.")
+    except ValueError as e:
+        logs.define_logger(logging.ERROR, message=f"Invalid SSE request: {e}", request=request)
+        return JSONResponse(status_code=400, content=response.failure(message=str(e), status_code=400))
+
+    # Subscribing and replaying happen before the first await, so no event
+    # is missed or sent twice in between.
+    subscriber = connection_manager.connect_sse()
+    for channel in requested:
+        connection_manager.subscribe(subscriber, channel)
+    resume_from = last_event_id_header or last_event_id
+    if resume_from:
+        connection_manager.replay(subscriber, requested, resume_from)
+
+    client_id = f"{request.client.host if request.client else 'unknown'}:{id(subscriber):x}"
+    logs.define_logger(
+        logging.INFO,
+        message=f"SSE connected: client_id='{client_id}', channels={sorted(subscriber.channels)}"
+    )
+    return StreamingResponse(
+        subscriber.stream(settings.SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            # Stops nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+        # Also covers clients that leave before the stream starts
+        background=BackgroundTask(connection_manager.disconnect, subscriber),
+    )
@@ -1,14 +1,15 @@
 # app/api/routes/wo_router.py
 
-from fastapi import APIRouter, Depends, status, Body, Query
+from fastapi import APIRouter, Depends, status, Body, Query, Response
 from typing import Dict, Any, List
 
-from pymongo.database import Database
-from app.core.db_connection import get_db # Assuming a dependency to get the DB
+from pymongo.asynchronous.database import AsyncDatabase
+from app.core.db_connection import get_async_db
 from app.service.work_order_service import WorkOrderService
 from app.models.work_order_model import WorkOrderUpdate, WorkOrderInDB
 from app.core.security import RoleChecker
 from app.models.user_model import UserRole
+from app.utils.pagination import PageParams
 
 router = APIRouter(
     prefix="/work-orders",
@@ -18,19 +19,25 @@ router = APIRouter(
 @router.get(
     "/",
     summary="Get All Work Orders",
-    description="Retrieves a list of all work orders. Can be filtered by `mo_id` to see the sequence of subprocesses and their statuses for a specific manufacturing order.",
+    description="Retrieves a page of work orders. Can be filtered by `mo_id` to see the sequence of subprocesses and their statuses for a specific manufacturing order. The cursor for the next page is returned in the `X-Next-Cursor` header.",
     response_model=List[WorkOrderInDB],
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(RoleChecker([
         UserRole.OPERATOR, UserRole.MANUFACTURING_MANAGER, UserRole.ADMIN
     ]))]
 )
-def get_all_work_orders(
+async def get_all_work_orders(
+    response: Response,
     mo_id: str = Query(None, description="Filter work orders by Manufacturing Order ID"),
-    db: Database = Depends(get_db)
+    wo_status: str = Query(None, alias="status", description="Filter work orders by status"),
+    page: PageParams = Depends(),
+    db: AsyncDatabase = Depends(get_async_db)
 ):
     service = WorkOrderService(db)
-    return service.get_work_orders(mo_id=mo_id)
+    work_orders, next_cursor = await service.get_work_orders(page, mo_id=mo_id, status=wo_status)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return work_orders
 
 @router.patch(
     "/{wo_id}/status",
@@ -45,7 +52,7 @@ def get_all_work_orders(
 async def update_work_order_status(
     wo_id: str,
     update_data: WorkOrderUpdate,
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_async_db)
 ):
     service = WorkOrderService(db)
     return await service.update_work_order_status(wo_id, update_data.status)
\ No newline at end of file
@@ -1,121 +1,164 @@
-import inspect
+import asyncio
 from datetime import datetime, timedelta
-from pymongo.database import Database
-from typing import List
-from pymongo.database import Database
+from typing import Any, Dict, List, Optional
+from pymongo.asynchronous.database import AsyncDatabase
 from app.core.logger import logs
-from app.repo.manufacture_repo import ManufacturingOrderRepository
-from app.models.analytics_model import StatusOverview, AverageCycleTime, ThroughputDataPoint
+from app.core.settings import settings
+from app.repo.manufacture_repo import AsyncManufacturingOrderRepository
+from app.repo.production_rollup_repo import AsyncProductionRollupRepository
+from app.models.analytics_model import (
+    AverageCycleTime, DashboardKPIs, ProductionThroughput, StatusOverview, ThroughputDataPoint,
+)
+from app.utils.cache import TTLCache
+from app.utils import sketch
+
+# Dashboard results by period, shared by every admin. Cleared whenever an MO
+# changes status (see invalidate_dashboard_cache).
+dashboard_cache = TTLCache(maxsize=16, ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
+# Lets only one request recompute a missing dashboard; the rest wait for it.
+_dashboard_lock = asyncio.Lock()
+
+async def invalidate_dashboard_cache(event: Dict[str, Any] = None):
+    """Event bus handler that drops cached dashboards when an MO changes."""
+    dashboard_cache.clear()
 
 class AnalyticsService:
     """
     Contains the business logic for calculating analytics and KPIs.
+    Throughput and cycle time are read from 'production_daily_rollups', which
+    MO completion keeps up to date, so they cost one small document per day
+    and product instead of a scan of the order history.
     """
-    def __init__(self, db: Database):
-        # Repository expects a Database instance
-        self.mo_repository = ManufacturingOrderRepository(db)
+    def __init__(self, db: AsyncDatabase):
+        # Repository expects an AsyncDatabase instance
+        self.mo_repository = AsyncManufacturingOrderRepository(db)
+        self.rollup_repository = AsyncProductionRollupRepository(db)
 
     async def get_status_overview(self) -> StatusOverview:
         """
         Calculates the count of Manufacturing Orders for each status.
         """
         try:
-            logs.define_logger(20, "Calculating status overview.", loggName=inspect.stack()[0])
-            pipeline = [
-                {
-                    "$group": {
-                        "_id": "$status",
-                        "count": {"$sum": 1}
-                    }
-                }
-            ]
-            # BaseRepository doesn't expose aggregate; access underlying collection
-            results = list(self.mo_repository.collection.aggregate(pipeline))
-            
-            overview_data = {item['_id']: item['count'] for item in results}
-            return StatusOverview(**overview_data)
+            logs.define_logger(20, message="Calculating status overview.")
+            results = await self.mo_repository.aggregate(self._status_overview_stages())
+            return self._to_status_overview(results)
         except Exception as e:
-            logs.define_logger(50, f"Error in get_status_overview: {e}", loggName=inspect.stack()[0])
+            logs.define_logger(50, message=f"Error in get_status_overview: {e}")
             raise
 
-    async def get_production_throughput(self, days: int = 7) -> List[ThroughputDataPoint]:
+    async def get_production_throughput(self, days: int = 7, product_id: Optional[str] = None) -> List[ThroughputDataPoint]:
         """
         Calculates the number of completed MOs per day for the last N days.
         """
         try:
-            logs.define_logger(20, f"Calculating production throughput for last {days} days.", loggName=inspect.stack()[0])
-            start_date = datetime.utcnow() - timedelta(days=days)
-            
-            pipeline = [
-                {
-                    "$match": {
-                        "status": "done",
-                        "completed_at": {"$gte": start_date}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "$dateToString": {"format": "%Y-%m-%d", "date": "$completed_at"}
-                        },
-                        "count": {"$sum": 1}
-                    }
-                },
-                {"$sort": {"_id": 1}},
-                {
-                    "$project": {
-                        "date": "$_id",
-                        "count": 1,
-                        "_id": 0
-                    }
-                }
-            ]
-            results = list(self.mo_repository.collection.aggregate(pipeline))
-            return [ThroughputDataPoint(**item) for item in results]
+            logs.define_logger(20, message=f"Calculating production throughput for last {days} days.")
+            rollups = await self.rollup_repository.get_range(self._period_start(days), product_id)
+            return self._to_throughput(rollups)
         except Exception as e:
-            logs.define_logger(50, f"Error in get_production_throughput: {e}", loggName=inspect.stack()[0])
+            logs.define_logger(50, message=f"Error in get_production_throughput: {e}")
             raise
 
-    async def get_average_cycle_time(self) -> AverageCycleTime:
+    async def get_average_cycle_time(self, days: Optional[int] = None, product_id: Optional[str] = None) -> AverageCycleTime:
         """
-        Calculates the average time from creation to completion for all 'done' orders.
+        Calculates the average, median and 95th percentile time from creation to
+        completion of 'done' orders, over the last N days or all time.
         """
         try:
-            logs.define_logger(20, "Calculating average cycle time.", loggName=inspect.stack()[0])
-            pipeline = [
-                {
-                    "$match": {
-                        "status": "done",
-                        "completed_at": {"$ne": None} # Ensure completion date exists
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": None,
-                        "avg_duration_ms": {
-                            "$avg": {
-                                "$subtract": ["$completed_at", "$created_at"]
-                            }
-                        },
-                        "count": {"$sum": 1}
-                    }
-                }
-            ]
-            results = list(self.mo_repository.collection.aggregate(pipeline))
-
-            if not results:
-                return AverageCycleTime(average_hours=0, average_minutes=0, total_orders_calculated=0)
-            
-            avg_ms = results[0]['avg_duration_ms']
-            avg_seconds = avg_ms / 1000
-            avg_minutes = avg_seconds / 60
-            avg_hours = avg_minutes / 60
-            
-            return AverageCycleTime(
-                average_hours=round(avg_hours, 2),
-                average_minutes=round(avg_minutes, 2),
-                total_orders_calculated=results[0]['count']
+            logs.define_logger(20, message="Calculating average cycle time.")
+            start = self._period_start(days) if days else None
+            rollups = await self.rollup_repository.get_range(start, product_id)
+            return self._to_cycle_time(rollups)
+        except Exception as e:
+            logs.define_logger(50, message=f"Error in get_average_cycle_time: {e}")
+            raise
+
+    async def get_dashboard(self, days: int = 7) -> DashboardKPIs:
+        """
+        Computes the status overview plus throughput and cycle time for the
+        period. Results are cached for DASHBOARD_CACHE_TTL_SECONDS and reused
+        by every caller until an MO changes status.
+        """
+        cached = dashboard_cache.get(days)
+        if cached is None:
+            async with _dashboard_lock:
+                # Another request may have filled the cache while we waited
+                cached = dashboard_cache.get(days)
+                if cached is None:
+                    # An MO changing status mid-compute makes this result stale;
+                    # it is still returned, but not cached
+                    generation = dashboard_cache.generation
+                    cached = await self._compute_dashboard(days)
+                    dashboard_cache.set(days, cached, generation=generation)
+
+        age = (datetime.utcnow() - cached["computed_at"]).total_seconds()
+        return DashboardKPIs(**cached, cache_age_seconds=round(age, 3))
+
+    async def _compute_dashboard(self, days: int) -> Dict[str, Any]:
+        try:
+            logs.define_logger(20, message=f"Computing dashboard KPIs for last {days} days.")
+            # One status aggregation and one rollup read, run concurrently; the
+            # same rollups feed both throughput and cycle time.
+            status_results, rollups = await asyncio.gather(
+                self.mo_repository.aggregate(self._status_overview_stages()),
+                self.rollup_repository.get_range(self._period_start(days)),
             )
+            return {
+                "status_overview": self._to_status_overview(status_results),
+                "throughput": ProductionThroughput(period=f"Last {days} days", data=self._to_throughput(rollups)),
+                "cycle_time": self._to_cycle_time(rollups),
+                "computed_at": datetime.utcnow(),
+            }
         except Exception as e:
-            logs.define_logger(50, f"Error in get_average_cycle_time: {e}", loggName=inspect.stack()[0])
+            logs.define_logger(50, message=f"Error in get_dashboard: {e}")
             raise
+
+    @staticmethod
+    def _period_start(days: int) -> datetime:
+        return datetime.utcnow() - timedelta(days=days)
+
+    @staticmethod
+    def _status_overview_stages() -> List[Dict[str, Any]]:
+        return [
+            {
+                "$group": {
+                    "_id": "$status",
+                    "count": {"$sum": 1}
+                }
+            }
+        ]
+
+    @staticmethod
+    def _to_status_overview(results: List[Dict[str, Any]]) -> StatusOverview:
+        overview_data = {item['_id']: item['count'] for item in results}
+        return StatusOverview(**overview_data)
+
+    @staticmethod
+    def _to_throughput(rollups: List[Dict[str, Any]]) -> List[ThroughputDataPoint]:
+        per_day: Dict[str, int] = {}
+        for rollup in rollups:
+            date = rollup["day"].strftime("%Y-%m-%d")
+            per_day[date] = per_day.get(date, 0) + rollup.get("count", 0)
+        return [ThroughputDataPoint(date=date, count=count) for date, count in sorted(per_day.items())]
+
+    @staticmethod
+    def _to_cycle_time(rollups: List[Dict[str, Any]]) -> AverageCycleTime:
+        count = sum(rollup.get("count", 0) for rollup in rollups)
+        if not count:
+            return AverageCycleTime(average_hours=0, average_minutes=0, total_orders_calculated=0)
+
+        avg_ms = sum(rollup.get("sum_cycle_ms", 0) for rollup in rollups) / count
+        avg_seconds = avg_ms / 1000
+        avg_minutes = avg_seconds / 60
+        avg_hours = avg_minutes / 60
+
+        buckets = sketch.merge(rollup.get("sketch") for rollup in rollups)
+        p50_ms = sketch.quantile(buckets, 0.5)
+        p95_ms = sketch.quantile(buckets, 0.95)
+
+        return AverageCycleTime(
+            average_hours=round(avg_hours, 2),
+            average_minutes=round(avg_minutes, 2),
+            total_orders_calculated=count,
+            p50_hours=round(p50_ms / 3_600_000, 2),
+            p95_hours=round(p95_ms / 3_600_000, 2),
+        )
@@ -1,57 +1,136 @@
 import asyncio
-import inspect
-from typing import Dict, List
-from pymongo.database import Database
+import functools
+import os
+import socket
+import uuid
+from typing import Dict
+from pymongo.asynchronous.database import AsyncDatabase
 from app.core.logger import logs
-from app.repo.work_order_repo import WorkOrderRepository
+from app.core.settings import settings
+from app.repo.work_order_repo import AsyncWorkOrderRepository
+from app.service.polling_service import PollingService, polling_service
 from app.service.work_order_service import WorkOrderService
 
 class AutomationService:
     """
     Contains the business logic for polling and automating manufacturing processes.
+    Work orders are claimed atomically with a lease, so several workers or app
+    replicas can run automation side by side without picking up the same job.
+    Work is picked up as soon as a work order change event arrives; the polling
+    task is only a safety net for events that were missed.
     """
-    def __init__(self, db: Database):
+    def __init__(self, db: AsyncDatabase, worker_id: str = None, pool: PollingService = None):
         self.db = db
-        self.wo_repo = WorkOrderRepository(db)
+        self.pool = pool or polling_service
+        self.wo_repo = AsyncWorkOrderRepository(db)
         self.wo_service = WorkOrderService(db)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = settings.AUTOMATION_LEASE_SECONDS
+        self.work_seconds = settings.AUTOMATION_WORK_SECONDS
+
+    async def _heartbeat(self, wo_id: str):
+        """
+        Renews the lease on a claimed work order while its job is running.
+        """
+        interval = max(self.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.wo_repo.renew_lease(wo_id, self.worker_id, self.lease_seconds):
+                logs.define_logger(30, message=f"AUTOMATION: Lost lease on WO {wo_id}.")
+                return
 
     async def _simulate_and_complete_wo(self, wo: Dict):
         """
-        Simulates a single work order being processed and marks it as done.
+        Simulates a single, already claimed work order being processed and marks it as done.
         This is a helper for the main polling task.
         """
         wo_id = str(wo["_id"])
-        
+        heartbeat = asyncio.create_task(self._heartbeat(wo_id))
+
         try:
-            # Optimistically "lock" the WO by changing its status to 'processing'
-            # This prevents other polling cycles from picking up the same job.
-            self.wo_repo.update(wo_id, {"status": "processing"})
-            logs.define_logger(20, f"AUTOMATION: Simulating work for WO {wo_id} for 30 seconds...", loggName=inspect.stack()[0])
-            
+            logs.define_logger(20, message=f"AUTOMATION: Simulating work for WO {wo_id} for {self.work_seconds} seconds...")
+
             # Simulate the time it takes to perform the work
-            await asyncio.sleep(30)
-            
-            logs.define_logger(20, f"AUTOMATION: Work for WO {wo_id} finished. Updating status to 'done'.", loggName=inspect.stack()[0])
-            
+            await asyncio.sleep(self.work_seconds)
+            heartbeat.cancel()
+
+            # Only the lease holder may finish the job; if the lease expired and the
+            # WO was requeued, another worker owns it now.
+            if not await self.wo_repo.renew_lease(wo_id, self.worker_id, self.lease_seconds):
+                logs.define_logger(30, message=f"AUTOMATION: Lease on WO {wo_id} expired before completion. Skipping.")
+                return
+
+            logs.define_logger(20, message=f"AUTOMATION: Work for WO {wo_id} finished. Updating status to 'done'.")
+
             # Use the WorkOrderService to properly update the status to 'done'.
             # This service contains the crucial logic to advance the workflow to the next WO or complete the parent MO.
             await self.wo_service.update_work_order_status(wo_id=wo_id, new_status="done")
+            await self.wo_repo.release_lease(wo_id, self.worker_id)
 
         except Exception as e:
-            logs.define_logger(40, f"AUTOMATION: Error processing WO {wo_id}: {e}. Setting status back to 'pending'.", loggName=inspect.stack()[0])
-            # If something goes wrong, reset the status so it can be picked up again or handled manually.
-            self.wo_repo.update(wo_id, {"status": "pending"})
-
+            logs.define_logger(40, message=f"AUTOMATION: Error processing WO {wo_id}: {e}. Requeueing it.")
+            # If something goes wrong, hand the WO back so it can be claimed again.
+            # No event is published for this, so a failing WO is retried at the
+            # polling interval rather than in a tight loop.
+            await self.wo_repo.release_lease(wo_id, self.worker_id, status="in_progress")
+        finally:
+            heartbeat.cancel()
 
     async def polling_task(self):
         """
         The main task to be registered with the PollingService.
-        It finds work orders that are 'in_progress' and processes them concurrently.
+        It claims 'in_progress' work orders only while the worker pool has free
+        slots, and hands each one to the pool so this poll returns immediately.
+        Claiming more than the pool can run would let leases expire in the queue,
+        so a slot is reserved before each claim.
+        """
+        claimed = 0
+        while self.pool.reserve_slot():
+            try:
+                wo = await self.wo_repo.claim_next(self.worker_id, self.lease_seconds)
+            except BaseException:
+                self.pool.release_slot()
+                raise
+            if wo is None:
+                self.pool.release_slot()
+                break
+            self.pool.submit(functools.partial(self._simulate_and_complete_wo, wo), reserved=True)
+            claimed += 1
+
+        if claimed:
+            logs.define_logger(10, message=f"AUTOMATION: Claimed {claimed} work order(s); queue depth {self.pool.queue_depth}.")
+
+    async def on_work_order_event(self, event: Dict):
         """
-        work_orders_to_process = self.wo_repo.get_all({"status": "in_progress"})
-        
-        if not work_orders_to_process:
-            return # Nothing to do in this cycle
+        Event bus handler: claims a work order the moment it becomes 'in_progress'.
+        Claims are atomic, so a duplicate event or a racing poll is harmless.
+        A pool slot is reserved before claiming, so a burst of events never
+        claims more than the pool can run. Work orders turned away while the
+        pool is full are picked up by the poll, which the pool runs again as
+        soon as a slot frees (see register_task's on_free_slot).
+        """
+        if event.get("status") != "in_progress":
+            return
+        if not self.pool.reserve_slot():
+            self.pool.trigger(self.polling_task)
+            return
+        try:
+            wo = await self.wo_repo.claim_by_id(event["id"], self.worker_id, self.lease_seconds)
+        except BaseException:
+            self.pool.release_slot()
+            raise
+        if wo is None:
+            self.pool.release_slot()
+            return
+        self.pool.submit(functools.partial(self._simulate_and_complete_wo, wo), reserved=True)
 
-        processing_tasks = [self._simulate_and_complete_wo(wo) for wo in work_orders_to_process]
-        await asyncio.gather(*processing_tasks)
\ No newline at end of file
+    async def reap_expired_leases(self):
+        """
+        Requeues work orders whose worker died or stalled without renewing its lease.
+        """
+        requeued = await self.wo_repo.requeue_expired_leases()
+        if requeued:
+            logs.define_logger(30, message=f"AUTOMATION: Requeued {requeued} work order(s) with expired leases.")
+            # Requeued IDs are not known here, so have the scheduled poll claim
+            # them right away rather than running a second, overlapping poll
+            self.pool.trigger(self.polling_task)
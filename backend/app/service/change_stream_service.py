@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+from app.core.logger import logs
+from app.utils.event_bus import EventBus, MANUFACTURING_ORDERS, WORK_ORDERS, event_bus
+
+# Server error code for "The $changeStream stage is only supported on replica sets".
+_CHANGE_STREAMS_UNSUPPORTED = 40573
+# Server error code for "ChangeStreamHistoryLost": the resume token fell off the oplog.
+_HISTORY_LOST = 286
+
+# Only inserts and updates that touch 'status' are interesting; lease renewals
+# and other bookkeeping writes are filtered out on the server.
+STATUS_CHANGES_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": "insert"},
+        {"updateDescription.updatedFields.status": {"$exists": True}},
+    ]}},
+]
+
+
+class ChangeStreamService:
+    """
+    Watches 'work_orders' and 'manufacturing_orders' with MongoDB change streams
+    and republishes status changes on the event bus.
+
+    If the server does not support change streams the watcher stops, and the
+    bus falls back to the events services publish for their own writes.
+    """
+    def __init__(self, db: AsyncDatabase, bus: EventBus = None, retry_seconds: float = 5):
+        self.db = db
+        self.bus = bus or event_bus
+        self.retry_seconds = retry_seconds
+        self._watchers: List[asyncio.Task] = []
+
+    async def start(self):
+        """Starts one watcher per collection."""
+        self._watchers = [
+            asyncio.create_task(self._watch(collection))
+            for collection in (WORK_ORDERS, MANUFACTURING_ORDERS)
+        ]
+
+    async def stop(self):
+        """Stops the watchers and hands event publishing back to the services."""
+        for task in self._watchers:
+            task.cancel()
+        await asyncio.gather(*self._watchers, return_exceptions=True)
+        self._watchers = []
+        self.bus.change_streams_active = False
+
+    @staticmethod
+    def _to_event(collection: str, change: Dict[str, Any]) -> Dict[str, Any]:
+        operation = change["operationType"]
+        if operation == "insert":
+            status = change.get("fullDocument", {}).get("status")
+        else:
+            status = change.get("updateDescription", {}).get("updatedFields", {}).get("status")
+        return {
+            "collection": collection,
+            "operation": operation,
+            "id": str(change["documentKey"]["_id"]),
+            "status": status,
+        }
+
+    async def _watch(self, collection: str):
+        """
+        Tails the change stream of one collection, resuming after the last seen
+        event when the stream is interrupted.
+        """
+        resume_token: Optional[Dict[str, Any]] = None
+        while True:
+            try:
+                stream = await self.db[collection].watch(STATUS_CHANGES_PIPELINE, resume_after=resume_token)
+                async with stream:
+                    self.bus.change_streams_active = True
+                    logs.define_logger(20, message=f"Watching change stream on '{collection}'.")
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self.bus.publish(collection, self._to_event(collection, change))
+            except asyncio.CancelledError:
+                raise
+            except (OperationFailure, NotImplementedError) as e:
+                if isinstance(e, OperationFailure) and e.code != _CHANGE_STREAMS_UNSUPPORTED:
+                    if e.code == _HISTORY_LOST:
+                        # Start from now; the safety-net poll picks up anything missed.
+                        resume_token = None
+                    self._interrupted(collection, e)
+                    await asyncio.sleep(self.retry_seconds)
+                    continue
+                self.bus.change_streams_active = False
+                logs.define_logger(30, message=f"Change streams unavailable for '{collection}'; using in-process events: {e}")
+                return
+            except PyMongoError as e:
+                self._interrupted(collection, e)
+                await asyncio.sleep(self.retry_seconds)
+
+    def _interrupted(self, collection: str, error: Exception):
+        # While the stream is down, let services publish their own writes so
+        # events from this process are still delivered.
+        self.bus.change_streams_active = False
+        logs.define_logger(40, message=f"Change stream on '{collection}' interrupted, retrying: {error}")
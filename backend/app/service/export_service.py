@@ -1,13 +1,12 @@
 import csv
 import io
-import inspect
 from datetime import datetime
 from typing import Tuple, List
 
 from fastapi import HTTPException, status
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
-from app.repo.manufacture_repo import ManufacturingOrderRepository
+from app.repo.manufacture_repo import AsyncManufacturingOrderRepository
 from app.core.logger import logs
 
 
@@ -16,8 +15,8 @@ class ExportService:
     Service to export Manufacturing Orders as CSV or PDF if the MO status is 'done'.
     """
 
-    def __init__(self, db: Database):
-        self.mo_repo = ManufacturingOrderRepository(db)
+    def __init__(self, db: AsyncDatabase):
+        self.mo_repo = AsyncManufacturingOrderRepository(db)
 
     async def export(self, mo_id: str, fmt: str) -> Tuple[bytes, str, str]:
         """
@@ -25,9 +24,9 @@ class ExportService:
 
         Returns: (content_bytes, filename, mime_type)
         """
-        logs.define_logger(20, f"Export requested for MO {mo_id} as {fmt}", loggName=inspect.stack()[0])
+        logs.define_logger(20, message=f"Export requested for MO {mo_id} as {fmt}")
 
-        order = self.mo_repo.get_by_id(mo_id)
+        order = await self.mo_repo.get_by_id(mo_id)
         if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Manufacturing Order not found.")
 
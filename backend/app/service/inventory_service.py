@@ -1,31 +1,29 @@
-import inspect
 from typing import List, Dict
-from pymongo.database import Database
-from app.repo.ledger_repo import StockLedgerRepository
+from pymongo.asynchronous.database import AsyncDatabase
+from app.repo.stock_balance_repo import AsyncStockBalanceRepository
 from app.core.logger import logs
 
 class InventoryService:
     """
     Service dedicated to inventory-related business logic,
-    such as calculating current stock availability from ledger data.
+    such as reading current stock availability from the stock balance projection.
     """
-    def __init__(self, db: Database):
-        self.ledger_repo = StockLedgerRepository(db)
+    def __init__(self, db: AsyncDatabase):
+        self.balance_repo = AsyncStockBalanceRepository(db)
 
     async def get_current_stock_levels(self) -> List[Dict]:
-        logs.define_logger(20, "Calculating current stock levels in InventoryService.", loggName=inspect.stack()[0])
-        ledger_entries = self.ledger_repo.get_all()
-        if not ledger_entries:
-            return []
+        """
+        Returns the current stock per product from the 'stock_balances' projection.
+        """
+        logs.define_logger(20, message="Reading current stock levels in InventoryService.")
+        return await self.balance_repo.get_balances()
 
-        stock_levels = {}
-        for entry in ledger_entries:
-            pid = entry.get("product_id")
-            qty_change = entry.get("quantity_change", 0)
-            if pid is None:
-                continue
-            stock_levels[pid] = stock_levels.get(pid, 0) + qty_change
-
-        # Convert result to a list of dicts for response
-        result = [{"product_id": pid, "current_stock": qty} for pid, qty in stock_levels.items()]
-        return result
+    async def check_consistency(self) -> List[Dict]:
+        """
+        Diffs the projection against the ledger and returns the mismatching products.
+        """
+        logs.define_logger(20, message="Checking stock balance projection against the ledger.")
+        mismatches = await self.balance_repo.diff_against_ledger()
+        if mismatches:
+            logs.define_logger(30, message=f"Stock balance projection drift detected: {mismatches}")
+        return mismatches
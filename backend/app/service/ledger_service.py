@@ -1,33 +1,58 @@
-import inspect
 from fastapi import HTTPException
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 
 from app.core.logger import logs
-from app.repo.ledger_repo import StockLedgerRepository
-from pymongo.database import Database
+from app.repo.ledger_repo import AsyncStockLedgerRepository
+from pymongo.asynchronous.database import AsyncDatabase
+from app.utils.pagination import PageParams
+from app.utils.streaming import ndjson_stream, csv_stream
+
+LEDGER_EXPORT_FIELDS = ["_id", "product_id", "quantity_change", "reason", "manufacturing_order_id", "created_at"]
 
 class StockLedgerService:
     """
     Contains the business logic for the stock ledger.
     """
-    def __init__(self, db: Database):
-        self.repository = StockLedgerRepository(db)
+    def __init__(self, db: AsyncDatabase):
+        self.repository = AsyncStockLedgerRepository(db)
 
-    async def get_ledger_history(self) -> List[Dict]:
+    async def get_ledger_history(
+        self, page: PageParams, product_id: str = None, mo_id: str = None
+    ) -> Tuple[List[Dict], Optional[str]]:
         """
-        Retrieves the entire history of stock movements.
+        Retrieves one keyset-paginated page of stock movements and the cursor for the next page.
         """
-        logs.define_logger(20, "Fetching stock ledger history.", loggName=inspect.stack()[0])
-        history = self.repository.get_all()
-        if not history:
-            return []
-        return history
+        logs.define_logger(20, message="Fetching stock ledger history.")
+        query = page.date_filter()
+        if product_id:
+            query["product_id"] = product_id
+        if mo_id:
+            query["manufacturing_order_id"] = mo_id
+        return await self.repository.paginate(query, page.limit, page.after, page.sort, page.descending)
+
+    def stream_ledger_history(
+        self, fmt: str, product_id: str = None, mo_id: str = None, date_filter: Dict = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams the matching ledger history as NDJSON or CSV chunks, iterating a
+        server-side cursor in batches so memory stays bounded.
+        """
+        logs.define_logger(20, message=f"Streaming stock ledger history as {fmt}.")
+        query = dict(date_filter or {})
+        if product_id:
+            query["product_id"] = product_id
+        if mo_id:
+            query["manufacturing_order_id"] = mo_id
+        docs = self.repository.stream(query)
+        if fmt == "csv":
+            return csv_stream(docs, LEDGER_EXPORT_FIELDS)
+        return ndjson_stream(docs)
 
     async def get_current_stock_levels(self) -> List[Dict]:
         """
         Calculates and retrieves the current stock levels for all products.
         """
-        logs.define_logger(20, "Calculating current stock levels.", loggName=inspect.stack()[0])
+        logs.define_logger(20, message="Calculating current stock levels.")
         availability = self.repository.get_stock_availability()
         if not availability:
             # If there are no ledger entries, it means stock is zero for all items.
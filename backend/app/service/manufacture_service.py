@@ -1,50 +1,59 @@
-import inspect
-from typing import List, Dict, Any
+import asyncio
+from typing import Coroutine, List, Dict, Any, Optional, Tuple
 
+from bson import ObjectId
 from fastapi import HTTPException
-from ..repo.manufacture_repo import ManufacturingOrderRepository
-from ..repo.product_repo import ProductRepository
-from ..repo.bom_repo import BOMRepository
-from ..repo.ledger_repo import StockLedgerRepository
-from ..repo.work_centre_repo import WorkCentreRepository
-from ..repo.work_order_repo import WorkOrderRepository
+from ..repo.manufacture_repo import AsyncManufacturingOrderRepository
+from ..repo.product_repo import AsyncProductRepository
+from ..repo.bom_repo import AsyncBOMRepository
+from ..repo.ledger_repo import AsyncStockLedgerRepository
+from ..repo.production_rollup_repo import AsyncProductionRollupRepository
+from ..repo.stock_balance_repo import AsyncStockBalanceRepository
+from ..repo.work_centre_repo import AsyncWorkCentreRepository
+from ..repo.work_order_repo import AsyncWorkOrderRepository
 from ..models.manufacture import ManufacturingOrderCreate, ManufacturingOrder, WorkOrder, BillOfMaterials
-from ..models.ledger_model import StockLedgerEntryCreate
 from ..core.logger import logs
+from ..core.db_connection import run_in_transaction
 from ..utils.websocket_manager import connection_manager
+from ..utils.event_bus import event_bus, MANUFACTURING_ORDERS, WORK_ORDERS
+from ..utils.pagination import PageParams
 from datetime import datetime, timezone
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
 class ManufacturingOrderService:
     """
     Handles business logic for MOs. Returns raw data or raises HTTPErrors.
     """
-    def __init__(self, db: Database):
-        self.mo_repo = ManufacturingOrderRepository(db)
-        self.product_repo = ProductRepository(db)
-        self.bom_repo = BOMRepository(db)
-        self.stock_repo = StockLedgerRepository(db)
-        self.wc_repo = WorkCentreRepository(db)
-        self.wo_repo = WorkOrderRepository(db)
+    def __init__(self, db: AsyncDatabase):
+        self.db = db
+        self.mo_repo = AsyncManufacturingOrderRepository(db)
+        self.product_repo = AsyncProductRepository(db)
+        self.bom_repo = AsyncBOMRepository(db)
+        self.stock_repo = AsyncStockLedgerRepository(db)
+        self.balance_repo = AsyncStockBalanceRepository(db)
+        self.rollup_repo = AsyncProductionRollupRepository(db)
+        self.wc_repo = AsyncWorkCentreRepository(db)
+        self.wo_repo = AsyncWorkOrderRepository(db)
 
-    async def create_manufacturing_order(self, order_data: ManufacturingOrderCreate) -> Dict[str, Any]:
-        logs.define_logger(20, "Executing create_manufacturing_order service", loggName=inspect.stack()[0])
-        
-        # Get BOM for the product
-        bom_data = self.bom_repo.find_one({"finishedProductId": order_data.product_id})
+    def _build_order_documents(
+        self,
+        order_data: ManufacturingOrderCreate,
+        bom_data: Optional[Dict[str, Any]],
+        product: Optional[Dict[str, Any]],
+        work_centres: Dict[str, Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Builds the MO document and its work order documents in memory from
+        already-fetched BOM, product and work centre data. Raises HTTPException
+        when the order cannot be created.
+        """
         if not bom_data:
             raise HTTPException(status_code=404, detail="Bill of Materials not found for this product.")
         
         # Validate product exists
-        product = self.product_repo.get_by_id(order_data.product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found.")
 
-        # Convert MongoDB document to BillOfMaterials model
-        # Remove MongoDB _id and convert the document
-        if "_id" in bom_data:
-            del bom_data["_id"]
-            
         # Map the BOM fields properly
         bom = BillOfMaterials(
             product_id=bom_data["finishedProductId"],
@@ -55,10 +64,8 @@ class ManufacturingOrderService:
         # Create work orders from BOM operations
         work_orders_to_create = []
         for i, op in enumerate(bom.operations):
-            operation_name = op.get('name', op.get('operation_name', 'Unknown Operation'))
-            
-            # Find work center by operation name
-            work_center = self.wc_repo.find_one({"operation": operation_name})
+            operation_name = self._operation_name(op)
+            work_center = work_centres.get(operation_name)
             if not work_center:
                 raise HTTPException(status_code=404, detail=f"Work Center for operation '{operation_name}' not found.")
 
@@ -69,102 +76,218 @@ class ManufacturingOrderService:
             )
             work_orders_to_create.append(work_order)
         
+        # --- AUTOMATION STEP 1: Create and immediately start the process ---
+        # The MO and its first WO are written directly as 'in_progress'.
         new_mo_model = ManufacturingOrder(
                 mo_id="1234",
                 product_id=order_data.product_id,
                 quantity_to_produce=order_data.quantity,
+                status="in_progress" if work_orders_to_create else "planned",
                 bom_snapshot=bom,
-                work_orders=work_orders_to_create
+                work_orders=work_orders_to_create,
+                started_at=datetime.utcnow() if work_orders_to_create else None,
         )
         
         # Convert the model to a dictionary for MongoDB
-        mo_dict_to_save = new_mo_model.model_dump(by_alias=True, exclude_none=True)
-        
-        # REMOVED: del mo_dict_to_save['_id'] -> This line caused the error
-
-        # Create the document in the database
-        result = self.mo_repo.create(mo_dict_to_save)
-        created_id = str(result.inserted_id)
+        mo_doc = new_mo_model.model_dump(by_alias=True, exclude_none=True)
 
-        # --- AUTOMATION STEP 1: Create and immediately start the process ---
-
-        # Now create the corresponding documents in the 'work_orders' collection
-        first_wo_id = None
+        wo_docs = []
         for wo_model in work_orders_to_create:
-            # The wo_model is a Pydantic model, convert it to a dict
             wo_data = wo_model.model_dump(exclude_none=True)
-            wo_data['mo_id'] = created_id
-            wo_result = self.wo_repo.create(wo_data)
             if wo_data.get("sequence") == 0:
-                first_wo_id = str(wo_result.inserted_id)
+                wo_data["status"] = "in_progress"
+                wo_data["ready_at"] = new_mo_model.started_at
+            wo_docs.append(wo_data)
+        return mo_doc, wo_docs
 
-        # Automatically set the MO and the first WO to 'in_progress'
-        if first_wo_id:
-            self.mo_repo.update(created_id, {"status": "in_progress"})
-            self.wo_repo.update(first_wo_id, {"status": "in_progress"})
-            logs.define_logger(20, f"Automatically started MO {created_id} and first WO {first_wo_id}", loggName=inspect.stack()[0])
-            # Broadcast MO + first WO started
-            ts = datetime.now(timezone.utc).isoformat()
-            await connection_manager.send_to_topic(
-                project_id=created_id,
+    @staticmethod
+    def _operation_name(op: Dict[str, Any]) -> str:
+        return op.get('name', op.get('operation_name', 'Unknown Operation'))
+
+    async def _insert_orders(
+        self, orders: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Writes MOs and all their work orders with one insert_many each.
+
+        Returns:
+            List[Tuple[str, Optional[str]]]: (mo_id, first_wo_id) per input order, in order.
+        """
+        mo_result = await self.mo_repo.create_many([mo_doc for mo_doc, _ in orders])
+        mo_ids = [str(_id) for _id in mo_result.inserted_ids]
+
+        all_wo_docs = []
+        first_wo_index: Dict[int, int] = {}
+        for position, ((_, wo_docs), mo_id) in enumerate(zip(orders, mo_ids)):
+            for wo_data in wo_docs:
+                wo_data["mo_id"] = mo_id
+                if wo_data.get("sequence") == 0:
+                    first_wo_index[position] = len(all_wo_docs)
+                all_wo_docs.append(wo_data)
+
+        wo_ids: List[str] = []
+        if all_wo_docs:
+            wo_result = await self.wo_repo.create_many(all_wo_docs)
+            wo_ids = [str(_id) for _id in wo_result.inserted_ids]
+
+        created = [
+            (mo_id, wo_ids[first_wo_index[position]] if position in first_wo_index else None)
+            for position, mo_id in enumerate(mo_ids)
+        ]
+        for (mo_doc, _), (mo_id, first_wo_id) in zip(orders, created):
+            event_bus.emit_local(MANUFACTURING_ORDERS, "insert", mo_id, mo_doc.get("status"))
+            if first_wo_id:
+                event_bus.emit_local(WORK_ORDERS, "insert", first_wo_id, "in_progress")
+        return created
+
+    def _started_events(self, mo_id: str, first_wo_id: str, ts: str) -> List[Coroutine]:
+        """Builds the websocket broadcasts announcing an auto-started MO and its first WO."""
+        return [
+            connection_manager.send_to_topic(
+                project_id=mo_id,
                 topic="mo_status",
                 data={
                     "event": "manufacturing_order_started",
-                    "mo_id": created_id,
+                    "mo_id": mo_id,
                     "status": "in_progress",
                     "timestamp": ts,
                 },
-            )
-            await connection_manager.send_to_topic(
+            ),
+            connection_manager.send_to_topic(
                 project_id=first_wo_id,
                 topic="wo_status",
                 data={
                     "event": "work_order_auto_started",
-                    "mo_id": created_id,
+                    "mo_id": mo_id,
                     "work_order_id": first_wo_id,
                     "previous_status": "pending",
                     "status": "in_progress",
                     "timestamp": ts,
                 },
-            )
+            ),
+        ]
+
+    async def create_manufacturing_order(self, order_data: ManufacturingOrderCreate) -> Dict[str, Any]:
+        logs.define_logger(20, message="Executing create_manufacturing_order service")
+        
+        # Get BOM for the product
+        bom_data = await self.bom_repo.find_one({"finishedProductId": order_data.product_id})
+        if not bom_data:
+            raise HTTPException(status_code=404, detail="Bill of Materials not found for this product.")
+        
+        # Validate product exists
+        product = await self.product_repo.get_by_id(order_data.product_id)
+
+        # Resolve every operation to its work centre in one (usually cached) lookup
+        operation_names = [self._operation_name(op) for op in bom_data.get("operations", [])]
+        work_centres = await self.wc_repo.find_by_operations(operation_names)
+
+        mo_doc, wo_docs = self._build_order_documents(order_data, bom_data, product, work_centres)
+        [(created_id, first_wo_id)] = await self._insert_orders([(mo_doc, wo_docs)])
+
+        if first_wo_id:
+            logs.define_logger(20, message=f"Automatically started MO {created_id} and first WO {first_wo_id}")
+            # Broadcast MO + first WO started
+            ts = datetime.now(timezone.utc).isoformat()
+            await asyncio.gather(*self._started_events(created_id, first_wo_id, ts))
         
         return {"mo_id": created_id}
 
-    async def get_all_manufacturing_orders(self, status: str | None = None) -> List[Dict[str, Any]]:
-        query = {}
+    async def create_manufacturing_orders_bulk(self, orders: List[ManufacturingOrderCreate]) -> List[Dict[str, Any]]:
+        """
+        Creates many MOs at once. BOMs, products and work centres are fetched
+        once for the whole batch with $in queries, every MO and WO document is
+        built in memory, and both collections are written with one insert_many.
+
+        Returns:
+            List[Dict[str, Any]]: One result per input order, in input order, with
+            either the created mo_id or the reason the order was rejected.
+        """
+        logs.define_logger(20, message=f"Executing bulk create for {len(orders)} manufacturing orders")
+
+        product_ids = list({order.product_id for order in orders})
+        boms = await self.bom_repo.get_all({"finishedProductId": {"$in": product_ids}})
+        bom_by_product: Dict[str, Dict[str, Any]] = {}
+        for bom_data in boms:
+            bom_by_product.setdefault(bom_data["finishedProductId"], bom_data)
+
+        valid_ids = [ObjectId(pid) for pid in product_ids if ObjectId.is_valid(pid)]
+        products = await self.product_repo.get_all({"_id": {"$in": valid_ids}}) if valid_ids else []
+        product_by_id = {product["_id"]: product for product in products}
+
+        operation_names = [
+            self._operation_name(op) for bom_data in bom_by_product.values() for op in bom_data.get("operations", [])
+        ]
+        work_centres = await self.wc_repo.find_by_operations(operation_names)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(orders)
+        to_insert = []
+        positions = []
+        for index, order_data in enumerate(orders):
+            try:
+                to_insert.append(self._build_order_documents(
+                    order_data,
+                    bom_by_product.get(order_data.product_id),
+                    product_by_id.get(order_data.product_id),
+                    work_centres,
+                ))
+                positions.append(index)
+            except HTTPException as he:
+                results[index] = {"index": index, "status": "failed", "status_code": he.status_code, "detail": he.detail}
+
+        if to_insert:
+            created = await self._insert_orders(to_insert)
+            ts = datetime.now(timezone.utc).isoformat()
+            events = []
+            for index, (mo_id, first_wo_id) in zip(positions, created):
+                results[index] = {"index": index, "status": "created", "mo_id": mo_id}
+                if first_wo_id:
+                    events.extend(self._started_events(mo_id, first_wo_id, ts))
+            # Broadcast all start events together rather than one round per MO
+            await asyncio.gather(*events)
+
+        logs.define_logger(20, message=f"Bulk create finished: {len(to_insert)} of {len(orders)} manufacturing orders created")
+        return results
+
+    async def get_all_manufacturing_orders(
+        self, page: PageParams, status: str | None = None, product_id: str | None = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Returns one keyset-paginated page of MOs and the cursor for the next page.
+        """
+        query = page.date_filter()
         if status:
             query["status"] = status
-        orders = self.mo_repo.get_all(query)
-        for order in orders:
-            order["_id"] = str(order["_id"])
-        return orders
+        if product_id:
+            query["product_id"] = product_id
+        return await self.mo_repo.paginate(query, page.limit, page.after, page.sort, page.descending)
 
     async def get_manufacturing_order_by_id(self, mo_id: str) -> Dict[str, Any]:
-        order = self.mo_repo.get_by_id(mo_id)
+        order = await self.mo_repo.get_by_id(mo_id)
         if not order:
             raise HTTPException(status_code=404, detail="Manufacturing Order not found.")
         order["_id"] = str(order["_id"])
         return order
     
     async def delete_manufacturing_order(self, mo_id: str) -> None:
-        order = self.mo_repo.get_by_id(mo_id)
+        order = await self.mo_repo.get_by_id(mo_id)
         if not order:
             raise HTTPException(status_code=404, detail="Manufacturing Order not found.")
         
         if order.get("status") in ["in_progress", "done"]:
             raise HTTPException(status_code=400, detail="Cannot delete an order that is in progress or completed.")
         
-        self.mo_repo.delete(mo_id)
+        await self.mo_repo.delete(mo_id)
         return
 
     async def complete_manufacturing_order(self, mo_id: str) -> Dict[str, Any]:
         """
         Complete a manufacturing order and automatically update inventory.
         """
-        logs.define_logger(20, f"Completing manufacturing order: {mo_id}", loggName=inspect.stack()[0])
+        logs.define_logger(20, message=f"Completing manufacturing order: {mo_id}")
         
         # Get the manufacturing order
-        order = self.mo_repo.get_by_id(mo_id)
+        order = await self.mo_repo.get_by_id(mo_id)
         if not order:
             raise HTTPException(status_code=404, detail="Manufacturing Order not found.")
         
@@ -178,41 +301,65 @@ class ManufacturingOrderService:
         bom_snapshot = order.get("bom_snapshot", {})
         quantity_to_produce = order.get("quantity_to_produce", 0)
         
-        # Create stock ledger entries for component consumption (negative entries)
+        # Build every ledger entry up front: negative entries for component
+        # consumption, then one positive entry for the finished product. Each
+        # has a key derived from the MO, so writing them again is a no-op.
         ledger_entries = []
         for component in bom_snapshot.get("components", []):
-            component_id = component.get("productId")
-            component_qty = component.get("quantity", 0)
-            total_consumption = component_qty * quantity_to_produce
-            
-            # Create negative entry for component consumption
-            consumption_entry = StockLedgerEntryCreate(
-                product_id=component_id,
-                quantity_change=-total_consumption,
-                reason=f"Consumption for MO-{mo_id}",
-                manufacturing_order_id=mo_id
+            total_consumption = component.get("quantity", 0) * quantity_to_produce
+            ledger_entries.append({
+                "product_id": component.get("productId"),
+                "quantity_change": -total_consumption,
+                "reason": f"Consumption for MO-{mo_id}",
+                "manufacturing_order_id": mo_id,
+            })
+        ledger_entries.append({
+            "product_id": bom_snapshot.get("product_id"),
+            "quantity_change": quantity_to_produce,
+            "reason": f"Production from MO-{mo_id}",
+            "manufacturing_order_id": mo_id,
+        })
+        for index, entry in enumerate(ledger_entries):
+            entry["entry_key"] = f"{mo_id}:{index}"
+
+        # A retry after an interrupted completion reuses the pinned time, so the
+        # order lands in the same rollup day
+        completed_at = order.get("completed_at") or datetime.utcnow()
+        cycle_ms = (completed_at - order["created_at"]).total_seconds() * 1000 if order.get("created_at") else 0
+
+        async def commit_completion(session):
+            # Without a transaction (standalone mongod) each write below stands
+            # alone, so every one is idempotent and the status flips last: if
+            # anything fails the MO stays 'in_progress' and completing it again
+            # finishes the job without counting anything twice.
+            pinned = await self.mo_repo.update_where(
+                {"_id": ObjectId(mo_id), "status": "in_progress"},
+                {"completed_at": completed_at},
+                session=session,
             )
-            ledger_entries.append(consumption_entry.model_dump())
-        
-        # Create stock ledger entry for finished product (positive entry)
-        production_entry = StockLedgerEntryCreate(
-            product_id=bom_snapshot.get("product_id"),
-            quantity_change=quantity_to_produce,
-            reason=f"Production from MO-{mo_id}",
-            manufacturing_order_id=mo_id
-        )
-        ledger_entries.append(production_entry.model_dump())
-        
-        # Insert all ledger entries
-        for entry in ledger_entries:
-            if "_id" in entry and entry["_id"] is None:
-                del entry["_id"]
-            self.stock_repo.create(entry)
-        
-        # Update MO status to done
-        self.mo_repo.update(mo_id, {"status": "done"})
+            if pinned.matched_count == 0:
+                raise HTTPException(status_code=400, detail="Manufacturing Order is already completed.")
+            await self.stock_repo.create_many_once(ledger_entries, session=session)
+            # Keep the stock balance projection in step with the ledger
+            await self.balance_repo.apply_changes(ledger_entries, session=session, key=mo_id)
+            # Fold the order into the daily production rollup read by analytics
+            await self.rollup_repo.record_completion(order.get("product_id"), completed_at, cycle_ms, session=session, key=mo_id)
+            # The status flip is a compare-and-set on 'in_progress', so of two
+            # concurrent completions only one reports success.
+            result = await self.mo_repo.update_where(
+                {"_id": ObjectId(mo_id), "status": "in_progress"},
+                {"status": "done"},
+                session=session,
+            )
+            if result.matched_count == 0:
+                raise HTTPException(status_code=400, detail="Manufacturing Order is already completed.")
+
+        # One bulk ledger insert and the MO status change, committed atomically
+        # where transactions are available
+        await run_in_transaction(self.db, commit_completion)
+        event_bus.emit_local(MANUFACTURING_ORDERS, "update", mo_id, "done")
         
-        logs.define_logger(20, f"Manufacturing order {mo_id} completed successfully", loggName=inspect.stack()[0])
+        logs.define_logger(20, message=f"Manufacturing order {mo_id} completed successfully")
         # Broadcast MO completion
         ts = datetime.now(timezone.utc).isoformat()
         await connection_manager.send_to_topic(
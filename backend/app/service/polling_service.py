@@ -1,59 +1,209 @@
 import asyncio
-import inspect
+import random
+import time
 from app.core.logger import logs
-from typing import List, Callable, Coroutine
+from app.core.settings import settings
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+class _ScheduledTask:
+    """Book-keeping for one registered periodic task."""
+    def __init__(self, task: Callable[[], Coroutine], interval: float, jitter: float, on_free_slot: bool = False):
+        self.task = task
+        self.on_free_slot = on_free_slot
+        self.name = task.__name__
+        self.interval = interval
+        self.jitter = jitter
+        self.runs = 0
+        self.failures = 0
+        self.last_started: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        # Set by PollingService.trigger to cut the wait before the next run short
+        self.wakeup = asyncio.Event()
+
+    def next_delay(self) -> float:
+        """The interval with +/- jitter applied, so replicas do not poll in lockstep."""
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
 
 class PollingService:
     """
-    Manages a background task that periodically runs a list of registered jobs.
+    Runs registered periodic tasks and a bounded pool of background jobs.
+
+    Each task gets its own loop with its own interval and jitter. A task run is
+    awaited before its next run is scheduled, so runs of one task never overlap.
+    Tasks should stay short and hand long work to `submit`, which queues it for
+    a fixed number of workers; polling keeps going while jobs run.
     """
-    def __init__(self, interval_seconds: int = 60):
-        self._task = None
+    def __init__(self, interval_seconds: int = 60, max_concurrency: int = 10, jitter: float = 0.1):
         self._is_running = False
         self.interval = interval_seconds
-        # This will hold all the functions we want to run on each interval
-        self.tasks_to_run: List[Callable[[], Coroutine]] = []
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        # This will hold all the tasks we want to run periodically
+        self.tasks_to_run: List[_ScheduledTask] = []
+        self._runners: List[asyncio.Task] = []
+        self._workers: List[asyncio.Task] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._active_jobs = 0
+        self._reserved = 0
 
-    def register_task(self, task: Callable[[], Coroutine]):
+    def register_task(
+        self, task: Callable[[], Coroutine], interval_seconds: float = None, jitter: float = None, on_free_slot: bool = False
+    ):
         """
         Allows other parts of the application to register a task to be run by the poller.
-        A task must be an async function that takes no arguments.
+        A task must be an async function that takes no arguments. It runs every
+        `interval_seconds` (defaults to the service interval). With `on_free_slot`
+        it also runs as soon as a full worker pool frees a slot, for tasks that
+        feed the pool and had to leave work behind while it was full.
+        """
+        entry = _ScheduledTask(
+            task,
+            interval_seconds if interval_seconds is not None else self.interval,
+            jitter if jitter is not None else self.jitter,
+            on_free_slot,
+        )
+        self.tasks_to_run.append(entry)
+        if self._is_running:
+            self._runners.append(asyncio.create_task(self._task_runner(entry)))
+        logs.define_logger(20, message=f"Task '{entry.name}' registered with polling service (every {entry.interval}s).")
+
+    def trigger(self, task: Callable[[], Coroutine]) -> bool:
+        """
+        Asks the loop of a registered task to run it now instead of waiting for
+        its next interval. A run already in progress is not interrupted; the task
+        runs again right after it, so runs of one task still never overlap.
+        Returns False if the task is not registered.
         """
-        self.tasks_to_run.append(task)
-        logs.define_logger(20, f"Task '{task.__name__}' registered with polling service.", loggName=inspect.stack()[0])
+        for entry in self.tasks_to_run:
+            if entry.task == task:
+                entry.wakeup.set()
+                return True
+        return False
+
+    def submit(self, job: Callable[[], Coroutine], reserved: bool = False) -> None:
+        """
+        Queues a job for the worker pool. At most `max_concurrency` jobs run at once.
+        Pass `reserved=True` when submitting into a slot taken with `reserve_slot`.
+        """
+        if reserved:
+            self.release_slot()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait(job)
+
+    def reserve_slot(self) -> bool:
+        """
+        Takes a free worker slot before doing async work (such as claiming a job)
+        that will end in a `submit`, so concurrent callers cannot all pass the
+        same `available_slots` check. Returns False if the pool is full. The slot
+        must be handed back with `submit(..., reserved=True)` or `release_slot`.
+        """
+        if self.available_slots <= 0:
+            return False
+        self._reserved += 1
+        return True
+
+    def release_slot(self) -> None:
+        """Hands back a slot taken with `reserve_slot` that will not be used."""
+        self._reserved = max(0, self._reserved - 1)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted jobs waiting for a free worker."""
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def available_slots(self) -> int:
+        """How many more jobs can be submitted without waiting in the queue."""
+        return max(0, self.max_concurrency - self._active_jobs - self.queue_depth - self._reserved)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns scheduler and worker pool metrics."""
+        return {
+            "running": self._is_running,
+            "queue_depth": self.queue_depth,
+            "active_jobs": self._active_jobs,
+            "reserved_slots": self._reserved,
+            "max_concurrency": self.max_concurrency,
+            "tasks": {
+                entry.name: {
+                    "interval_seconds": entry.interval,
+                    "runs": entry.runs,
+                    "failures": entry.failures,
+                    "last_duration_seconds": entry.last_duration,
+                }
+                for entry in self.tasks_to_run
+            },
+        }
 
     async def start_polling(self):
-        """Starts the background polling task."""
+        """Starts one loop per registered task and the job workers."""
         if not self._is_running:
             self._is_running = True
-            self._task = asyncio.create_task(self._poll_runner())
-            logs.define_logger(20, "Database polling service started.", loggName=inspect.stack()[0])
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+            self._runners = [asyncio.create_task(self._task_runner(entry)) for entry in self.tasks_to_run]
+            logs.define_logger(20, message=f"Database polling service started with {self.max_concurrency} workers.")
 
     async def stop_polling(self):
-        """Stops the background polling task gracefully."""
-        if self._is_running and self._task:
+        """Stops the task loops and workers gracefully, cancelling in-flight jobs."""
+        if self._is_running:
             self._is_running = False
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                logs.define_logger(20, "Database polling service stopped.", loggName=inspect.stack()[0])
+            background = self._runners + self._workers
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            self._runners, self._workers = [], []
+            logs.define_logger(20, message="Database polling service stopped.")
 
-    async def _poll_runner(self):
+    async def _task_runner(self, entry: _ScheduledTask):
         """
-        The core polling loop. It now iterates through and runs all registered tasks.
+        The polling loop for a single task.
         """
         while self._is_running:
+            entry.wakeup.clear()
+            entry.last_started = time.monotonic()
             try:
-                # Run all registered tasks concurrently
-                tasks = [task() for task in self.tasks_to_run]
-                await asyncio.gather(*tasks)
-                
+                await entry.task()
+                entry.runs += 1
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logs.define_logger(50, f"An error occurred during polling run: {e}", loggName=inspect.stack()[0])
-            
-            await asyncio.sleep(self.interval)
+                entry.failures += 1
+                logs.define_logger(50, message=f"An error occurred during polling run of '{entry.name}': {e}")
+            entry.last_duration = time.monotonic() - entry.last_started
 
-# Create a single instance to be used throughout the application
-polling_service = PollingService(interval_seconds=30)
+            try:
+                await asyncio.wait_for(entry.wakeup.wait(), entry.next_delay())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        """Pulls jobs off the queue and runs them one at a time."""
+        while True:
+            job = await self._queue.get()
+            self._active_jobs += 1
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logs.define_logger(40, message=f"Background job failed: {e}")
+            finally:
+                was_full = self.available_slots == 0
+                self._active_jobs -= 1
+                self._queue.task_done()
+                if was_full and self.available_slots > 0:
+                    for entry in self.tasks_to_run:
+                        if entry.on_free_slot:
+                            entry.wakeup.set()
 
+# Create a single instance to be used throughout the application
+polling_service = PollingService(
+    interval_seconds=30,
+    max_concurrency=settings.POLLING_MAX_CONCURRENCY,
+    jitter=settings.POLLING_JITTER,
+)
@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import HTTPException
+from pymongo.asynchronous.database import AsyncDatabase
+from app.core.logger import logs
+from app.models.analytics_model import TimeSeries, TimeSeriesPoint
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Window used when the caller gives no start.
+DEFAULT_WINDOWS = {
+    "hour": timedelta(hours=48),
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=26),
+    "month": timedelta(days=365),
+}
+
+# Upper bound on buckets per request, so a tiny granularity over a long window
+# cannot produce an unbounded response.
+MAX_BUCKETS = 2000
+
+# Each series: the collection it reads, the timestamp it buckets on, a fixed
+# filter, the value summed per bucket (1 counts documents) and the fields the
+# product and work-centre filters apply to. Every (filter, time field) pair
+# used here is covered by an index declared on the collection's repository.
+SERIES: Dict[str, Dict[str, Any]] = {
+    "mo_created": {
+        "collection": "manufacturing_orders",
+        "time_field": "created_at",
+        "match": {},
+        "value": 1,
+        "product_field": "product_id",
+    },
+    "mo_completed": {
+        "collection": "manufacturing_orders",
+        "time_field": "completed_at",
+        "match": {"status": "done"},
+        "value": 1,
+        "product_field": "product_id",
+    },
+    "quantity_completed": {
+        "collection": "manufacturing_orders",
+        "time_field": "completed_at",
+        "match": {"status": "done"},
+        "value": "$quantity_to_produce",
+        "product_field": "product_id",
+    },
+    "wo_completed": {
+        "collection": "work_orders",
+        "time_field": "completed_at",
+        "match": {"status": "done"},
+        "value": 1,
+        "work_centre_field": "work_center_id",
+    },
+    "stock_movement": {
+        "collection": "ledger",
+        "time_field": "created_at",
+        "match": {},
+        "value": "$quantity_change",
+        "product_field": "product_id",
+    },
+}
+
+
+def _truncate(ts: datetime, unit: str) -> datetime:
+    """Local-time equivalent of $dateTrunc (weeks start on Monday)."""
+    if unit == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "day":
+        return day
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _advance(ts: datetime, unit: str) -> datetime:
+    """Start of the next bucket. Days and longer step in wall-clock time, so
+    buckets stay on local midnight across DST changes."""
+    if unit == "hour":
+        return (ts.astimezone(timezone.utc) + timedelta(hours=1)).astimezone(ts.tzinfo)
+    if unit == "day":
+        return ts + timedelta(days=1)
+    if unit == "week":
+        return ts + timedelta(weeks=1)
+    if ts.month == 12:
+        return ts.replace(year=ts.year + 1, month=1)
+    return ts.replace(month=ts.month + 1)
+
+
+def _to_utc_naive(ts: datetime) -> datetime:
+    """MongoDB returns naive UTC datetimes; timestamps are compared in that form."""
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class TimeSeriesService:
+    """
+    Builds time-bucketed series over manufacturing orders, work orders and the
+    ledger. Documents in the window are selected by an indexed $match and
+    grouped by $dateTrunc in the requested granularity and timezone; buckets
+    with no documents are filled with 0 before the series is returned.
+    """
+    def __init__(self, db: AsyncDatabase):
+        self.db = db
+
+    async def get_series(
+        self,
+        series: str,
+        granularity: str = "day",
+        tz: str = "UTC",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        product_id: Optional[str] = None,
+        work_centre_id: Optional[str] = None,
+    ) -> TimeSeries:
+        spec = SERIES.get(series)
+        if spec is None:
+            raise HTTPException(status_code=400, detail=f"Unknown series '{series}'. Choose from: {', '.join(SERIES)}.")
+        if granularity not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"Granularity must be one of: {', '.join(GRANULARITIES)}.")
+        try:
+            zone = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown timezone '{tz}'.")
+
+        end_utc = _to_utc_naive(end) if end else datetime.utcnow()
+        start_utc = _to_utc_naive(start) if start else end_utc - DEFAULT_WINDOWS[granularity]
+        if start_utc >= end_utc:
+            raise HTTPException(status_code=400, detail="The window start must be before its end.")
+
+        buckets = self._bucket_starts(start_utc, end_utc, granularity, zone)
+        if len(buckets) > MAX_BUCKETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"The window spans more than {MAX_BUCKETS} {granularity}s; narrow it or use a coarser granularity.",
+            )
+
+        # The first bucket may start before `start`; include it whole so its total is right.
+        match: Dict[str, Any] = {
+            **spec["match"],
+            spec["time_field"]: {"$gte": _to_utc_naive(buckets[0]), "$lt": end_utc},
+        }
+        if product_id:
+            if "product_field" not in spec:
+                raise HTTPException(status_code=400, detail=f"Series '{series}' cannot be filtered by product.")
+            match[spec["product_field"]] = product_id
+        if work_centre_id:
+            if "work_centre_field" not in spec:
+                raise HTTPException(status_code=400, detail=f"Series '{series}' cannot be filtered by work centre.")
+            match[spec["work_centre_field"]] = work_centre_id
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"$dateTrunc": {
+                    "date": f"${spec['time_field']}",
+                    "unit": granularity,
+                    "timezone": tz,
+                    "startOfWeek": "monday",
+                }},
+                "value": {"$sum": spec["value"]},
+            }},
+        ]
+        logs.define_logger(20, message=f"Building '{series}' series by {granularity} ({tz}) with {len(buckets)} buckets.")
+        cursor = await self.db[spec["collection"]].aggregate(pipeline)
+        values = {doc["_id"]: doc["value"] for doc in await cursor.to_list()}
+
+        points: List[TimeSeriesPoint] = [
+            TimeSeriesPoint(bucket=bucket, value=values.get(_to_utc_naive(bucket), 0))
+            for bucket in buckets
+        ]
+        return TimeSeries(
+            series=series,
+            granularity=granularity,
+            timezone=tz,
+            start=buckets[0],
+            end=end_utc.replace(tzinfo=timezone.utc).astimezone(zone),
+            points=points,
+        )
+
+    @staticmethod
+    def _bucket_starts(start_utc: datetime, end_utc: datetime, unit: str, zone: ZoneInfo) -> List[datetime]:
+        """Every bucket start (in `zone`) whose bucket overlaps [start, end)."""
+        # Compared in UTC: aware datetimes sharing a zone compare by wall clock,
+        # which cannot order the repeated hour when clocks go back
+        end = end_utc.replace(tzinfo=timezone.utc)
+        bucket = _truncate(start_utc.replace(tzinfo=timezone.utc).astimezone(zone), unit)
+        starts = []
+        while bucket.astimezone(timezone.utc) < end and len(starts) <= MAX_BUCKETS:
+            starts.append(bucket)
+            bucket = _advance(bucket, unit)
+        return starts
@@ -1,27 +1,28 @@
 # app/users/user_service.py
 
-import inspect
 from bson import ObjectId
 from datetime import timedelta
 from app.core.logger import logs
-from app.core.auth import create_access_token, get_password_hash, verify_password
+from fastapi import HTTPException
+from app.core.auth import create_access_token, hash_password, verify_and_update_password
+from app.core.security import user_cache
 from app.utils.response_model import response
-from app.repo.user_repo import UserRepository, get_user_repo 
+from app.repo.user_repo import AsyncUserRepository, get_async_user_repo
 from app.models.user_model import CreateUserSchema, UserResponseSchema, UserRole, UserLogin, Token
 
 class UserService:
-    def __init__(self, repo: UserRepository):
+    def __init__(self, repo: AsyncUserRepository):
         self.repo = repo
 
-    def create_user(self, data: CreateUserSchema):
+    async def create_user(self, data: CreateUserSchema):
         try:
             # 1. Check if user already exists in our DB
-            existing_user = self.repo.get_by_email(data.email)
+            existing_user = await self.repo.get_by_email(data.email)
             if existing_user:
                 return response.failure("A user with this email already exists.", status_code=400)
 
-            # 2. Hash the password
-            hashed_password = get_password_hash(data.password)
+            # 2. Hash the password (on the bcrypt pool; raises 503 when saturated)
+            hashed_password = await hash_password(data.password)
 
             # 3. Store user in our MongoDB database
             user_data = {
@@ -30,45 +31,59 @@ class UserService:
                 "hashed_password": hashed_password
             }
             
-            result = self.repo.create(user_data)
+            result = await self.repo.create(user_data)
             new_id = result.inserted_id
             
-            logs.define_logger(level=20, loggName=inspect.stack()[0], message=f"Successfully created user with ID: {new_id}")
+            logs.define_logger(level=20, message=f"Successfully created user with ID: {new_id}")
             return response.success(data={"id": str(new_id)}, message="User created successfully", status_code=201)
 
+        except HTTPException:
+            raise
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error creating user: {e}", body=data.model_dump_json(exclude={'password'}))
+            logs.define_logger(level=40, message=f"Error creating user: {e}", body=data.model_dump_json(exclude={'password'}))
             return response.failure(message=f"Failed to create user: {e}", status_code=500)
 
-    def authenticate_user(self, email: str, password: str):
+    async def authenticate_user(self, email: str, password: str):
         """
         Authenticate a user by email and password.
         Returns user data if successful, None if authentication fails.
+        A hash made with an outdated bcrypt cost is replaced transparently.
         """
         try:
-            user = self.repo.get_by_email(email)
+            user = await self.repo.get_by_email(email)
             if not user:
                 return None
             
-            if not verify_password(password, user["hashed_password"]):
+            valid, new_hash = await verify_and_update_password(password, user["hashed_password"])
+            if not valid:
                 return None
+
+            if new_hash:
+                await self.repo.update(str(user["_id"]), {"hashed_password": new_hash})
+                user_cache.invalidate(str(user["_id"]))
+                user["hashed_password"] = new_hash
+                logs.define_logger(level=20, message=f"Rehashed password for user {user['_id']} with the current bcrypt cost")
             
             return user
+        except HTTPException:
+            raise
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error authenticating user: {e}")
+            logs.define_logger(level=40, message=f"Error authenticating user: {e}")
             return None
 
-    def login_user(self, data: UserLogin):
+    async def login_user(self, data: UserLogin):
         try:
             # Authenticate the user
-            user = self.authenticate_user(data.email, data.password)
+            user = await self.authenticate_user(data.email, data.password)
             if not user:
                 return response.failure("Incorrect email or password", status_code=401)
 
             # Create access token
             access_token_expires = timedelta(minutes=60 * 24 * 8)  # 8 days
             access_token = create_access_token(
-                subject=str(user["_id"]), expires_delta=access_token_expires
+                subject=str(user["_id"]),
+                expires_delta=access_token_expires,
+                claims={"role": user["role"]},
             )
 
             # Return token and user data
@@ -83,16 +98,18 @@ class UserService:
                 status_code=200
             )
 
+        except HTTPException:
+            raise
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error logging in user: {e}")
+            logs.define_logger(level=40, message=f"Error logging in user: {e}")
             return response.failure(message=f"Login failed: {e}", status_code=500)
 
-    def get_user_by_id(self, item_id: str):
+    async def get_user_by_id(self, item_id: str):
         if not ObjectId.is_valid(item_id):
             return response.failure(message="Invalid user ID format", status_code=400)
 
         try:
-            user_doc = self.repo.get_by_id(item_id)
+            user_doc = await self.repo.get_by_id(item_id)
             if user_doc:
                 # Use the response schema to ensure the password hash is NOT returned
                 validated_data = UserResponseSchema.model_validate(user_doc)
@@ -100,9 +117,9 @@ class UserService:
             else:
                 return response.failure(message="User not found", status_code=404)
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error retrieving user {item_id}: {e}")
+            logs.define_logger(level=40, message=f"Error retrieving user {item_id}: {e}")
             return response.failure(message=f"An error occurred: {e}", status_code=500)
 
 def get_user_service() -> UserService:
-    repo = get_user_repo()
+    repo = get_async_user_repo()
     return UserService(repo)
\ No newline at end of file
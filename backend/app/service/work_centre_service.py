@@ -1,9 +1,8 @@
-import inspect
 from datetime import datetime, timezone
 from bson import ObjectId
 from app.core.logger import logs
 from app.utils.response_model import response
-from app.repo.work_centre_repo import WorkCentreRepository, get_work_centre_repo
+from app.repo.work_centre_repo import WorkCentreRepository, get_work_centre_repo, work_centre_cache
 from app.models.work_centre_model import CreateWorkCentreSchema, WorkCentreResponseSchema
 
 class WorkCentreService:
@@ -23,12 +22,13 @@ class WorkCentreService:
 
             result = self.repo.create(work_centre_data)
             new_id = result.inserted_id
+            work_centre_cache.invalidate(data.operation)
             
-            logs.define_logger(level=20, loggName=inspect.stack()[0], message=f"Successfully created work centre with ID: {new_id}")
+            logs.define_logger(level=20, message=f"Successfully created work centre with ID: {new_id}")
             return {"id": str(new_id)}
 
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error creating work centre: {e}", body=data.model_dump_json())
+            logs.define_logger(level=40, message=f"Error creating work centre: {e}", body=data.model_dump_json())
             raise e
 
     def get_all_work_centres(self):
@@ -41,7 +41,7 @@ class WorkCentreService:
             ]
             return results
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error retrieving all work centres: {e}")
+            logs.define_logger(level=40, message=f"Error retrieving all work centres: {e}")
             raise e
 
     def get_work_centre_by_id(self, item_id: str):
@@ -56,7 +56,7 @@ class WorkCentreService:
                 return validated_data.model_dump(by_alias=True)
             return None
         except Exception as e:
-            logs.define_logger(level=40, loggName=inspect.stack()[0], message=f"Error retrieving work centre {item_id}: {e}")
+            logs.define_logger(level=40, message=f"Error retrieving work centre {item_id}: {e}")
             raise e
 
 
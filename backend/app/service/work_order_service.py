@@ -1,51 +1,49 @@
 # app/services/wo_service.py
 
-import inspect
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 
 from fastapi import HTTPException, status, Request # Import Request
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 
 # Correct the import paths according to your project structure
-from ..repo.work_order_repo import WorkOrderRepository
-from ..repo.manufacture_repo import ManufacturingOrderRepository
+from ..repo.work_order_repo import AsyncWorkOrderRepository
+from ..repo.manufacture_repo import AsyncManufacturingOrderRepository
 from ..service.manufacture_service import ManufacturingOrderService 
 from ..core.logger import logs 
 from ..utils.websocket_manager import connection_manager
+from ..utils.event_bus import event_bus, WORK_ORDERS
+from ..utils.pagination import PageParams
 
 class WorkOrderService:
     """
     Handles business logic for Work Orders, including the trigger for completing a
     Manufacturing Order.
     """
-    def __init__(self, db: Database):
-        self.wo_repo = WorkOrderRepository(db)
-        self.mo_repo = ManufacturingOrderRepository(db)
+    def __init__(self, db: AsyncDatabase):
+        self.wo_repo = AsyncWorkOrderRepository(db)
+        self.mo_repo = AsyncManufacturingOrderRepository(db)
         self.mo_service = ManufacturingOrderService(db)
 
-    def get_work_orders(self, mo_id: str = None) -> List[Dict[str, Any]]:
+    async def get_work_orders(
+        self, page: PageParams, mo_id: str = None, status: str = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Retrieves work orders. If mo_id is provided, it fetches work orders for
-        that specific manufacturing order, sorted by sequence. Otherwise, it
-        fetches all work orders.
+        Retrieves one keyset-paginated page of work orders, optionally filtered
+        by `mo_id` and `status`, plus the cursor for the next page.
+        Work orders of an MO are created in sequence, so the default `_id`
+        ordering also follows their sequence.
         """
+        logs.define_logger(
+            level=20,
+            message=f"Fetching work orders (mo_id={mo_id}, status={status})"
+        )
+        query = page.date_filter()
         if mo_id:
-            logs.define_logger(
-                level=20,
-                message=f"Fetching work orders for MO ID: {mo_id}",
-                loggName=inspect.stack()[0]
-            )
-            # find_by_mo_id already sorts by sequence
-            return self.wo_repo.find_by_mo_id(mo_id)
-        else:
-            logs.define_logger(
-                level=20,
-                message="Fetching all work orders",
-                loggName=inspect.stack()[0]
-            )
-            # get_all does not sort, which is fine for a general listing.
-            return self.wo_repo.get_all()
+            query["mo_id"] = mo_id
+        if status:
+            query["status"] = status
+        return await self.wo_repo.paginate(query, page.limit, page.after, page.sort, page.descending)
 
     async def update_work_order_status(self, wo_id: str, new_status: str, request: Request = None) -> Dict[str, Any]:
         """
@@ -55,12 +53,11 @@ class WorkOrderService:
         logs.define_logger(
             level=20,
             message=f"Updating WO {wo_id} to status '{new_status}'",
-            loggName=inspect.stack()[0],
             request=request
         )
 
         # 1. Validate and fetch the Work Order
-        work_order = self.wo_repo.get_by_id(wo_id)
+        work_order = await self.wo_repo.get_by_id(wo_id)
         if not work_order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Work Order {wo_id} not found.")
 
@@ -70,7 +67,17 @@ class WorkOrderService:
 
         # 2. Update the status
         prev_status = work_order.get("status")
-        self.wo_repo.update(wo_id, {"status": new_status})
+        # Transition timestamps feed the work centre queue/busy time analytics
+        now = datetime.utcnow()
+        update_data: Dict[str, Any] = {"status": new_status}
+        if new_status == "in_progress" and not work_order.get("ready_at"):
+            update_data["ready_at"] = now
+        elif new_status == "processing" and not work_order.get("started_at"):
+            update_data["started_at"] = now
+        elif new_status == "done":
+            update_data["completed_at"] = now
+        await self.wo_repo.update(wo_id, update_data)
+        event_bus.emit_local(WORK_ORDERS, "update", wo_id, new_status)
 
         # Broadcast WO status change
         mo_id = work_order["mo_id"]
@@ -104,14 +111,13 @@ class WorkOrderService:
         # 3. If WO is done, automate the next step
         if new_status == "done":
             mo_id = work_order["mo_id"]
-            all_wos_for_mo = self.wo_repo.find_by_mo_id(mo_id)
+            all_wos_for_mo = await self.wo_repo.find_by_mo_id(mo_id)
             
             # First, check if all work orders for the MO are now complete
             if all(wo.get("status") == "done" for wo in all_wos_for_mo):
                 logs.define_logger(
                     level=20,
                     message=f"All WOs for MO {mo_id} are done. Triggering MO completion.",
-                    loggName=inspect.stack()[0],
                     request=request
                 )
                 await self.mo_service.complete_manufacturing_order(mo_id)
@@ -130,11 +136,11 @@ class WorkOrderService:
                     next_wo = all_wos_for_mo[completed_wo_index + 1]
                     if next_wo.get("status") == "pending":
                         next_wo_id = str(next_wo["_id"])
-                        self.wo_repo.update(next_wo_id, {"status": "in_progress"})
+                        await self.wo_repo.update(next_wo_id, {"status": "in_progress", "ready_at": datetime.utcnow()})
+                        event_bus.emit_local(WORK_ORDERS, "update", next_wo_id, "in_progress")
                         logs.define_logger(
                             level=20,
                             message=f"WO {wo_id} completed. Automatically starting next WO {next_wo_id}.",
-                            loggName=inspect.stack()[0],
                             request=request
                         )
                         # Broadcast auto-start of next WO
@@ -167,4 +173,4 @@ class WorkOrderService:
 
         # For any other status update, or if no further automation was triggered,
         # return the updated work order.
-        return self.wo_repo.get_by_id(wo_id)
\ No newline at end of file
+        return await self.wo_repo.get_by_id(wo_id)
\ No newline at end of file
@@ -0,0 +1,62 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Set
+from app.core.logger import logs
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Topics published for status changes, named after the collections they describe.
+WORK_ORDERS = "work_orders"
+MANUFACTURING_ORDERS = "manufacturing_orders"
+
+
+class EventBus:
+    """
+    A small in-process publish/subscribe bus for document change events.
+
+    Events have the shape {"collection", "operation", "id", "status"}. When the
+    change stream watcher is running it is the only publisher; services report
+    their own writes through `emit_local`, which only publishes while change
+    streams are unavailable (e.g. a standalone mongod), so every change is
+    delivered once either way.
+    """
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._pending: Set[asyncio.Task] = set()
+        self.change_streams_active = False
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Registers an async handler for events on `topic`."""
+        self._handlers[topic].append(handler)
+
+    def unsubscribe(self, topic: str, handler: Handler) -> None:
+        """Removes a handler registered with `subscribe`, if present."""
+        if handler in self._handlers.get(topic, []):
+            self._handlers[topic].remove(handler)
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        """
+        Hands the event to every handler of `topic` without waiting for them.
+        A failing handler is logged and does not affect the others.
+        """
+        for handler in list(self._handlers.get(topic, [])):
+            task = asyncio.create_task(self._dispatch(handler, event))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def emit_local(self, collection: str, operation: str, doc_id: str, status: str = None) -> None:
+        """
+        Publishes a change made by this process, unless change streams will report it.
+        """
+        if self.change_streams_active:
+            return
+        self.publish(collection, {"collection": collection, "operation": operation, "id": doc_id, "status": status})
+
+    async def _dispatch(self, handler: Handler, event: Dict[str, Any]) -> None:
+        try:
+            await handler(event)
+        except Exception as e:
+            logs.define_logger(40, message=f"Event handler {getattr(handler, '__name__', handler)} failed: {e}")
+
+# Create a single instance to be used throughout the application
+event_bus = EventBus()
@@ -0,0 +1,98 @@
+import base64
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, Query, status
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """
+    Encodes the sort key of the last document on a page into an opaque token.
+    bson's extended JSON keeps ObjectId and datetime values round-trippable.
+    """
+    raw = json_util.dumps({"v": sort_value, "id": doc_id})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str) -> Tuple[Any, Any]:
+    """
+    Decodes a token produced by encode_cursor back into (sort_value, _id).
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return payload["v"], payload["id"]
+    except Exception as e:
+        raise ValueError(f"Invalid pagination cursor: {e}")
+
+
+def keyset_filter(sort_field: str, after_value: Any, after_id: Any, descending: bool = False) -> Dict[str, Any]:
+    """
+    The filter for documents that come after (after_value, after_id) when
+    sorting on sort_field then _id. MongoDB sorts null and missing values
+    before everything else, and $gt/$lt never match across them, so they are
+    handled explicitly: ascending, they are all behind a non-null cursor;
+    descending, they all come after it.
+    """
+    op = "$lt" if descending else "$gt"
+    if sort_field == "_id":
+        return {"_id": {op: after_id}}
+    same_value = {sort_field: after_value, "_id": {op: after_id}}
+    if after_value is None:
+        if descending:
+            return same_value
+        return {"$or": [same_value, {sort_field: {"$ne": None}}]}
+    branches = [{sort_field: {op: after_value}}, same_value]
+    if descending:
+        branches.append({sort_field: None})
+    return {"$or": branches}
+
+
+class DateRangeParams:
+    """
+    FastAPI dependency for the created_from/created_to date-range query parameters.
+    """
+    def __init__(
+        self,
+        created_from: Optional[datetime] = Query(None, description="Only include items created at or after this time"),
+        created_to: Optional[datetime] = Query(None, description="Only include items created before this time"),
+    ):
+        self.created_from = created_from
+        self.created_to = created_to
+
+    def date_filter(self, field: str = "created_at") -> Dict[str, Any]:
+        """Returns the MongoDB filter for the requested date range, if any."""
+        bounds = {}
+        if self.created_from:
+            bounds["$gte"] = self.created_from
+        if self.created_to:
+            bounds["$lt"] = self.created_to
+        return {field: bounds} if bounds else {}
+
+
+class PageParams(DateRangeParams):
+    """
+    FastAPI dependency bundling keyset pagination and date-range query parameters.
+    """
+    def __init__(
+        self,
+        limit: int = Query(50, ge=1, le=500, description="Maximum number of items to return"),
+        after: Optional[str] = Query(None, description="next_cursor token from the previous page"),
+        sort: Literal["_id", "created_at"] = Query("_id", description="Field to order the results by"),
+        order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+        created_from: Optional[datetime] = Query(None, description="Only include items created at or after this time"),
+        created_to: Optional[datetime] = Query(None, description="Only include items created before this time"),
+    ):
+        super().__init__(created_from, created_to)
+        self.limit = limit
+        self.sort = sort
+        self.descending = order == "desc"
+        self.after = None
+        if after:
+            try:
+                self.after = decode_cursor(after)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -8,6 +8,16 @@ class Response:
             "status_code": status_code
         }
     
+    @staticmethod
+    def paginated(data, next_cursor, message: str = "Request successful", status_code: int = 200):
+        return {
+            "status": "success",
+            "message": message,
+            "data": data,
+            "next_cursor": next_cursor,
+            "status_code": status_code
+        }
+
     @staticmethod
     def failure(message: str, status_code: int = 400, error_details: dict = None):
         return {
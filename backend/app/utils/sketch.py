@@ -0,0 +1,50 @@
+import math
+from typing import Dict, Iterable, Mapping, Optional
+
+# Relative accuracy of quantile estimates: a reported p95 is within 2% of the
+# true value. Buckets grow geometrically, so a few hundred cover ms to years.
+RELATIVE_ACCURACY = 0.02
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+def bucket_index(value: float) -> int:
+    """
+    Returns the log bucket for a positive value. Bucket i holds values in
+    (gamma^(i-1), gamma^i]. Values below 1 share bucket 0.
+    """
+    if value <= 1:
+        return 0
+    return math.ceil(math.log(value) / _LOG_GAMMA)
+
+
+def merge(sketches: Iterable[Optional[Mapping[str, int]]]) -> Dict[int, int]:
+    """
+    Adds bucket counts together. Sketches are stored with string keys, as
+    MongoDB field names must be strings.
+    """
+    merged: Dict[int, int] = {}
+    for sketch in sketches:
+        for index, count in (sketch or {}).items():
+            merged[int(index)] = merged.get(int(index), 0) + count
+    return merged
+
+
+def quantile(buckets: Mapping[int, int], q: float) -> Optional[float]:
+    """
+    Estimates the q-quantile (0 <= q <= 1) from merged bucket counts.
+    Returns None for an empty sketch.
+    """
+    total = sum(buckets.values())
+    if total == 0:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen > rank:
+            if index == 0:
+                return 1.0
+            # Midpoint of the bucket, which bounds the relative error
+            return 2 * _GAMMA ** index / (_GAMMA + 1)
+    return None
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from bson import ObjectId
+
+# Rows buffered per yielded chunk; the first row is always flushed on its own
+# so the client receives bytes as soon as the cursor returns its first batch.
+DEFAULT_CHUNK_ROWS = 500
+
+
+def _json_default(value: Any) -> Any:
+    """Serializes the BSON types that appear in our documents."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_stream(docs: AsyncIterator[Dict[str, Any]], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """
+    Encodes documents as newline-delimited JSON, yielding one chunk per `chunk_rows` documents.
+    """
+    buffer: List[str] = []
+    first = True
+    async for doc in docs:
+        buffer.append(json.dumps(doc, default=_json_default))
+        if first or len(buffer) >= chunk_rows:
+            yield ("\n".join(buffer) + "\n").encode("utf-8")
+            buffer.clear()
+            first = False
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode("utf-8")
+
+
+async def csv_stream(
+    docs: AsyncIterator[Dict[str, Any]], fields: List[str], chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> AsyncIterator[bytes]:
+    """
+    Encodes documents as CSV with the given columns. The header row is yielded
+    immediately; rows follow in chunks of `chunk_rows`.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(fields)
+    yield output.getvalue().encode("utf-8")
+
+    output.seek(0)
+    output.truncate(0)
+    rows = 0
+    async for doc in docs:
+        writer.writerow([_csv_value(doc.get(field)) for field in fields])
+        rows += 1
+        if rows >= chunk_rows:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate(0)
+            rows = 0
+    if rows:
+        yield output.getvalue().encode("utf-8")
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
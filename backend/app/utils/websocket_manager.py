@@ -1,42 +1,542 @@
+import asyncio
+import json
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket
-from typing import Dict, Optional
+from app.core.logger import logs
+from app.core.settings import settings
+from app.utils.ws_broker import Broker, InProcessBroker
 
-class ConnectionManager:
+# Close code sent to a subscriber disconnected for falling behind ("Try Again Later").
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+# Subscribing to "<topic>:*" receives the topic's events for every project.
+WILDCARD = "*"
+
+
+def channel_name(topic: str, project_id: str) -> str:
+    """The channel a topic/project pair is published on, e.g. "mo_status:<mo_id>"."""
+    return f"{topic}:{project_id}"
+
+
+def parse_channel(channel: Any) -> str:
+    """
+    Validates a channel a client asked for: "<topic>:<project_id>" or
+    "<topic>:*". Raises ValueError otherwise.
+    """
+    if not isinstance(channel, str):
+        raise ValueError("Channels must be strings.")
+    topic, sep, project_id = channel.partition(":")
+    if not sep or not topic or not project_id or WILDCARD in topic or (WILDCARD in project_id and project_id != WILDCARD):
+        raise ValueError(f"Invalid channel '{channel}'. Use '<topic>:<id>' or '<topic>:*'.")
+    return channel
+
+
+def encode_event(channel: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """
+    Serializes an event once for all of its subscribers. The channel is added
+    so clients multiplexing many subscriptions on one socket can route it, and
+    the id so they can resume after it.
+    """
+    envelope = {**data, "channel": channel}
+    if event_id is not None:
+        envelope["id"] = event_id
+    return json.dumps(envelope, default=str, separators=(",", ":"))
+
+
+def parse_event_id(event_id: Any) -> Optional[Tuple[str, int]]:
+    """Splits "<stream>-<seq>" into its parts; None if it is malformed."""
+    if not isinstance(event_id, str):
+        return None
+    stream, sep, seq = event_id.rpartition("-")
+    if not sep or not stream or not seq.isdigit():
+        return None
+    return stream, int(seq)
+
+
+# Comment line sent to SSE clients when idle, so proxies keep the stream open.
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
+
+class Event:
+    """
+    One message as it is queued for subscribers. Events published on a
+    channel have a sequence number and id; control replies have neither.
+    `text` is the JSON sent over WebSockets; `sse` is the same message framed
+    for Server-Sent Events, built on first use and shared by every SSE client.
+    """
+    __slots__ = ("seq", "id", "channel", "text", "_sse")
+
+    def __init__(self, text: str, seq: Optional[int] = None, event_id: Optional[str] = None, channel: Optional[str] = None):
+        self.text = text
+        self.seq = seq
+        self.id = event_id
+        self.channel = channel
+        self._sse: Optional[bytes] = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            frame = f"id: {self.id}\ndata: {self.text}\n\n" if self.id else f"data: {self.text}\n\n"
+            self._sse = frame.encode()
+        return self._sse
+
+
+class ReplayBuffer:
     """
-    Manages active WebSocket connections using a topic-based approach.
-    Each connection is identified by a unique client_id, which is a combination
-    of a topic and a project_id (e.g., "srs_generation_project-123").
+    The last `size` events of one topic, oldest first, so reconnecting
+    clients can be sent what they missed. `max_evicted` is the sequence
+    number of the newest event that no longer fits; a client whose last
+    event is older than that has a gap that cannot be replayed.
     """
-    def __init__(self):
-        # This is the only dictionary needed. It stores the actual WebSocket objects.
-        self.active_connections: Dict[str, WebSocket] = {}
+    def __init__(self, size: int):
+        self.events: Deque[Event] = deque()
+        self.size = max(1, size)
+        self.max_evicted = 0
 
-    async def connect(self, websocket: WebSocket, client_id: str):
+    def append(self, event: Event):
+        if len(self.events) >= self.size:
+            self.max_evicted = self.events.popleft().seq
+        self.events.append(event)
+
+    def since(self, seq: int) -> List[Event]:
+        """Events newer than `seq`, oldest first."""
+        newer = []
+        for event in reversed(self.events):
+            if event.seq <= seq:
+                break
+            newer.append(event)
+        newer.reverse()
+        return newer
+
+
+def coalesce_key(channel: str, data: Dict[str, Any]) -> str:
+    """
+    Messages with the same key describe the same entity, so under the
+    "coalesce" policy only the newest of them needs to be delivered.
+    """
+    return f"{channel}|{data.get('work_order_id') or data.get('mo_id') or ''}"
+
+
+class Subscriber:
+    """
+    One live client. Messages are put on a bounded send queue without waiting
+    and taken off by the client's own writer, so a slow client only ever
+    delays itself. When the queue is full the policy decides:
+
+    - "drop": discard the oldest queued message.
+    - "coalesce": drop the queued message for the same entity and queue the
+      new one at the back, or discard the oldest if there is none.
+    - "disconnect": close the connection; the client can reconnect and resync.
+
+    Subclasses provide the transport: WebSocketSubscriber and SSESubscriber.
+    """
+    kind = "subscriber"
+
+    def __init__(self, manager: "ConnectionManager", max_queue: int, policy: str):
+        self.manager = manager
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.channels: Set[str] = set()
+        self.dropped = 0
+        self.closed = False
+        self._pending: Deque[Tuple[str, Event]] = deque()
+        self._wakeup = asyncio.Event()
+        # Held so the event loop's weak reference is not the only one
+        self._closer: Optional[asyncio.Task] = None
+
+    def start(self):
+        pass
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def free_slots(self) -> int:
+        return self.max_queue - len(self._pending)
+
+    def offer(self, key: str, message: Event) -> bool:
         """
-        Stores a new, already accepted WebSocket connection using its unique client_id.
+        Queues a message without blocking. Returns False if the subscriber is
+        closed or was disconnected by the slow-consumer policy.
         """
-        self.active_connections[client_id] = websocket
+        if self.closed:
+            return False
+        if len(self._pending) >= self.max_queue:
+            if self.policy == "disconnect":
+                logs.define_logger(30, message=f"{self.kind} subscriber fell {len(self._pending)} messages behind. Disconnecting.")
+                self.closed = True
+                self._closer = asyncio.create_task(self._shutdown(SLOW_CONSUMER_CLOSE_CODE))
+                return False
+            self.dropped += 1
+            if not (self.policy == "coalesce" and self._remove_key(key)):
+                self._pending.popleft()
+        self._pending.append((key, message))
+        self._wakeup.set()
+        return True
 
-    async def disconnect(self, client_id: str):
-        """Removes a WebSocket connection from the manager."""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+    def _remove_key(self, key: str) -> bool:
+        # The newer message goes to the back, so per-entity order is kept
+        for index, (pending_key, _) in enumerate(self._pending):
+            if pending_key == key:
+                del self._pending[index]
+                return True
+        return False
 
-    async def send_to_topic(self, project_id: str, data: dict,topic: str):
+    async def next_message(self, timeout: Optional[float] = None) -> Optional[Event]:
         """
-        Sends a JSON message to a client subscribed to a specific topic for a project.
-        This is the primary method your services should use.
+        Waits for the next queued message. Returns None if `timeout` passes
+        first or the subscriber is closed.
         """
-        # Construct the unique client_id from the topic and project_id
-        client_id = f"{topic}_{project_id}"
-        
-        connection = self.active_connections.get(client_id)
-        if connection:
+        while not self._pending:
+            if self.closed:
+                return None
+            self._wakeup.clear()
             try:
-                await connection.send_json(data)
-            except RuntimeError:
-                # The client disconnected without a proper handshake. Clean up.
-                await self.disconnect(client_id)
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._pending.popleft()[1]
+
+    async def close(self, code: int = 1000):
+        """Stops the writer and closes the connection. Safe to call more than once."""
+        if self.closed:
+            return
+        self.closed = True
+        await self._shutdown(code)
+
+    async def _shutdown(self, code: int):
+        self._wakeup.set()
+        self.manager._remove(self)
+
+
+class WebSocketSubscriber(Subscriber):
+    """A WebSocket written by its own writer task."""
+    kind = "websocket"
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager", max_queue: int, policy: str):
+        super().__init__(manager, max_queue, policy)
+        self.websocket = websocket
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                message = await self.next_message()
+                if message is not None:
+                    await self.websocket.send_text(message.text)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # The client went away without a proper close handshake
+            logs.define_logger(20, message=f"WebSocket send failed: {e}. Removing subscriber.")
+        finally:
+            self.closed = True
+            self._pending.clear()
+            self.manager._remove(self)
+
+    async def _shutdown(self, code: int):
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        await super()._shutdown(code)
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class SSESubscriber(Subscriber):
+    """
+    A Server-Sent Events stream. The HTTP response iterates stream(), which
+    writes each event's cached SSE encoding and a comment line as a heartbeat
+    when nothing was sent for `heartbeat_seconds`.
+    """
+    kind = "sse"
+
+    async def stream(self, heartbeat_seconds: float, retry_ms: int = 3000):
+        try:
+            yield f"retry: {retry_ms}\n\n".encode()
+            while not self.closed:
+                message = await self.next_message(timeout=heartbeat_seconds)
+                if message is not None:
+                    yield message.sse
+                elif not self.closed:
+                    yield SSE_HEARTBEAT
+        finally:
+            self.closed = True
+            self._pending.clear()
+            self.manager._remove(self)
+
+
+class ConnectionManager:
+    """
+    Topic registry for WebSocket and SSE subscribers. Any number of subscribers can
+    listen on a channel (a topic plus a project id, e.g. "mo_status:<mo_id>",
+    or "mo_status:*" for all of them), and one subscriber can listen on many
+    channels. Each event is JSON-encoded once and the same text is put on
+    every matching subscriber's send queue, so send_to_topic returns
+    immediately and all subscribers are written to concurrently by their own
+    writer tasks.
+
+    Events go through a broker, which hands them to the manager of every API
+    worker, so a client sees an event no matter which worker produced it.
+
+    Every delivered event gets the next sequence number of this process and
+    the id "<stream>-<seq>", where the stream id changes on each start, and is
+    kept in a bounded per-topic ReplayBuffer. A client that reconnects with
+    the last id it saw is sent only what it missed, or told to resync when
+    that is no longer possible.
+
+    Ids and replay buffers belong to one worker: each worker numbers events
+    in the order it delivers them, which differs between workers. With
+    several workers behind a load balancer, resuming therefore needs sticky
+    sessions (clients reconnecting to the same worker); a client sent to
+    another worker is told to resync with reason "unknown_event_id".
+    """
+    def __init__(self, max_queue: int = None, policy: str = None, broker: Broker = None, max_subscriptions: int = None):
+        self.max_queue = max_queue or settings.WS_SEND_QUEUE_SIZE
+        self.policy = policy or settings.WS_SLOW_CONSUMER_POLICY
+        self.max_subscriptions = max_subscriptions or settings.WS_MAX_SUBSCRIPTIONS
+        self.channels: Dict[str, Set[Subscriber]] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.dropped = 0
+        self.broker = broker or InProcessBroker()
+        self.broker.deliver = self.deliver
+        self.stream_id = uuid.uuid4().hex[:8]
+        self.replay_size = settings.WS_REPLAY_BUFFER_SIZE
+        self.replay_buffers: Dict[str, ReplayBuffer] = {}
+        self._seq = 0
+
+    async def start(self, broker: Broker = None):
+        """Switches to `broker` (if given) and starts receiving events from it."""
+        if broker is not None:
+            self.broker = broker
+        await self.broker.start(self.deliver)
+
+    async def stop(self):
+        """Stops the broker and closes every connection."""
+        await self.broker.stop()
+        await self.close_all()
+
+    async def connect(self, websocket: WebSocket, channel: Optional[str] = None) -> WebSocketSubscriber:
+        """
+        Registers an already accepted WebSocket, optionally subscribed to one
+        channel, and starts its writer task.
+        """
+        subscriber = WebSocketSubscriber(websocket, self, self.max_queue, self.policy)
+        self.subscribers.add(subscriber)
+        if channel:
+            self.subscribe(subscriber, channel)
+        subscriber.start()
+        return subscriber
+
+    def connect_sse(self) -> SSESubscriber:
+        """Registers a Server-Sent Events client; its response drives stream()."""
+        subscriber = SSESubscriber(self, self.max_queue, self.policy)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    async def disconnect(self, subscriber: Subscriber):
+        """Removes a subscriber from every channel and stops its writer."""
+        await subscriber.close()
+
+    def subscribe(self, subscriber: Subscriber, channel: str) -> bool:
+        """Adds a channel; returns False if the subscriber is at its limit."""
+        if channel not in subscriber.channels and len(subscriber.channels) >= self.max_subscriptions:
+            return False
+        subscriber.channels.add(channel)
+        self.channels.setdefault(channel, set()).add(subscriber)
+        return True
+
+    def unsubscribe(self, subscriber: Subscriber, channel: str):
+        subscriber.channels.discard(channel)
+        members = self.channels.get(channel)
+        if members is not None:
+            members.discard(subscriber)
+            if not members:
+                del self.channels[channel]
+
+    def _remove(self, subscriber: Subscriber):
+        if subscriber not in self.subscribers:
+            return
+        self.subscribers.discard(subscriber)
+        self.dropped += subscriber.dropped
+        for channel in list(subscriber.channels):
+            self.unsubscribe(subscriber, channel)
+
+    async def send_to_topic(self, project_id: str, data: dict, topic: str):
+        """
+        Sends a JSON message to every subscriber of a topic for a project, in
+        every worker. This is the primary method your services should use. It
+        never waits on a client.
+        """
+        await self.broker.publish(topic, project_id, data)
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.stream_id}-{self._seq}"
+
+    def deliver(self, topic: str, project_id: str, data: dict):
+        """
+        Numbers an event from the broker, keeps it for replay and fans it out
+        to this worker's subscribers.
+        """
+        channel = channel_name(topic, project_id)
+        self._seq += 1
+        event_id = f"{self.stream_id}-{self._seq}"
+        event = Event(encode_event(channel, data, event_id), self._seq, event_id, channel)
+        buffer = self.replay_buffers.get(topic)
+        if buffer is None:
+            buffer = self.replay_buffers[topic] = ReplayBuffer(self.replay_size)
+        buffer.append(event)
+
+        members = self.channels.get(channel)
+        wildcard = self.channels.get(channel_name(topic, WILDCARD))
+        if members and wildcard:
+            targets = members | wildcard
+        else:
+            targets = members or wildcard
+        if not targets:
+            return
+        key = coalesce_key(channel, data)
+        for subscriber in list(targets):
+            subscriber.offer(key, event)
+
+    def replay(self, subscriber: Subscriber, channels: Iterable[str], last_event_id: str):
+        """
+        Queues the buffered events on `channels` that came after
+        `last_event_id`, oldest first. Sends {"type": "resync", "topics": [...]}
+        instead for topics whose missed events are no longer all available:
+        the id is from another process or an earlier start, the buffer has
+        wrapped past it, or there are more than the subscriber can queue.
+        Runs without awaiting, so no live event can slip in between.
+        """
+        channels = set(channels)
+        topics = sorted({channel.partition(":")[0] for channel in channels})
+        parsed = parse_event_id(last_event_id)
+        if parsed is None or parsed[0] != self.stream_id or parsed[1] > self._seq:
+            self._resync(subscriber, topics, "unknown_event_id")
+            return
+
+        last_seq = parsed[1]
+        missed: List[Event] = []
+        gaps: List[str] = []
+        for topic in topics:
+            buffer = self.replay_buffers.get(topic)
+            if buffer is None:
+                continue
+            if buffer.max_evicted > last_seq:
+                gaps.append(topic)
+                continue
+            wildcard = channel_name(topic, WILDCARD) in channels
+            missed.extend(
+                event for event in buffer.since(last_seq)
+                if wildcard or event.channel in channels
+            )
+        if len(missed) > subscriber.free_slots:
+            gaps = topics
+            missed = []
+
+        missed.sort(key=lambda event: event.seq)
+        for event in missed:
+            subscriber.offer(event.channel, event)
+        if gaps:
+            self._resync(subscriber, gaps, "gap")
+
+    def _resync(self, subscriber: Subscriber, topics: List[str], reason: str):
+        self._reply(subscriber, {"type": "resync", "topics": topics, "reason": reason, "last_event_id": self.last_event_id})
+
+    def handle_control(self, subscriber: Subscriber, text: str):
+        """
+        Applies a control message sent by a client:
+
+            {"action": "subscribe", "channels": ["mo_status:*", "wo_status:<wo_id>"], "last_event_id": "<id>"}
+            {"action": "unsubscribe", "channels": ["mo_status:*"]}
+
+        and queues the reply, {"type": "subscribed"|"unsubscribed", "channels": [...]}
+        or {"type": "error", "message": ...}. With "last_event_id", the events
+        missed on the new channels are replayed right after the reply. Text
+        that is not JSON is ignored, as earlier clients may send keep-alive
+        strings.
+        """
+        try:
+            request = json.loads(text)
+        except ValueError:
+            return
+        self.apply_control(subscriber, request)
+
+    def apply_control(self, subscriber: Subscriber, request: Any):
+        """Applies a decoded control message, as described in handle_control."""
+        action = request.get("action") if isinstance(request, dict) else None
+        channels = request.get("channels") if isinstance(request, dict) else None
+        if isinstance(channels, str):
+            channels = [channels]
+        if action not in ("subscribe", "unsubscribe") or not isinstance(channels, list):
+            self._reply(subscriber, {"type": "error", "message": "Expected {\"action\": \"subscribe\"|\"unsubscribe\", \"channels\": [...]}."})
+            return
+        try:
+            channels = [parse_channel(channel) for channel in channels]
+        except ValueError as e:
+            self._reply(subscriber, {"type": "error", "message": str(e)})
+            return
+
+        if action == "unsubscribe":
+            for channel in channels:
+                self.unsubscribe(subscriber, channel)
+            self._reply(subscriber, {"type": "unsubscribed", "channels": channels})
+            return
+        added = self._subscribe_many(subscriber, channels)
+        self._reply(subscriber, {"type": "subscribed", "channels": added, "last_event_id": self.last_event_id})
+        if request.get("last_event_id") and added:
+            self.replay(subscriber, added, request["last_event_id"])
+        if len(added) < len(channels):
+            self._reply(subscriber, {"type": "error", "message": f"Subscription limit of {self.max_subscriptions} channels reached."})
+
+    def _subscribe_many(self, subscriber: Subscriber, channels: Iterable[str]) -> List[str]:
+        added = []
+        for channel in channels:
+            if not self.subscribe(subscriber, channel):
+                break
+            added.append(channel)
+        return added
+
+    @staticmethod
+    def _reply(subscriber: Subscriber, message: Dict[str, Any]):
+        subscriber.offer("control", Event(json.dumps(message)))
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self.channels.get(channel, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscriber counts per topic plus queue and drop totals, for health checks."""
+        per_topic: Dict[str, int] = {}
+        for channel, members in self.channels.items():
+            topic = channel.split(":", 1)[0]
+            per_topic[topic] = per_topic.get(topic, 0) + len(members)
+        per_kind: Dict[str, int] = {}
+        for subscriber in self.subscribers:
+            per_kind[subscriber.kind] = per_kind.get(subscriber.kind, 0) + 1
+        return {
+            "subscribers": len(self.subscribers),
+            "subscribers_per_kind": per_kind,
+            "channels": len(self.channels),
+            "subscribers_per_topic": per_topic,
+            "queued": sum(subscriber.queue_depth for subscriber in self.subscribers),
+            "dropped": self.dropped + sum(subscriber.dropped for subscriber in self.subscribers),
+            "policy": self.policy,
+            "broker": type(self.broker).__name__,
+            "last_event_id": self.last_event_id,
+        }
+
+    async def close_all(self):
+        """Closes every connection, e.g. on application shutdown."""
+        await asyncio.gather(*(subscriber.close(1001) for subscriber in list(self.subscribers)))
 
 # Create a single, shared instance to be used across the application
-connection_manager = ConnectionManager()
\ No newline at end of file
+connection_manager = ConnectionManager()
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import socket
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Optional, Set
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import CollectionInvalid, PyMongoError
+from app.core.logger import logs
+from app.core.settings import settings
+
+# Called with (topic, project_id, data) for every event, in every worker.
+Deliver = Callable[[str, str, Dict[str, Any]], None]
+
+# Largest event a Unix datagram can carry here; events are a few hundred bytes.
+MAX_DATAGRAM_BYTES = 64 * 1024
+
+
+def _origin_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _encode(topic: str, project_id: str, data: Dict[str, Any], origin: str) -> Dict[str, Any]:
+    return {"topic": topic, "project_id": project_id, "data": data, "origin": origin}
+
+
+class Broker:
+    """
+    Carries websocket events between the API workers. publish() is called once
+    per event by whichever worker produced it; the broker then calls `deliver`
+    in every worker (including the publishing one), which fans the event out
+    to that worker's local subscribers.
+    """
+    def __init__(self):
+        self.origin = _origin_id()
+        self.deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def stop(self):
+        pass
+
+    async def publish(self, topic: str, project_id: str, data: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _deliver(self, topic: str, project_id: str, data: Dict[str, Any]):
+        if self.deliver is None:
+            return
+        try:
+            self.deliver(topic, project_id, data)
+        except Exception as e:
+            logs.define_logger(40, message=f"WS BROKER: Failed to deliver event on '{topic}': {e}")
+
+
+class InProcessBroker(Broker):
+    """Single worker: events are delivered directly to local subscribers."""
+    async def publish(self, topic: str, project_id: str, data: Dict[str, Any]):
+        self._deliver(topic, project_id, data)
+
+
+class MongoBroker(Broker):
+    """
+    Shares events through a capped collection. Every worker tails it with a
+    tailable, awaitable cursor and delivers what other workers insert; its own
+    events are delivered locally right away. Old events age out of the capped
+    collection on their own.
+    """
+    def __init__(self, db: AsyncDatabase, collection: str = "ws_events", size_bytes: int = 16 * 1024 * 1024,
+                 retry_seconds: float = 1):
+        super().__init__()
+        self.db = db
+        self.collection_name = collection
+        self.size_bytes = size_bytes
+        self.retry_seconds = retry_seconds
+        self._tailer: Optional[asyncio.Task] = None
+        # ObjectIds from different workers are not strictly ordered, so a
+        # restarted cursor looks back a little and skips what it already saw.
+        self._seen_ids: Deque[ObjectId] = deque(maxlen=1024)
+        self._seen: Set[ObjectId] = set()
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        try:
+            await self.db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass  # Already exists
+        # A tailable cursor whose first query matches nothing dies at once, so
+        # leave a marker (topic None, skipped by every worker) for it to start from.
+        await self.db[self.collection_name].insert_one(_encode(None, None, None, self.origin))
+        self._tailer = asyncio.create_task(self._tail())
+
+    async def stop(self):
+        if self._tailer:
+            self._tailer.cancel()
+            await asyncio.gather(self._tailer, return_exceptions=True)
+            self._tailer = None
+
+    async def publish(self, topic: str, project_id: str, data: Dict[str, Any]):
+        self._deliver(topic, project_id, data)
+        try:
+            await self.db[self.collection_name].insert_one(_encode(topic, project_id, data, self.origin))
+        except PyMongoError as e:
+            logs.define_logger(40, message=f"WS BROKER: Failed to publish event on '{topic}' to other workers: {e}")
+
+    def _remember(self, doc_id: ObjectId) -> bool:
+        if doc_id in self._seen:
+            return False
+        if len(self._seen_ids) == self._seen_ids.maxlen:
+            self._seen.discard(self._seen_ids[0])
+        self._seen_ids.append(doc_id)
+        self._seen.add(doc_id)
+        return True
+
+    async def _tail(self):
+        collection = self.db[self.collection_name]
+        since = datetime.utcnow()
+        while True:
+            try:
+                cursor = collection.find(
+                    {"_id": {"$gte": ObjectId.from_datetime(since - timedelta(seconds=1))}},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                )
+                while cursor.alive:
+                    async for doc in cursor:
+                        since = doc["_id"].generation_time.replace(tzinfo=None)
+                        # Start markers carry no topic and are never delivered
+                        if doc.get("topic") is None or doc.get("origin") == self.origin or not self._remember(doc["_id"]):
+                            continue
+                        self._deliver(doc["topic"], doc["project_id"], doc["data"])
+                    await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logs.define_logger(30, message=f"WS BROKER: Tailing '{self.collection_name}' failed: {e}. Retrying in {self.retry_seconds}s.")
+            await asyncio.sleep(self.retry_seconds)
+
+
+class UnixSocketBroker(Broker):
+    """
+    Shares events between workers on one host through Unix datagram sockets,
+    one per worker in a shared directory. Meant for local runs and tests: no
+    database is needed, and a datagram that does not fit in a busy receiver's
+    buffer is dropped rather than waited for.
+    """
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._sock: Optional[socket.socket] = None
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        os.makedirs(self.directory, exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._on_readable)
+
+    async def stop(self):
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _on_readable(self):
+        while self._sock is not None:
+            try:
+                payload = self._sock.recv(MAX_DATAGRAM_BYTES)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                event = json.loads(payload)
+                topic, project_id, data = event["topic"], event["project_id"], event["data"]
+            except (ValueError, KeyError, TypeError):
+                logs.define_logger(30, message=f"WS BROKER: Ignored a malformed datagram on {self.path}.")
+                continue
+            self._deliver(topic, project_id, data)
+
+    async def publish(self, topic: str, project_id: str, data: Dict[str, Any]):
+        self._deliver(topic, project_id, data)
+        if self._sock is None:
+            return
+        payload = json.dumps(_encode(topic, project_id, data, self.origin), default=str).encode()
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if peer == self.path or not name.endswith(".sock"):
+                continue
+            try:
+                self._sock.sendto(payload, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker that owned this socket is gone
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except (BlockingIOError, OSError) as e:
+                logs.define_logger(30, message=f"WS BROKER: Dropped event on '{topic}' for {name}: {e}")
+
+
+def create_broker(kind: str, db: Optional[AsyncDatabase] = None) -> Broker:
+    """Builds the broker selected by the WS_BROKER setting."""
+    if kind == "mongo":
+        return MongoBroker(db, settings.WS_BROKER_COLLECTION, settings.WS_BROKER_CAPPED_BYTES)
+    if kind == "unix":
+        return UnixSocketBroker(settings.WS_BROKER_SOCKET_DIR)
+    return InProcessBroker()
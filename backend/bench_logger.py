@@ -0,0 +1,70 @@
+"""
+Microbenchmark for logs.define_logger.
+
+Compares the old call style, which captured the caller with inspect.stack(),
+with the current one that reads the caller's frame only when the level is
+enabled. Handlers are swapped for a NullHandler so only the logging call
+itself is measured, not disk I/O.
+
+Usage:
+    python bench_logger.py [--calls-per-request 4] [--depth 40] [--number 2000]
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import sys
+import timeit
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.logger import logs
+
+
+def at_depth(depth: int, fn):
+    """Calls `fn` from `depth` nested frames, roughly what a request handler sees."""
+    if depth <= 0:
+        return fn()
+    return at_depth(depth - 1, fn)
+
+
+def legacy_call():
+    logs.define_logger(logging.INFO, message="Fetching work orders", loggName=inspect.stack()[0], pid=os.getpid())
+
+
+def current_call():
+    logs.define_logger(logging.INFO, message="Fetching work orders", pid=os.getpid())
+
+
+def disabled_call():
+    logs.define_logger(logging.DEBUG, message="Fetching work orders", pid=os.getpid())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls-per-request", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=40, help="stack depth the calls are made from")
+    parser.add_argument("--number", type=int, default=2000, help="calls timed per case")
+    args = parser.parse_args()
+
+    logs.logger.handlers = [logging.NullHandler()]
+    logs.logger.setLevel(logging.INFO)
+
+    cases = [
+        ("inspect.stack() (old)", legacy_call),
+        ("frame lookup (enabled)", current_call),
+        ("level disabled", disabled_call),
+    ]
+    print(f"depth={args.depth} calls/request={args.calls_per_request}")
+    for name, fn in cases:
+        seconds = min(timeit.repeat(lambda: at_depth(args.depth, fn), number=args.number, repeat=3))
+        per_call_us = seconds / args.number * 1e6
+        per_request_us = per_call_us * args.calls_per_request
+        print(f"{name:<24} {per_call_us:10.2f} us/call {per_request_us:10.2f} us/request")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
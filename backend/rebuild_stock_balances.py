@@ -0,0 +1,41 @@
+"""
+Rebuilds the 'stock_balances' projection from the full stock ledger.
+
+Usage:
+    python rebuild_stock_balances.py          # recompute the projection
+    python rebuild_stock_balances.py --check  # only report products that drifted
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.db_connection import DBConnection
+from app.repo.stock_balance_repo import StockBalanceRepository
+from app.service.inventory_service import InventoryService
+
+
+async def check() -> int:
+    db_connection = DBConnection()
+    mismatches = await InventoryService(db_connection.get_async_database()).check_consistency()
+    for row in mismatches:
+        print(f"{row['product_id']}: projected={row['projected_stock']} ledger={row['ledger_stock']}")
+    print(f"{len(mismatches)} product(s) out of sync")
+    await DBConnection.close()
+    return 1 if mismatches else 0
+
+
+def rebuild() -> int:
+    repo = StockBalanceRepository(DBConnection().get_database())
+    count = repo.rebuild_from_ledger()
+    print(f"Rebuilt stock balances for {count} product(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        sys.exit(asyncio.run(check()))
+    sys.exit(rebuild())
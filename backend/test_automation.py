@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for claiming work orders into the bounded automation worker pool.
+"""
+
+import sys
+import os
+import asyncio
+from collections import defaultdict
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from app.service.automation_service import AutomationService
+from app.service.polling_service import PollingService
+
+
+class FakeWorkOrderRepository:
+    """Work orders waiting in 'in_progress'; claims take a little time, like a round trip."""
+    def __init__(self, ids):
+        self.pending = list(ids)
+        self.claimed = []
+
+    def _take(self, wo_id):
+        self.pending.remove(wo_id)
+        self.claimed.append(wo_id)
+        return {"_id": wo_id}
+
+    async def claim_by_id(self, wo_id, worker_id, lease_seconds):
+        await asyncio.sleep(0.001)
+        return self._take(wo_id) if wo_id in self.pending else None
+
+    async def claim_next(self, worker_id, lease_seconds):
+        await asyncio.sleep(0.001)
+        return self._take(self.pending[0]) if self.pending else None
+
+
+def _automation(pool, ids, work_seconds):
+    automation = AutomationService(defaultdict(object), worker_id="test", pool=pool)
+    automation.wo_repo = FakeWorkOrderRepository(ids)
+    finished = []
+
+    async def job(wo):
+        await asyncio.sleep(work_seconds)
+        finished.append(wo["_id"])
+
+    automation._simulate_and_complete_wo = job
+    return automation, finished
+
+
+def test_burst_of_events_claims_no_more_than_the_pool_runs():
+    async def run():
+        pool = PollingService(interval_seconds=3600, max_concurrency=10)
+        automation, _ = _automation(pool, [str(i) for i in range(200)], work_seconds=60)
+        await asyncio.gather(*(automation.on_work_order_event({"status": "in_progress", "id": str(i)}) for i in range(200)))
+        assert len(automation.wo_repo.claimed) == 10
+        assert pool.queue_depth == 10 and pool.available_slots == 0
+        assert pool.stats()["reserved_slots"] == 0
+
+    asyncio.run(run())
+
+
+def test_work_order_turned_away_by_a_full_pool_is_claimed_when_a_slot_frees():
+    async def run():
+        pool = PollingService(interval_seconds=3600, max_concurrency=2)
+        automation, finished = _automation(pool, ["a", "b", "c"], work_seconds=0.05)
+        # The safety-net poll interval is far longer than the test
+        pool.register_task(automation.polling_task, interval_seconds=3600, on_free_slot=True)
+        await pool.start_polling()
+        try:
+            await asyncio.sleep(0.02)  # the first poll claims "a" and "b"
+            assert automation.wo_repo.claimed == ["a", "b"]
+            await automation.on_work_order_event({"status": "in_progress", "id": "c"})
+            assert "c" not in automation.wo_repo.claimed
+            await asyncio.sleep(0.2)
+            assert automation.wo_repo.claimed == ["a", "b", "c"]
+            assert sorted(finished) == ["a", "b", "c"]
+        finally:
+            await pool.stop_polling()
+
+    asyncio.run(run())
+
+
+def test_trigger_runs_a_task_early_without_overlapping_runs():
+    async def run():
+        pool = PollingService(interval_seconds=3600)
+        state = {"running": 0, "max": 0, "runs": 0}
+
+        async def poll():
+            state["running"] += 1
+            state["max"] = max(state["max"], state["running"])
+            state["runs"] += 1
+            await asyncio.sleep(0.05)
+            state["running"] -= 1
+
+        pool.register_task(poll)
+        await pool.start_polling()
+        try:
+            await asyncio.sleep(0.01)
+            assert pool.trigger(poll)  # while the first run is in progress
+            await asyncio.sleep(0.2)
+            assert state["runs"] == 2 and state["max"] == 1
+
+            async def unregistered():
+                pass
+
+            assert not pool.trigger(unregistered)
+        finally:
+            await pool.stop_polling()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared dashboard cache and its invalidation on MO changes.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from app.service.analytics_service import AnalyticsService, dashboard_cache, invalidate_dashboard_cache
+from app.utils.cache import TTLCache
+
+
+class FakeOrders:
+    """Status aggregation that runs `during` before answering, once."""
+    def __init__(self):
+        self.calls = 0
+        self.during = None
+
+    async def aggregate(self, pipeline):
+        self.calls += 1
+        if self.during is not None:
+            during, self.during = self.during, None
+            await during()
+        return [{"_id": "done", "count": self.calls}]
+
+
+class FakeRollups:
+    async def get_range(self, start=None, product_id=None):
+        return []
+
+
+def _service():
+    service = AnalyticsService.__new__(AnalyticsService)
+    service.mo_repository = FakeOrders()
+    service.rollup_repository = FakeRollups()
+    return service
+
+
+def test_set_with_an_old_generation_is_ignored():
+    cache = TTLCache()
+    generation = cache.generation
+    cache.clear()
+    cache.set("a", 1, generation=generation)
+    assert cache.get("a") is None
+
+    generation = cache.generation
+    cache.invalidate("other")
+    cache.set("a", 1, generation=generation)
+    assert cache.get("a") is None
+
+    cache.set("a", 1, generation=cache.generation)
+    cache.set("b", 2)
+    assert (cache.get("a"), cache.get("b")) == (1, 2)
+
+
+def test_dashboard_is_cached_until_invalidated():
+    async def run():
+        dashboard_cache.clear()
+        service = _service()
+        await service.get_dashboard(7)
+        await service.get_dashboard(7)
+        assert service.mo_repository.calls == 1
+
+        await invalidate_dashboard_cache({"status": "done"})
+        await service.get_dashboard(7)
+        assert service.mo_repository.calls == 2
+    asyncio.run(run())
+
+
+def test_invalidation_during_compute_is_not_overwritten():
+    async def run():
+        dashboard_cache.clear()
+        service = _service()
+        # An MO changes status while the first dashboard is being computed
+        service.mo_repository.during = invalidate_dashboard_cache
+        first = await service.get_dashboard(7)
+        assert first.status_overview.done == 1
+        assert dashboard_cache.get(7) is None
+
+        second = await service.get_dashboard(7)
+        assert second.status_overview.done == 2
+        assert dashboard_cache.get(7) is not None
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
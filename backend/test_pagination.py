@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the keyset pagination cursor tokens.
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trips_objectid_and_datetime():
+    """The sort value and _id come back with their BSON types intact."""
+    doc_id = ObjectId("68cf764de671bb2ea0b7442f")
+    created_at = datetime(2025, 3, 30, 1, 30, 15, 123000)
+    assert decode_cursor(encode_cursor(created_at, doc_id)) == (created_at, doc_id)
+
+
+def test_cursor_round_trips_id_only_sort():
+    """With the default _id sort the sort value is the _id itself."""
+    doc_id = ObjectId()
+    assert decode_cursor(encode_cursor(doc_id, doc_id)) == (doc_id, doc_id)
+
+
+def test_cursor_round_trips_missing_sort_value():
+    """Documents without the sort field still yield a usable cursor."""
+    doc_id = ObjectId()
+    assert decode_cursor(encode_cursor(None, doc_id)) == (None, doc_id)
+
+
+def test_cursor_is_url_safe():
+    token = encode_cursor(datetime(2025, 1, 1), ObjectId())
+    assert all(c.isalnum() or c in "-_=" for c in token)
+
+
+def test_malformed_cursor_raises_value_error():
+    for token in ["not-a-cursor", "", "e30=", encode_cursor(1, 2)[:-4]]:
+        try:
+            decode_cursor(token)
+        except ValueError:
+            continue
+        raise AssertionError(f"{token!r} was accepted")
+
+
+def _matches(doc, query):
+    """Evaluates the subset of MongoDB filters keyset_filter produces."""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$ne":
+                ok = value != operand
+            else:
+                # Like MongoDB, $gt/$lt only compare values of the same type
+                ok = None not in (value, operand) and (value > operand if op == "$gt" else value < operand)
+            if not ok:
+                return False
+    return True
+
+
+def _walk(docs, sort_field, descending, limit=2):
+    """Pages through `docs` as paginate does and returns them in page order."""
+    def key(doc):
+        value = doc.get(sort_field)
+        return (value is not None, value or 0, doc["_id"])
+    ordered = sorted(docs, key=key, reverse=descending)
+    seen, after = [], None
+    while True:
+        remaining = [doc for doc in ordered if after is None or _matches(doc, keyset_filter(sort_field, *after, descending))]
+        page = remaining[:limit]
+        seen.extend(page)
+        if len(remaining) <= limit:
+            return seen, ordered
+        after = decode_cursor(encode_cursor(page[-1].get(sort_field), page[-1]["_id"]))
+
+
+def test_keyset_walk_visits_every_document_once_around_null_sort_values():
+    """Documents without created_at sort first and must not stall the walk."""
+    docs = [
+        {"_id": ObjectId(), "created_at": None},
+        {"_id": ObjectId()},
+        {"_id": ObjectId(), "created_at": datetime(2025, 1, 2)},
+        {"_id": ObjectId(), "created_at": None},
+        {"_id": ObjectId(), "created_at": datetime(2025, 1, 1)},
+        {"_id": ObjectId(), "created_at": datetime(2025, 1, 2)},
+        {"_id": ObjectId()},
+    ]
+    for descending in (False, True):
+        for limit in (1, 2, 3):
+            seen, ordered = _walk(docs, "created_at", descending, limit)
+            assert seen == ordered, (descending, limit)
+
+
+def test_keyset_filter_on_id_only_compares_ids():
+    doc_id = ObjectId()
+    assert keyset_filter("_id", doc_id, doc_id) == {"_id": {"$gt": doc_id}}
+    assert keyset_filter("_id", doc_id, doc_id, descending=True) == {"_id": {"$lt": doc_id}}
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
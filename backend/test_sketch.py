@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the log-bucket quantile sketch used by the production rollups.
+"""
+
+import sys
+import os
+import random
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.sketch import RELATIVE_ACCURACY, bucket_index, merge, quantile
+
+
+def _sketch(values):
+    buckets = {}
+    for value in values:
+        index = bucket_index(value)
+        buckets[index] = buckets.get(index, 0) + 1
+    return buckets
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_empty_sketch_has_no_quantiles():
+    assert quantile({}, 0.5) is None
+    assert quantile(merge([None, {}]), 0.95) is None
+
+
+def test_values_up_to_one_share_bucket_zero():
+    assert bucket_index(0) == bucket_index(0.5) == bucket_index(1) == 0
+    assert bucket_index(1.0001) > 0
+    assert quantile({0: 3}, 0.5) == 1.0
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    # Cycle times in ms, spread over several orders of magnitude
+    values = [rng.lognormvariate(15, 1.5) for _ in range(20000)]
+    buckets = _sketch(values)
+    for q in (0, 0.5, 0.9, 0.95, 0.99, 1):
+        estimate = quantile(buckets, q)
+        exact = _exact(values, q)
+        assert abs(estimate - exact) / exact <= RELATIVE_ACCURACY, (q, estimate, exact)
+
+
+def test_single_value():
+    estimate = quantile(_sketch([3_600_000]), 0.95)
+    assert abs(estimate - 3_600_000) / 3_600_000 <= RELATIVE_ACCURACY
+
+
+def test_merge_equals_sketch_of_union():
+    """Merging per-day sketches (stored with string keys) equals sketching all values."""
+    rng = random.Random(11)
+    days = [[rng.uniform(1, 1e7) for _ in range(500)] for _ in range(5)]
+    stored = [{str(index): count for index, count in _sketch(day).items()} for day in days]
+    merged = merge(stored)
+    assert merged == _sketch([value for day in days for value in day])
+    assert sum(merged.values()) == 2500
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for the Server-Sent Events endpoint and its stream framing.
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from starlette.requests import Request
+
+import app.routes.websocket_routes as websocket_routes
+from app.utils.websocket_manager import SSE_HEARTBEAT, ConnectionManager
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/api/sse/", "headers": [], "query_string": b"", "client": ("127.0.0.1", 1)})
+
+
+def _call(manager, channels=(), topic=None, project_id=None, last_event_id=None, header=None, heartbeat=15):
+    """Calls the endpoint with `manager` as the module's connection manager."""
+    async def run():
+        saved = websocket_routes.connection_manager, websocket_routes.settings.SSE_HEARTBEAT_SECONDS
+        websocket_routes.connection_manager = manager
+        websocket_routes.settings.SSE_HEARTBEAT_SECONDS = heartbeat
+        try:
+            return await websocket_routes.progress_sse_endpoint(
+                _request(), channels=list(channels), topic=topic, project_id=project_id,
+                last_event_id=last_event_id, last_event_id_header=header,
+            )
+        finally:
+            websocket_routes.connection_manager, websocket_routes.settings.SSE_HEARTBEAT_SECONDS = saved
+    return run()
+
+
+def _parse(frame):
+    """Splits an SSE frame into its fields, with data decoded as JSON."""
+    assert frame.endswith(b"\n\n"), frame
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip("\n").split("\n"))
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def test_stream_starts_with_retry_then_frames_events():
+    async def run():
+        manager = ConnectionManager()
+        response = await _call(manager, channels=["mo_status:mo1,wo_status:*"])
+        assert response.media_type == "text/event-stream"
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["x-accel-buffering"] == "no"
+        frames = response.body_iterator
+        assert await frames.__anext__() == b"retry: 3000\n\n"
+
+        manager.deliver("mo_status", "mo1", {"status": "done"})
+        manager.deliver("mo_status", "mo2", {"status": "done"})  # not subscribed
+        manager.deliver("wo_status", "wo1", {"status": "started"})
+        first = _parse(await frames.__anext__())
+        second = _parse(await frames.__anext__())
+        assert first["id"] == first["data"]["id"]
+        assert first["data"] == {"status": "done", "channel": "mo_status:mo1", "id": first["id"]}
+        assert second["data"]["channel"] == "wo_status:wo1"
+
+        await response.background()
+        await frames.aclose()
+        assert not manager.subscribers
+    asyncio.run(run())
+
+
+def test_idle_stream_sends_heartbeats():
+    async def run():
+        manager = ConnectionManager()
+        response = await _call(manager, topic="mo_status", project_id="*", heartbeat=0.01)
+        frames = response.body_iterator
+        await frames.__anext__()
+        assert await frames.__anext__() == SSE_HEARTBEAT
+        assert await frames.__anext__() == SSE_HEARTBEAT
+
+        # Events still get through between heartbeats
+        manager.deliver("mo_status", "mo1", {"status": "done"})
+        frame = await frames.__anext__()
+        assert frame.startswith(b"id: ")
+
+        await response.background()
+        try:
+            await frames.__anext__()
+        except StopAsyncIteration:
+            pass
+        else:
+            raise AssertionError("the stream should end once the client is disconnected")
+    asyncio.run(run())
+
+
+def test_last_event_id_header_wins_over_query_param():
+    async def run():
+        manager = ConnectionManager()
+        for n in range(3):
+            manager.deliver("mo_status", "mo1", {"n": n})
+        ids = [event.id for event in manager.replay_buffers["mo_status"].since(0)]
+
+        response = await _call(manager, channels=["mo_status:mo1"], last_event_id=ids[0], header=ids[1])
+        frames = response.body_iterator
+        await frames.__anext__()
+        replayed = _parse(await frames.__anext__())
+        assert replayed["id"] == ids[2] and replayed["data"]["n"] == 2
+
+        # Nothing else was replayed: the next frame is the next live event
+        manager.deliver("mo_status", "mo1", {"n": 3})
+        assert _parse(await frames.__anext__())["data"]["n"] == 3
+        await response.background()
+    asyncio.run(run())
+
+
+def test_query_param_resumes_without_the_header():
+    async def run():
+        manager = ConnectionManager()
+        for n in range(2):
+            manager.deliver("mo_status", "mo1", {"n": n})
+        first_id = manager.replay_buffers["mo_status"].since(0)[0].id
+
+        response = await _call(manager, channels=["mo_status:*"], last_event_id=first_id)
+        frames = response.body_iterator
+        await frames.__anext__()
+        assert _parse(await frames.__anext__())["data"]["n"] == 1
+        await response.background()
+    asyncio.run(run())
+
+
+def test_unknown_event_id_sends_resync():
+    async def run():
+        manager = ConnectionManager()
+        response = await _call(manager, channels=["mo_status:*"], header="other-stream-1")
+        frames = response.body_iterator
+        await frames.__anext__()
+        resync = await frames.__anext__()
+        assert resync.startswith(b"data: ")
+        assert _parse(resync)["data"]["type"] == "resync"
+        await response.background()
+    asyncio.run(run())
+
+
+def test_missing_or_invalid_channels_are_rejected():
+    async def run():
+        manager = ConnectionManager(max_subscriptions=2)
+        for kwargs in (
+            {},
+            {"channels": [" , "]},
+            {"channels": ["mo_status"]},
+            {"channels": ["mo_status:*", "*:mo1"]},
+            {"topic": "mo_status", "project_id": "mo*"},
+            {"channels": ["mo_status:a,mo_status:b,mo_status:c"]},
+        ):
+            response = await _call(manager, **kwargs)
+            assert response.status_code == 400, kwargs
+            assert json.loads(response.body)["message"], kwargs
+        assert not manager.subscribers
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for time-series bucket boundaries, including DST changes.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from app.service.timeseries_service import TimeSeriesService
+
+BERLIN = ZoneInfo("Europe/Berlin")  # Summer time 2025-03-30 to 2025-10-26
+KOLKATA = ZoneInfo("Asia/Kolkata")  # No DST, +05:30
+
+
+def _starts(start_utc, end_utc, unit, zone):
+    return TimeSeriesService._bucket_starts(start_utc, end_utc, unit, zone)
+
+
+def _utc_lengths(starts):
+    # Aware datetimes sharing a tzinfo subtract in wall-clock time, so convert first
+    instants = [ts.astimezone(timezone.utc) for ts in starts]
+    return [(b - a).total_seconds() / 3600 for a, b in zip(instants, instants[1:])]
+
+
+def test_day_buckets_stay_on_local_midnight_across_spring_forward():
+    starts = _starts(datetime(2025, 3, 28, 23), datetime(2025, 4, 1, 12), "day", BERLIN)
+    assert [ts.replace(tzinfo=None) for ts in starts] == [datetime(2025, 3, d) for d in (29, 30, 31)] + [datetime(2025, 4, 1)]
+    assert all(ts.hour == 0 for ts in starts)
+    # The day the clocks go forward is 23 hours long
+    assert _utc_lengths(starts) == [24, 23, 24]
+
+
+def test_day_buckets_across_fall_back():
+    starts = _starts(datetime(2025, 10, 24, 22), datetime(2025, 10, 27, 23), "day", BERLIN)
+    assert [ts.day for ts in starts] == [25, 26, 27]
+    # The day the clocks go back is 25 hours long
+    assert _utc_lengths(starts) == [24, 25]
+
+
+def test_hour_buckets_across_fall_back_are_distinct_instants():
+    # Local 2025-10-26 has 25 hours; 02:00-03:00 happens twice
+    start = datetime(2025, 10, 25, 22)  # local midnight (UTC+2)
+    end = datetime(2025, 10, 26, 23)    # next local midnight (UTC+1)
+    starts = _starts(start, end, "hour", BERLIN)
+    assert len(starts) == 25
+    instants = [ts.astimezone(timezone.utc) for ts in starts]
+    assert len(set(instants)) == 25
+    assert _utc_lengths(starts) == [1] * 24
+    assert [ts.hour for ts in starts].count(2) == 2
+
+
+def test_window_ending_in_repeated_hour():
+    # Ends at 02:30 local, the first time round (00:30 UTC); the second 02:00
+    # bucket starts at 01:00 UTC, after the window
+    starts = _starts(datetime(2025, 10, 25, 22), datetime(2025, 10, 26, 0, 30), "hour", BERLIN)
+    assert [ts.astimezone(timezone.utc).hour for ts in starts] == [22, 23, 0]
+
+
+def test_hour_buckets_across_spring_forward_skip_the_missing_hour():
+    start = datetime(2025, 3, 29, 23)  # local midnight (UTC+1)
+    end = datetime(2025, 3, 30, 22)    # next local midnight (UTC+2)
+    starts = _starts(start, end, "hour", BERLIN)
+    assert len(starts) == 23
+    assert 2 not in [ts.hour for ts in starts]
+
+
+def test_week_and_month_buckets_use_local_boundaries():
+    weeks = _starts(datetime(2025, 3, 20), datetime(2025, 4, 10), "week", BERLIN)
+    assert all(ts.weekday() == 0 and ts.hour == 0 for ts in weeks)
+    assert weeks[0].replace(tzinfo=None) == datetime(2025, 3, 17)
+    months = _starts(datetime(2024, 11, 15), datetime(2025, 4, 2), "month", BERLIN)
+    assert [(ts.year, ts.month) for ts in months] == [(2024, 11), (2024, 12), (2025, 1), (2025, 2), (2025, 3), (2025, 4)]
+    assert all(ts.day == 1 and ts.hour == 0 for ts in months)
+
+
+def test_half_hour_offset_zone():
+    # Local midnight in Kolkata is 18:30 UTC the day before
+    starts = _starts(datetime(2025, 1, 1, 18), datetime(2025, 1, 3, 18, 30), "day", KOLKATA)
+    assert [ts.astimezone(timezone.utc).replace(tzinfo=None) for ts in starts] == [
+        datetime(2024, 12, 31, 18, 30), datetime(2025, 1, 1, 18, 30), datetime(2025, 1, 2, 18, 30),
+    ]
+
+
+def test_empty_window_has_no_buckets():
+    ts = datetime(2025, 6, 1, 12)
+    assert _starts(ts, ts, "hour", BERLIN) == []
+    assert len(_starts(ts, ts + timedelta(minutes=1), "hour", BERLIN)) == 1
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
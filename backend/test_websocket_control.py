@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the subscribe/unsubscribe control messages of the multiplexed
+WebSocket endpoint.
+"""
+
+import sys
+import os
+import json
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from app.utils.websocket_manager import ConnectionManager, Subscriber
+
+
+def _subscriber(manager):
+    # The transport-less base class keeps queued messages for inspection
+    subscriber = Subscriber(manager, manager.max_queue, manager.policy)
+    manager.subscribers.add(subscriber)
+    return subscriber
+
+
+def _replies(subscriber):
+    messages = [json.loads(event.text) for _, event in subscriber._pending]
+    subscriber._pending.clear()
+    return messages
+
+
+def _control(manager, subscriber, **request):
+    manager.handle_control(subscriber, json.dumps(request))
+    return _replies(subscriber)
+
+
+def test_subscribe_adds_channels_and_replies():
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    replies = _control(manager, subscriber, action="subscribe", channels=["mo_status:*", "wo_status:wo1"])
+    assert [reply["type"] for reply in replies] == ["subscribed"]
+    assert replies[0]["channels"] == ["mo_status:*", "wo_status:wo1"]
+    assert subscriber.channels == {"mo_status:*", "wo_status:wo1"}
+    assert manager.subscriber_count("wo_status:wo1") == 1
+
+
+def test_a_single_channel_string_is_accepted():
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    replies = _control(manager, subscriber, action="subscribe", channels="mo_status:mo1")
+    assert replies[0]["channels"] == ["mo_status:mo1"]
+
+
+def test_unsubscribe_removes_channels():
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    _control(manager, subscriber, action="subscribe", channels=["mo_status:*", "wo_status:wo1"])
+    replies = _control(manager, subscriber, action="unsubscribe", channels=["mo_status:*"])
+    assert replies == [{"type": "unsubscribed", "channels": ["mo_status:*"]}]
+    assert subscriber.channels == {"wo_status:wo1"}
+    assert "mo_status:*" not in manager.channels
+
+    manager.deliver("mo_status", "mo1", {"status": "done"})
+    assert _replies(subscriber) == []
+
+
+def test_text_that_is_not_json_is_ignored():
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    manager.handle_control(subscriber, "ping")
+    assert _replies(subscriber) == []
+    assert subscriber.channels == set()
+
+
+def test_malformed_requests_get_an_error():
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    for request in ([1, 2], {"action": "watch", "channels": ["mo_status:*"]}, {"action": "subscribe"}):
+        manager.handle_control(subscriber, json.dumps(request))
+        replies = _replies(subscriber)
+        assert [reply["type"] for reply in replies] == ["error"], request
+    assert subscriber.channels == set()
+
+
+def test_an_invalid_channel_rejects_the_whole_request():
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    for channel in ("mo_status", "mo_status:", "*:mo1", "mo_status:mo*", 42):
+        replies = _control(manager, subscriber, action="subscribe", channels=["wo_status:*", channel])
+        assert [reply["type"] for reply in replies] == ["error"], channel
+    assert subscriber.channels == set()
+
+
+def test_subscription_limit():
+    manager = ConnectionManager(max_subscriptions=2)
+    subscriber = _subscriber(manager)
+    replies = _control(manager, subscriber, action="subscribe", channels=["mo_status:a", "mo_status:b", "mo_status:c"])
+    assert [reply["type"] for reply in replies] == ["subscribed", "error"]
+    assert replies[0]["channels"] == ["mo_status:a", "mo_status:b"]
+    assert "limit of 2" in replies[1]["message"]
+    assert subscriber.channels == {"mo_status:a", "mo_status:b"}
+
+    # Channels already held do not count against the limit again
+    replies = _control(manager, subscriber, action="subscribe", channels=["mo_status:a"])
+    assert [reply["type"] for reply in replies] == ["subscribed"]
+
+
+def test_apply_control_takes_a_decoded_request():
+    # The WebSocket route's topic/project_id shorthand goes through here
+    manager = ConnectionManager()
+    subscriber = _subscriber(manager)
+    manager.apply_control(subscriber, {"action": "subscribe", "channels": ["mo_status:*:x"], "last_event_id": None})
+    assert [reply["type"] for reply in _replies(subscriber)] == ["error"]
+    manager.apply_control(subscriber, {"action": "subscribe", "channels": ["mo_status:mo1"], "last_event_id": None})
+    assert [reply["type"] for reply in _replies(subscriber)] == ["subscribed"]
+
+
+def test_one_encoded_event_is_shared_by_all_subscribers():
+    manager = ConnectionManager()
+    subscribers = [_subscriber(manager) for _ in range(3)]
+    _control(manager, subscribers[0], action="subscribe", channels=["mo_status:mo1"])
+    _control(manager, subscribers[1], action="subscribe", channels=["mo_status:*"])
+    _control(manager, subscribers[2], action="subscribe", channels=["mo_status:mo1", "mo_status:*"])
+    manager.deliver("mo_status", "mo1", {"status": "done"})
+
+    events = [event for subscriber in subscribers for _, event in subscriber._pending]
+    assert len(events) == 3
+    assert all(event is events[0] for event in events)
+    assert json.loads(events[0].text)["channel"] == "mo_status:mo1"
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for fanning live events out to subscribers and the slow-consumer policies.
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from app.utils.websocket_manager import SLOW_CONSUMER_CLOSE_CODE, ConnectionManager, Subscriber
+
+
+class FakeWebSocket:
+    """Accepts sends until `block` is set, like a client that stopped reading."""
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self.block = asyncio.Event()
+
+    async def send_text(self, text):
+        if self.block.is_set():
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _subscriber(manager, *channels):
+    # The transport-less base class keeps queued messages for inspection
+    subscriber = Subscriber(manager, manager.max_queue, manager.policy)
+    manager.subscribers.add(subscriber)
+    for channel in channels:
+        manager.subscribe(subscriber, channel)
+    return subscriber
+
+
+def _queued(subscriber):
+    return [json.loads(event.text) for _, event in subscriber._pending]
+
+
+def test_drop_policy_discards_the_oldest_message():
+    manager = ConnectionManager(max_queue=3, policy="drop")
+    subscriber = _subscriber(manager, "wo_status:*")
+    for n in range(5):
+        manager.deliver("wo_status", f"wo{n}", {"work_order_id": f"wo{n}", "n": n})
+    assert [message["n"] for message in _queued(subscriber)] == [2, 3, 4]
+    assert subscriber.dropped == 2
+    assert manager.stats()["dropped"] == 2
+
+
+def test_coalesce_policy_keeps_the_newest_message_per_entity():
+    manager = ConnectionManager(max_queue=3, policy="coalesce")
+    subscriber = _subscriber(manager, "wo_status:*")
+    manager.deliver("wo_status", "a", {"work_order_id": "a", "n": 1})
+    manager.deliver("wo_status", "b", {"work_order_id": "b", "n": 2})
+    manager.deliver("wo_status", "c", {"work_order_id": "c", "n": 3})
+    # Queue is full: the older "a" update is replaced and the new one goes to the back
+    manager.deliver("wo_status", "a", {"work_order_id": "a", "n": 4})
+    assert [message["n"] for message in _queued(subscriber)] == [2, 3, 4]
+    # No queued message for "d": falls back to dropping the oldest
+    manager.deliver("wo_status", "d", {"work_order_id": "d", "n": 5})
+    assert [message["n"] for message in _queued(subscriber)] == [3, 4, 5]
+    assert subscriber.dropped == 2
+
+
+def test_coalesce_only_applies_when_the_queue_is_full():
+    manager = ConnectionManager(max_queue=10, policy="coalesce")
+    subscriber = _subscriber(manager, "wo_status:a")
+    for n in range(3):
+        manager.deliver("wo_status", "a", {"work_order_id": "a", "n": n})
+    assert [message["n"] for message in _queued(subscriber)] == [0, 1, 2]
+
+
+def test_disconnect_policy_closes_a_slow_websocket():
+    async def run():
+        manager = ConnectionManager(max_queue=2, policy="disconnect")
+        slow_socket, fast_socket = FakeWebSocket(), FakeWebSocket()
+        slow_socket.block.set()
+        slow = await manager.connect(slow_socket, "mo_status:*")
+        fast = await manager.connect(fast_socket, "mo_status:*")
+        for n in range(4):
+            manager.deliver("mo_status", "mo1", {"mo_id": "mo1", "n": n})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        assert slow.closed and slow_socket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+        assert slow not in manager.subscribers
+        assert manager.subscriber_count("mo_status:*") == 1
+        # Other subscribers are unaffected
+        assert [message["n"] for message in fast_socket.sent] == [0, 1, 2, 3]
+        assert not fast.closed
+        await manager.close_all()
+        assert fast_socket.closed_with == 1001
+
+    asyncio.run(run())
+
+
+def test_exact_and_wildcard_subscriptions_receive_an_event_once():
+    manager = ConnectionManager(max_queue=10)
+    both = _subscriber(manager, "mo_status:mo1", "mo_status:*")
+    exact = _subscriber(manager, "mo_status:mo1")
+    other = _subscriber(manager, "mo_status:mo2", "wo_status:*")
+    manager.deliver("mo_status", "mo1", {"mo_id": "mo1"})
+    assert len(both._pending) == 1 and len(exact._pending) == 1
+    assert len(other._pending) == 0
+    # One encoded event is shared by every subscriber
+    assert both._pending[0][1] is exact._pending[0][1]
+    assert _queued(both)[0]["channel"] == "mo_status:mo1"
+
+
+def test_stats_counts_subscribers_channels_and_queues():
+    manager = ConnectionManager(max_queue=10)
+    first = _subscriber(manager, "mo_status:mo1", "mo_status:*")
+    _subscriber(manager, "wo_status:*")
+    manager.deliver("mo_status", "mo1", {"mo_id": "mo1"})
+    stats = manager.stats()
+    assert stats["subscribers"] == 2
+    assert stats["subscribers_per_kind"] == {"subscriber": 2}
+    assert stats["channels"] == 3
+    assert stats["subscribers_per_topic"] == {"mo_status": 2, "wo_status": 1}
+    assert stats["queued"] == 1 and stats["dropped"] == 0
+    manager._remove(first)
+    stats = manager.stats()
+    assert stats["subscribers"] == 1 and stats["channels"] == 1
+    assert stats["subscribers_per_topic"] == {"wo_status": 1}
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
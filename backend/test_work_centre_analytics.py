@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the per work centre utilization and cost summary.
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from app.service.work_centre_analytics_service import summarise_work_centres
+
+HOUR_MS = 3_600_000
+
+CENTRES = [
+    {"_id": "assembly", "name": "Assembly", "cost_per_hour": 10},
+    {"_id": "paint", "name": "Paint", "cost_per_hour": None},
+    {"_id": "idle", "name": "Idle", "cost_per_hour": 5},
+]
+
+DURATIONS = [
+    {"mo_id": "mo1", "durations": [60, 30]},
+    {"mo_id": "mo2", "durations": [90]},
+]
+
+WORK_ORDERS = [
+    # Fully timestamped: 1h queued, 2h busy
+    {"mo_id": "mo1", "work_center_id": "assembly", "sequence": 0, "ready_at": 0, "started_at": HOUR_MS, "completed_at": 3 * HOUR_MS},
+    # Completed before timestamps were recorded: planned 30 minutes, no queue time
+    {"mo_id": "mo1", "work_center_id": "paint", "sequence": 1},
+    # No start time: planned 90 minutes
+    {"mo_id": "mo2", "work_center_id": "assembly", "sequence": 0, "completed_at": 5 * HOUR_MS},
+]
+
+
+def _by_centre(summary):
+    return {row.work_centre_id: row for row in summary["work_centres"]}
+
+
+def test_no_data():
+    summary = summarise_work_centres([], [], [], 720)
+    assert summary == {"work_centres": [], "manufacturing_orders": 0, "total_cost": 0.0, "average_cost_per_mo": 0.0}
+
+
+def test_idle_centres_are_reported_with_zeros():
+    summary = summarise_work_centres([], [], CENTRES, 720)
+    rows = _by_centre(summary)
+    assert set(rows) == {"assembly", "paint", "idle"}
+    assert all(row.work_orders == 0 and row.busy_hours == 0 and row.utilization_pct == 0 for row in rows.values())
+    assert summary["manufacturing_orders"] == 0
+
+
+def test_missing_timestamps_fall_back_to_planned_duration():
+    rows = _by_centre(summarise_work_centres(WORK_ORDERS, DURATIONS, CENTRES, 10))
+    assembly = rows["assembly"]
+    assert assembly.work_orders == 2 and assembly.manufacturing_orders == 2
+    assert assembly.busy_hours == 3.5  # 2h measured + 1.5h planned
+    assert assembly.planned_hours == 2.5
+    assert assembly.utilization_pct == 35.0
+    assert rows["paint"].busy_hours == 0.5
+
+
+def test_queue_time_skips_work_orders_without_both_timestamps():
+    rows = _by_centre(summarise_work_centres(WORK_ORDERS, DURATIONS, CENTRES, 10))
+    assert rows["assembly"].queue_hours == 1.0
+    assert rows["assembly"].avg_queue_minutes == 60.0
+    assert rows["paint"].queue_hours == 0 and rows["paint"].avg_queue_minutes == 0
+
+
+def test_costs():
+    summary = summarise_work_centres(WORK_ORDERS, DURATIONS, CENTRES, 10)
+    rows = _by_centre(summary)
+    assert rows["assembly"].cost == 35.0 and rows["assembly"].cost_per_mo == 17.5
+    # A centre without an hourly cost adds nothing
+    assert rows["paint"].cost == 0 and rows["paint"].cost_per_hour is None
+    assert summary["manufacturing_orders"] == 2
+    assert summary["total_cost"] == 35.0
+    assert summary["average_cost_per_mo"] == 17.5
+
+
+def test_sorted_by_utilization():
+    summary = summarise_work_centres(WORK_ORDERS, DURATIONS, CENTRES, 10)
+    utilization = [row.utilization_pct for row in summary["work_centres"]]
+    assert utilization == sorted(utilization, reverse=True)
+
+
+def test_without_centres_or_durations_or_window():
+    """Unknown centres, MOs without durations and a zero window do not fail."""
+    rows = _by_centre(summarise_work_centres(WORK_ORDERS, [], [], 0))
+    assert rows["assembly"].busy_hours == 2.0
+    assert rows["assembly"].name is None and rows["assembly"].cost == 0
+    assert rows["paint"].busy_hours == 0
+    assert all(row.utilization_pct == 0 for row in rows.values())
+
+
+def test_negative_intervals_are_clipped():
+    work_orders = [{"mo_id": "mo1", "work_center_id": "assembly", "sequence": 0,
+                    "ready_at": 2 * HOUR_MS, "started_at": HOUR_MS, "completed_at": 0}]
+    row = _by_centre(summarise_work_centres(work_orders, [], CENTRES, 10))["assembly"]
+    assert row.busy_hours == 0 and row.queue_hours == 0
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for the brokers that share live events between API workers.
+"""
+
+import sys
+import os
+import asyncio
+import socket
+import tempfile
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Settings are required at import time; these tests never connect to MongoDB
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+
+from bson import ObjectId
+from app.utils.ws_broker import InProcessBroker, MongoBroker, UnixSocketBroker, _encode
+
+
+def _recorder():
+    received = []
+    return received, lambda topic, project_id, data: received.append((topic, project_id, data))
+
+
+def test_in_process_broker_delivers_locally():
+    async def run():
+        broker = InProcessBroker()
+        received, deliver = _recorder()
+        await broker.start(deliver)
+        await broker.publish("mo_status", "mo1", {"status": "done"})
+        assert received == [("mo_status", "mo1", {"status": "done"})]
+
+    asyncio.run(run())
+
+
+def test_unix_socket_brokers_deliver_each_event_once_per_worker():
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = UnixSocketBroker(directory), UnixSocketBroker(directory)
+            first_received, first_deliver = _recorder()
+            second_received, second_deliver = _recorder()
+            await first.start(first_deliver)
+            await second.start(second_deliver)
+            try:
+                await first.publish("wo_status", "wo1", {"n": 1})
+                await second.publish("mo_status", "mo1", {"n": 2})
+                await asyncio.sleep(0.05)
+                expected = [("wo_status", "wo1", {"n": 1}), ("mo_status", "mo1", {"n": 2})]
+                assert sorted(first_received, key=str) == sorted(expected, key=str)
+                assert sorted(second_received, key=str) == sorted(expected, key=str)
+            finally:
+                await first.stop()
+                await second.stop()
+            assert os.listdir(directory) == []
+
+    asyncio.run(run())
+
+
+def test_unix_socket_broker_skips_malformed_datagrams_and_dead_peers():
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            broker = UnixSocketBroker(directory)
+            received, deliver = _recorder()
+            await broker.start(deliver)
+            # A socket file left behind by a worker that died
+            dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            dead.bind(os.path.join(directory, "dead.sock"))
+            dead.close()
+            sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                for payload in (b"not json", b"[1, 2]", b'{"topic": "mo_status"}', b'{"topic": "mo_status", "project_id": "mo1", "data": {}}'):
+                    sender.sendto(payload, broker.path)
+                # Read synchronously: the event loop would swallow an exception
+                # raised in its reader callback
+                broker._on_readable()
+                assert received == [("mo_status", "mo1", {})]
+                await broker.publish("mo_status", "mo2", {})
+                assert "dead.sock" not in os.listdir(directory)
+            finally:
+                sender.close()
+                await broker.stop()
+
+    asyncio.run(run())
+
+
+class FakeTailableCursor:
+    """Yields the documents once, then reports the cursor as dead."""
+    def __init__(self, docs):
+        self.docs = docs
+        self.alive = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.docs:
+            self.alive = False
+            raise StopAsyncIteration
+        return self.docs.pop(0)
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.inserted = []
+
+    def find(self, query, cursor_type=None):
+        return FakeTailableCursor([doc for doc in self.docs if doc["_id"] >= query["_id"]["$gte"]])
+
+    async def insert_one(self, doc):
+        self.inserted.append(doc)
+
+
+class FakeDatabase:
+    def __init__(self, docs):
+        self.collection = FakeCollection(docs)
+
+    def __getitem__(self, name):
+        return self.collection
+
+
+def test_mongo_broker_tail_skips_markers_own_events_and_repeats():
+    async def run():
+        own_origin = "this-worker"
+        event = {"_id": ObjectId(), **_encode("wo_status", "wo1", {"n": 1}, "other-worker")}
+        docs = [
+            {"_id": ObjectId(), **_encode(None, None, None, "other-worker")},  # another worker's start marker
+            {"_id": ObjectId(), **_encode(None, None, None, own_origin)},
+            {"_id": ObjectId(), **_encode("mo_status", "mo1", {"n": 0}, own_origin)},  # delivered locally on publish
+            event,
+            dict(event),  # seen again after a cursor restart
+        ]
+        broker = MongoBroker(FakeDatabase(docs), retry_seconds=0)
+        broker.origin = own_origin
+        received, deliver = _recorder()
+        broker.deliver = deliver
+        tail = asyncio.create_task(broker._tail())
+        await asyncio.sleep(0.3)
+        tail.cancel()
+        await asyncio.gather(tail, return_exceptions=True)
+        assert received == [("wo_status", "wo1", {"n": 1})]
+
+    asyncio.run(run())
+
+
+def test_mongo_broker_publish_delivers_locally_and_stores_the_event():
+    async def run():
+        db = FakeDatabase([])
+        broker = MongoBroker(db)
+        received, deliver = _recorder()
+        broker.deliver = deliver
+        await broker.publish("mo_status", "mo1", {"n": 1})
+        assert received == [("mo_status", "mo1", {"n": 1})]
+        (stored,) = db.collection.inserted
+        assert stored["origin"] == broker.origin and stored["topic"] == "mo_status"
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    tests = [obj for name, obj in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("✅ All tests passed!")